@@ -1,23 +1,109 @@
 import os
 import re
+import sys
 import json
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Union
-
-from Ollama_model import get_ollama_llm
-from Langchain.Searchtool import file_system_search, preindex_path
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional, Union
+
+from Ollama_model import DEFAULT_MODEL, get_ollama_llm
+from Langchain.Searchtool import (
+    batch_search, build_name_vocabulary, classify_query, extract_meaningful_keywords, file_system_search,
+    preindex_path,
+)
+from Langchain.retrieval import BM25Index, build_context
+from Langchain.conversation import QA_INSTRUCTIONS, GenerationInfoCapture, QAConversation
+from Langchain.map_reduce import iter_map_reduce
+from Langchain.llm_cache import get_prompt_cache
+from Langchain.metadata_filters import (
+    MtimeLookup, TimeRange, extract_period_ranges, relative_day_ranges, year_ranges,
+)
+from Langchain.metrics import record_span, span, timed
+
+# 프롬프트 문구를 바꾸면 버전을 올려 캐시된 결과를 무효화
+KEYWORD_PROMPT_VERSION = "kw-v2"
+TRANSLATE_PROMPT_VERSION = "tr-v1"
+
+# 키워드 추출/번역 LLM 호출을 동시에 실행하기 위한 공용 스레드 풀
+_LLM_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="odin-llm")
 
 class SearchSession:
-    def __init__(self, base_path: str, model_name: str = "llama3:8b") -> None:
+    def __init__(self, base_path: str, model_name: str = DEFAULT_MODEL,
+                 index_info: Optional[Dict[str, Any]] = None) -> None:
         self.base_path = base_path
+        self.model_name = model_name
         self.llm = get_ollama_llm(model_name)
-        self.index_info = preindex_path(base_path)
+        # index_info를 넘기면 (세션 관리자가 공유하는) 이미 로드된 인덱스를 그대로 사용
+        self.index_info = index_info if index_info is not None else preindex_path(base_path)
         self.now_dt: datetime = datetime.now()
+        # 키워드 추출 LLM 응답 대기 한도(초). 초과 시 규칙 기반 키워드로 대체
+        self.keyword_latency_budget_sec: float = float(os.environ.get("ODIN_KEYWORD_BUDGET_SEC", "8"))
+        # 규칙 기반 키워드만으로 충분한 질의는 LLM을 건너뜀
+        self.fast_path_enabled: bool = True
+        self._name_vocabulary: Optional[List[str]] = None
+        self._mtime_lookup: Optional[MtimeLookup] = None
+        # 기간 필터는 인덱스의 수정 시각으로 판정하고, stat은 화면에 보일 결과에만 사용 (0이면 생략)
+        self.verify_visible_with_stat: bool = os.environ.get("ODIN_VERIFY_VISIBLE", "1") != "0"
+        self._llm_keyword_ms_avg: Optional[float] = None
+        self.last_route: Dict[str, Any] = {}
 
         self.selected_files: List[str] = []
         self.loaded_docs: Dict[str, str] = {}
         self._last_folder_suggestions = set()
 
+        # Q&A 프롬프트에 넣을 문서 조각의 토큰 예산
+        self.context_token_budget: int = 3000
+        self._retriever: Optional[BM25Index] = None
+        self._retriever_docs: Optional[Dict[str, str]] = None
+        # 청크 인덱스/대화 객체 생성은 작업 스레드에서 동시에 일어날 수 있음
+        self._retriever_lock = threading.Lock()
+        # 후속 질문에서 문서 프리픽스와 Ollama context 상태를 재사용하는 대화 모드
+        self.conversation_mode: bool = True
+        self._conversation: Optional[QAConversation] = None
+        # map-reduce 답변에서 동시에 실행할 문서별 LLM 호출 수
+        self.map_reduce_concurrency: int = int(os.environ.get("ODIN_MAP_CONCURRENCY", "3"))
+
+    def set_model(self, model_name: str) -> None:
+        """Switch the LLM (pooled client) without rebuilding the session or reloading the index"""
+        self.llm = get_ollama_llm(model_name)
+        self.model_name = model_name
+        if self._conversation is not None:
+            # context 토큰은 모델별이므로 대화를 새로 시작
+            self._conversation.reset()
+
+    def set_index_info(self, index_info: Dict[str, Any]) -> None:
+        """Swap in a refreshed index result (e.g. after /index) and drop derived state"""
+        self.index_info = index_info
+        self._name_vocabulary = None
+        self._mtime_lookup = None
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held by this session's own state (the shared file index is excluded)"""
+        docs = sum(sys.getsizeof(t) for t in self.loaded_docs.values())
+        retriever = 0
+        if self._retriever is not None:
+            retriever = sum(sys.getsizeof(c.text) + sys.getsizeof(tf) for c, tf in
+                            zip(self._retriever.chunks, self._retriever._tfs))
+            retriever += len(self._retriever._idf) * 100
+        conversation = 0
+        if self._conversation is not None:
+            conversation = sum(sys.getsizeof(t) for t in self._conversation._transcript)
+            conversation += 28 * len(self._conversation._context_tokens or [])
+        vocabulary = sum(sys.getsizeof(t) for t in self._name_vocabulary or [])
+        return {"docs": docs, "retriever": retriever, "conversation": conversation, "vocabulary": vocabulary}
+
+    def export_documents(self) -> Dict[str, Any]:
+        """Loaded documents and selection, for spilling an evicted session to disk"""
+        return {"selected_files": list(self.selected_files), "loaded_docs": dict(self.loaded_docs)}
+
+    def restore_documents(self, state: Dict[str, Any]) -> None:
+        self.selected_files = list(state.get("selected_files") or [])
+        self.loaded_docs = dict(state.get("loaded_docs") or {})
+
     def suggest_subkeywords(self, paths: List[str], max_suggestions: int = 20) -> List[str]:
         """Extract frequently appearing tokens from file paths for sub-keyword suggestions"""
         file_counter: Dict[str, int] = {}
@@ -98,14 +184,113 @@ class SearchSession:
                 filtered.append(p)
         return filtered
 
+    @timed("keywords")
     def extract_keywords(self, question: str) -> List[str]:
-        """Extract core search keywords from question"""
-        prompt = f"""
+        """Extract core search keywords from question
+
+        The keyword prompt and the English->Korean translation run concurrently.
+        If the keyword call misses the latency budget (or fails), rule-based keywords are used.
+        """
+        if self.fast_path_enabled:
+            route = self.route_query(question)
+            if route['route'] == 'fast':
+                return route['keywords'][:8]
+
+        started = time.perf_counter()
+        deadline = started + self.keyword_latency_budget_sec
+        en_terms = self._extract_english_terms(question)
+        kw_future = _LLM_EXECUTOR.submit(self._llm_keywords, question, deadline)
+        tr_future = _LLM_EXECUTOR.submit(self._translate_en_terms_to_ko, en_terms, deadline) if en_terms else None
+        futures = [f for f in (kw_future, tr_future) if f]
+        wait(futures, timeout=self.keyword_latency_budget_sec)
+        for f in futures:
+            # 아직 큐에서 기다리는 호출은 취소 (이미 실행 중인 호출은 끝까지 돌아 캐시를 채움)
+            f.cancel()
+
+        llm_keywords = None
+        if kw_future.done() and not kw_future.cancelled() and kw_future.exception() is None:
+            llm_keywords = kw_future.result()
+            self._record_keyword_latency(started)
+        translated = None
+        if tr_future is not None and tr_future.done() and not tr_future.cancelled() and tr_future.exception() is None:
+            translated = tr_future.result()
+        return self._merge_keywords(question, llm_keywords, en_terms, translated)
+
+    @timed("keywords")
+    async def aextract_keywords(self, question: str) -> List[str]:
+        """Async variant of extract_keywords using the Ollama async client (no worker thread held while waiting)"""
+        if self.fast_path_enabled:
+            loop = asyncio.get_running_loop()
+            route = await loop.run_in_executor(None, self.route_query, question)
+            if route['route'] == 'fast':
+                return route['keywords'][:8]
+
+        started = time.perf_counter()
+        en_terms = self._extract_english_terms(question)
+        kw_task = asyncio.ensure_future(self._allm_keywords(question))
+        tr_task = asyncio.ensure_future(self._atranslate_en_terms_to_ko(en_terms)) if en_terms else None
+        tasks = [t for t in (kw_task, tr_task) if t]
+        await asyncio.wait(tasks, timeout=self.keyword_latency_budget_sec)
+        for t in tasks:
+            # 예산을 넘긴 호출은 취소 (HTTP 요청이 끊겨 Ollama 슬롯을 계속 잡지 않음)
+            t.cancel()
+
+        llm_keywords = None
+        if kw_task.done() and not kw_task.cancelled() and kw_task.exception() is None:
+            llm_keywords = kw_task.result()
+            self._record_keyword_latency(started)
+        translated = None
+        if tr_task is not None and tr_task.done() and not tr_task.cancelled() and tr_task.exception() is None:
+            translated = tr_task.result()
+        return self._merge_keywords(question, llm_keywords, en_terms, translated)
+
+    def _record_keyword_latency(self, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        avg = self._llm_keyword_ms_avg
+        self._llm_keyword_ms_avg = elapsed_ms if avg is None else 0.8 * avg + 0.2 * elapsed_ms
+
+    def _merge_keywords(self, question: str, llm_keywords: Optional[List[str]], en_terms: List[str],
+                        translated: Optional[List[str]]) -> List[str]:
+        """Combine LLM (or rule-based fallback) keywords with English terms and their translations"""
+        if llm_keywords:
+            dedup = list(llm_keywords)
+        else:
+            print(f"[키워드] LLM 응답이 {self.keyword_latency_budget_sec}s 예산을 초과했거나 비어 있어 규칙 기반 키워드를 사용합니다.")
+            dedup = extract_meaningful_keywords(question)
+
+        if en_terms:
+            for t in en_terms:
+                if t not in dedup:
+                    dedup.append(t)
+            for t in translated or []:
+                t2 = self._normalize_keyword(t)
+                if t2 and t2 not in dedup:
+                    dedup.append(t2)
+
+        return dedup[:8] if dedup else [question]
+
+    def route_query(self, question: str) -> Dict[str, Any]:
+        """Classify the query with rule-based extractors and index vocabulary; logs the routing decision"""
+        if self._name_vocabulary is None:
+            self._name_vocabulary = build_name_vocabulary(self.index_info.get('file_infos') or [])
+        started = time.perf_counter()
+        route = classify_query(question, self._name_vocabulary)
+        route['classify_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        self.last_route = route
+        if route['route'] == 'fast':
+            saved = f"{self._llm_keyword_ms_avg:.0f} ms" if self._llm_keyword_ms_avg is not None else "LLM 호출 1~2회"
+            print(f"[라우팅] fast: {route['keywords']} ({route['reason']}, 분류 {route['classify_ms']} ms, 절약 약 {saved})")
+        else:
+            print(f"[라우팅] llm: {route['reason']}")
+        return route
+
+    def _keyword_prompt(self, question: str) -> str:
+        return f"""
 파일 검색을 위한 키워드만 추출하세요.
 
 질문: "{question}"
 
-현재 기준 시각(ISO8601): {self.now_dt.isoformat()}
+오늘 날짜(ISO8601): {self.now_dt.date().isoformat()}
 
 규칙:
 - 한국어 우선 3~5개의 핵심 키워드만 선택 (불릿/설명/레이블 금지)
@@ -114,49 +299,73 @@ class SearchSession:
 - 출력은 반드시 JSON 배열 문자열로만 출력 (예: ["결혼","혼인","웨딩","신혼"]) 그 외 어떤 텍스트도 금지
 """
 
-        try:
-            resp = self.llm.invoke(prompt)
-            raw = (resp or "").strip()
-            json_text = None
-            if "[" in raw and "]" in raw:
-                try:
-                    json_text = raw[raw.index("[") : raw.rindex("]") + 1]
-                except Exception:
-                    json_text = raw
-            keywords: List[str] = []
-            if json_text:
-                try:
-                    data = json.loads(json_text)
-                    if isinstance(data, list):
-                        keywords = [str(x) for x in data]
-                except Exception:
-                    pass
-            if not keywords:
-                parts = re.split(r"[\n,]+", raw)
-                keywords = [p.strip().strip("\"'") for p in parts if p.strip()]
-
-            cleaned: List[str] = []
-            for k in keywords:
-                k2 = self._normalize_keyword(k)
-                if k2 and len(k2) > 1:
-                    cleaned.append(k2)
-            dedup = list(dict.fromkeys(cleaned))
-
-            en_terms = self._extract_english_terms(question)
-            if en_terms:
-                for t in en_terms:
-                    if t not in dedup:
-                        dedup.append(t)
-                ko_terms = self._translate_en_terms_to_ko(en_terms)
-                for t in ko_terms:
-                    t2 = self._normalize_keyword(t)
-                    if t2 and t2 not in dedup:
-                        dedup.append(t2)
-
-            return dedup[:8] if dedup else [question]
+    def _keyword_cache_key(self, cache, question: str) -> str:
+        # 프롬프트에 오늘 날짜가 들어가므로 ("지난주" 등의 해석이 달라짐) 날짜별로 캐시
+        version = f"{KEYWORD_PROMPT_VERSION}@{self.now_dt.date().isoformat()}"
+        return cache.make_key("keywords", self.model_name, version, question)
 
-        except Exception as e:
-            return [question]
+    def _parse_keyword_response(self, resp: str) -> List[str]:
+        raw = (resp or "").strip()
+        json_text = None
+        if "[" in raw and "]" in raw:
+            try:
+                json_text = raw[raw.index("[") : raw.rindex("]") + 1]
+            except Exception:
+                json_text = raw
+        keywords: List[str] = []
+        if json_text:
+            try:
+                data = json.loads(json_text)
+                if isinstance(data, list):
+                    keywords = [str(x) for x in data]
+            except Exception:
+                pass
+        if not keywords:
+            parts = re.split(r"[\n,]+", raw)
+            keywords = [p.strip().strip("\"'") for p in parts if p.strip()]
+
+        cleaned: List[str] = []
+        for k in keywords:
+            k2 = self._normalize_keyword(k)
+            if k2 and len(k2) > 1:
+                cleaned.append(k2)
+        return list(dict.fromkeys(cleaned))
+
+    def _llm_keywords(self, question: str, deadline: Optional[float] = None) -> List[str]:
+        """Run (or reuse the cached result of) the LLM keyword prompt
+
+        ``deadline`` (a ``time.perf_counter()`` value) drops the call if it only reaches a
+        pool worker after the caller has already given up on it.
+        """
+        cache = get_prompt_cache()
+        cache_key = self._keyword_cache_key(cache, question)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        if deadline is not None and time.perf_counter() >= deadline:
+            return []
+
+        with span("llm_keywords"):
+            resp = self.llm.invoke(self._keyword_prompt(question))
+        dedup = self._parse_keyword_response(resp)
+        if dedup:
+            cache.set(cache_key, dedup)
+        return dedup
+
+    async def _allm_keywords(self, question: str) -> List[str]:
+        """Async variant of _llm_keywords"""
+        cache = get_prompt_cache()
+        cache_key = self._keyword_cache_key(cache, question)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        with span("llm_keywords"):
+            resp = await self.llm.ainvoke(self._keyword_prompt(question))
+        dedup = self._parse_keyword_response(resp)
+        if dedup:
+            cache.set(cache_key, dedup)
+        return dedup
 
     def _normalize_keyword(self, s: str) -> str:
         """Remove bullets/labels/brackets/symbols and trim"""
@@ -190,38 +399,83 @@ class SearchSession:
                 out.append(t)
         return out[:5]
 
-    def _translate_en_terms_to_ko(self, terms: List[str]) -> List[str]:
-        """Translate English keywords to Korean search keywords"""
-        if not terms:
-            return []
-        import json
-        prompt = (
+    def _translate_cache_key(self, cache, terms: List[str]) -> str:
+        return cache.make_key(
+            "translate", self.model_name, TRANSLATE_PROMPT_VERSION,
+            json.dumps(sorted(t.lower() for t in terms), ensure_ascii=False),
+        )
+
+    def _translate_prompt(self, terms: List[str]) -> str:
+        return (
             "다음 영문 키워드들을 한국어 검색 키워드로 번역하세요.\n"
             "- 각 항목마다 한국어로 1~2개의 적절한 검색 키워드를 제시합니다.\n"
             "- 불필요한 설명 없이 JSON 배열 문자열만 출력합니다. 예: [\"계약\", \"매출\"]\n"
             f"영문 키워드: {json.dumps(terms, ensure_ascii=False)}"
         )
+
+    def _parse_translation_response(self, resp: str) -> List[str]:
+        raw = (resp or "").strip()
+        json_text = None
+        if "[" in raw and "]" in raw:
+            try:
+                json_text = raw[raw.index("[") : raw.rindex("]") + 1]
+            except Exception:
+                json_text = raw
+        if json_text:
+            try:
+                data = json.loads(json_text)
+                if isinstance(data, list):
+                    return [str(x) for x in data if str(x).strip()]
+            except Exception:
+                pass
+        parts = re.split(r"[\n,]+", raw)
+        return [p.strip().strip("\"'") for p in parts if p.strip()]
+
+    def _translate_en_terms_to_ko(self, terms: List[str], deadline: Optional[float] = None) -> List[str]:
+        """Translate English keywords to Korean search keywords (``deadline`` as in _llm_keywords)"""
+        if not terms:
+            return []
+        cache = get_prompt_cache()
+        cache_key = self._translate_cache_key(cache, terms)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        if deadline is not None and time.perf_counter() >= deadline:
+            return []
         try:
-            resp = self.llm.invoke(prompt)
-            raw = (resp or "").strip()
-            json_text = None
-            if "[" in raw and "]" in raw:
-                try:
-                    json_text = raw[raw.index("[") : raw.rindex("]") + 1]
-                except Exception:
-                    json_text = raw
-            if json_text:
-                try:
-                    data = json.loads(json_text)
-                    if isinstance(data, list):
-                        return [str(x) for x in data if str(x).strip()]
-                except Exception:
-                    pass
-            parts = re.split(r"[\n,]+", raw)
-            return [p.strip().strip("\"'") for p in parts if p.strip()]
+            with span("llm_translate"):
+                resp = self.llm.invoke(self._translate_prompt(terms))
+            result = self._parse_translation_response(resp)
+            if result:
+                cache.set(cache_key, result)
+            return result
+        except Exception:
+            return []
+
+    async def _atranslate_en_terms_to_ko(self, terms: List[str]) -> List[str]:
+        """Async variant of _translate_en_terms_to_ko"""
+        if not terms:
+            return []
+        cache = get_prompt_cache()
+        cache_key = self._translate_cache_key(cache, terms)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+        try:
+            with span("llm_translate"):
+                resp = await self.llm.ainvoke(self._translate_prompt(terms))
+            result = self._parse_translation_response(resp)
+            if result:
+                cache.set(cache_key, result)
+            return result
         except Exception:
             return []
 
+    def batch_search(self, queries: List[str], limit: int = 200,
+                     keywords_per_query: Optional[List[Optional[List[str]]]] = None) -> Dict[str, Any]:
+        """Search several queries against this session's index in one candidate pass (see Searchtool.batch_search)"""
+        return batch_search(queries, self.index_info.get('file_infos') or [], limit, keywords_per_query)
+
     def initial_search(self, keywords: Union[str, List[str]], limit: int = 200, reindex: bool = False) -> List[str]:
         """Multi-keyword search with fallback"""
         import json
@@ -229,40 +483,27 @@ class SearchSession:
         if isinstance(keywords, str):
             keywords = [keywords]
 
-        total_results = []
-        used_keywords = []
+        if reindex:
+            # 전체 재인덱싱(CSV 갱신)은 기존 도구 경로로 수행한 뒤 세션 인덱스를 다시 읽음
+            file_system_search.run(json.dumps({"search_query": keywords[0] if keywords else "",
+                                               "base_path": self.base_path, "limit": 1, "reindex": True}))
+            self.set_index_info(preindex_path(self.base_path))
 
-        for i, keyword in enumerate(keywords):
-            keyword = self._normalize_keyword(keyword)
+        queries = [k for k in (self._normalize_keyword(k) for k in keywords) if k]
+        # 키워드마다 인덱스를 다시 읽고 스캔하는 대신 한 번의 후보 스캔으로 모든 키워드를 처리
+        batch = self.batch_search(queries, limit)
 
-            try:
-                action_input = {
-                    "search_query": keyword,
-                    "base_path": self.base_path,
-                    "limit": limit,
-                    "reindex": reindex if i == 0 else False,
-                }
-                results = file_system_search.run(json.dumps(action_input))
-
-                parsed_results = []
-                if isinstance(results, list):
-                    parsed_results = results
-                elif isinstance(results, str):
-                    lines = [line.strip().strip("'\"") for line in results.splitlines() if line.strip()]
-                    parsed_results = lines
-
-                if parsed_results and len(parsed_results) > 0:
-                    used_keywords.append(keyword)
-                    total_results.extend(parsed_results)
-
-                    if i == 0 and len(parsed_results) >= 10:
-                        break
+        total_results = []
+        for i, info in enumerate(batch['queries']):
+            parsed_results = [fi.path for fi in info['results']]
+            if parsed_results:
+                total_results.extend(parsed_results)
 
-                    if len(total_results) >= 20:
-                        break
+                if i == 0 and len(parsed_results) >= 10:
+                    break
 
-            except Exception as e:
-                continue
+                if len(total_results) >= 20:
+                    break
 
         unique_results = list(dict.fromkeys(total_results))
         return unique_results[:limit]
@@ -289,20 +530,20 @@ class SearchSession:
         years = list(dict.fromkeys(years))
         return years
 
-    def filter_results_by_years(self, results: List[str], years: List[int]) -> List[str]:
-        if not years:
+    def _mtimes(self) -> MtimeLookup:
+        if self._mtime_lookup is None:
+            self._mtime_lookup = MtimeLookup(self.index_info.get('file_infos') or [])
+        return self._mtime_lookup
+
+    def filter_results_by_time(self, results: List[str], ranges: List[TimeRange]) -> List[str]:
+        """Keep results modified inside any of the ranges (index mtime, no stat calls)"""
+        if not ranges:
             return results
-        years_set = set(years)
-        filtered: List[str] = []
-        for p in results:
-            try:
-                mt = os.path.getmtime(p)
-                y = datetime.fromtimestamp(mt).year
-                if y in years_set:
-                    filtered.append(p)
-            except Exception:
-                pass
-        return filtered
+        with span("filter_time"):
+            return self._mtimes().filter(results, ranges)
+
+    def filter_results_by_years(self, results: List[str], years: List[int]) -> List[str]:
+        return self.filter_results_by_time(results, year_ranges(years))
 
     def extract_relative_day_flags(self, text: str) -> Dict[str, bool]:
         t = text.strip()
@@ -313,28 +554,31 @@ class SearchSession:
         }
 
     def filter_results_by_relative_days(self, results: List[str], flags: Dict[str, bool]) -> List[str]:
-        if not any(flags.values()):
+        return self.filter_results_by_time(results, relative_day_ranges(flags, self.now_dt))
+
+    def extract_period_filters(self, text: str) -> List[TimeRange]:
+        """This/last week or month and explicit dates / date ranges"""
+        return extract_period_ranges(text, self.now_dt)
+
+    def filter_results_by_periods(self, results: List[str], text: str) -> List[str]:
+        """Apply year, relative-day and period filters found in text (each group narrows the results)"""
+        results = self.filter_results_by_years(results, self.extract_year_filters(text))
+        results = self.filter_results_by_relative_days(results, self.extract_relative_day_flags(text))
+        return self.filter_results_by_time(results, self.extract_period_filters(text))
+
+    def verify_visible(self, results: List[str], page_size: int = 50) -> List[str]:
+        """Drop paths that no longer exist, stat-ing only until the first page is filled"""
+        if not self.verify_visible_with_stat:
             return results
-        today = self.now_dt.date()
-        yest = today - timedelta(days=1)
-        dbf = today - timedelta(days=2)
-        allowed_dates = set()
-        if flags.get("today"):
-            allowed_dates.add(today)
-        if flags.get("yesterday"):
-            allowed_dates.add(yest)
-        if flags.get("day_before_yesterday"):
-            allowed_dates.add(dbf)
-        filtered: List[str] = []
+        page: List[str] = []
+        checked = 0
         for p in results:
-            try:
-                mt = os.path.getmtime(p)
-                d = datetime.fromtimestamp(mt).date()
-                if d in allowed_dates:
-                    filtered.append(p)
-            except Exception:
-                pass
-        return filtered
+            if len(page) >= page_size:
+                break
+            checked += 1
+            if os.path.exists(p):
+                page.append(p)
+        return page + results[checked:]
 
     def choose_files_cli(self, results: List[str]) -> List[str]:
         if not results:
@@ -359,18 +603,19 @@ class SearchSession:
 
     def load_contents(self, paths: List[str]) -> Dict[str, str]:
         """Load and parse file contents"""
-        from Langchain.Searchtool import PARSER_MAPPING
+        from parsers.registry import get_parser
         contents: Dict[str, str] = {}
 
         for p in paths:
             if not os.path.isfile(p):
                 continue
             ext = os.path.splitext(p)[1].lower()
-            parser = PARSER_MAPPING.get(ext)
+            parser = get_parser(ext)
             if not parser:
                 continue
             try:
-                text = parser(p) or ""
+                with span("parse"):
+                    text = parser(p) or ""
                 if text:
                     contents[p] = text
             except Exception as e:
@@ -379,24 +624,217 @@ class SearchSession:
         self.loaded_docs = contents
         return contents
 
+    def _get_retriever(self) -> BM25Index:
+        """Build (or reuse) the chunk index for the currently loaded documents"""
+        with self._retriever_lock:
+            if self._retriever is None or self._retriever_docs is not self.loaded_docs:
+                self._retriever = BM25Index(self.loaded_docs)
+                self._retriever_docs = self.loaded_docs
+            return self._retriever
+
+    def _get_conversation(self) -> QAConversation:
+        retriever = self._get_retriever()
+        with self._retriever_lock:
+            if self._conversation is None or self._conversation.retriever is not retriever:
+                self._conversation = QAConversation(retriever, self.context_token_budget)
+            return self._conversation
+
+    @timed("retrieval")
+    def _prepare_qa(self, user_question: str):
+        """Return (prompt, generate kwargs, conversation or None) for a Q&A call
+
+        A returned conversation is claimed for this turn; the caller must call conv.end().
+        """
+        if self.conversation_mode:
+            conv = self._get_conversation()
+            # 같은 세션에서 이전 턴이 아직 생성 중이면 대화 상태를 건드리지 않고 단발 질의로 처리
+            if conv.begin():
+                try:
+                    prompt, kwargs = conv.prepare(user_question)
+                except BaseException:
+                    conv.end()
+                    raise
+                return prompt, kwargs, conv
+        context = build_context(self._get_retriever(), user_question, self.context_token_budget)
+        prompt = f"{QA_INSTRUCTIONS}문서들:\n{context}\n\n질문: {user_question}\n\n한국어 답변:"
+        return prompt, {}, None
+
+    async def _aprepare_qa(self, user_question: str):
+        """_prepare_qa on a worker thread: building the chunk index and context is CPU-bound
+
+        If the caller is cancelled while the worker is still running, a conversation it claims
+        is released once it finishes.
+        """
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        future = loop.run_in_executor(None, ctx.run, self._prepare_qa, user_question)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            def release(f: "asyncio.Future") -> None:
+                if not f.cancelled() and f.exception() is None and f.result()[2] is not None:
+                    f.result()[2].end()
+            future.add_done_callback(release)
+            raise
+
     def answer_with_context(self, user_question: str) -> str:
         """Answer using loaded document content as context"""
         if not self.loaded_docs:
             return "(선택된 파일 내용이 없습니다. 먼저 파일을 선택하고 읽어주세요.)"
-        context_blocks = []
-        for path, text in self.loaded_docs.items():
-            snippet = text[:3000]
-            context_blocks.append(f"[FILE]{path}\n{text[:3000]}")
-        context = "\n\n".join(context_blocks)
-        prompt = (
-            "다음은 사용자가 선택하여 제공한 문서들입니다. 문서 내용만 근거로 삼아 한국어로만 답변하세요.\n"
-            "- 반드시 한국어(한글)로만 출력하세요. 영어 문장/단어를 불필요하게 포함하지 마세요.\n"
-            "- 답변은 간결하고 정확하게 서술하세요.\n"
-            "- 필요하면 관련 파일명을 함께 언급하세요.\n"
-            f"문서들:\n{context}\n\n질문: {user_question}\n\n한국어 답변:"
+        prompt, kwargs, conv = self._prepare_qa(user_question)
+        capture = GenerationInfoCapture()
+        try:
+            with span("llm_answer"):
+                answer = self.llm.invoke(prompt, config={"callbacks": [capture]}, **kwargs)
+            if conv is not None:
+                conv.commit(answer, capture.info)
+            return answer
+        except Exception as e:
+            return f"LLM 호출 실패: {e}"
+        finally:
+            if conv is not None:
+                conv.end()
+
+    def stream_answer(self, user_question: str, cancel_event: Optional[threading.Event] = None,
+                      metrics: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Yield answer tokens as Ollama generates them; stop (and close the stream) once cancel_event is set
+
+        When a metrics dict is given it is filled with this stream's TTFT/token counts once the stream ends
+        (per call, so concurrent streams on one session don't see each other's numbers).
+        """
+        if not self.loaded_docs:
+            yield "(선택된 파일 내용이 없습니다. 먼저 파일을 선택하고 읽어주세요.)"
+            return
+        prompt, kwargs, conv = self._prepare_qa(user_question)
+        capture = GenerationInfoCapture()
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+        count = 0
+        parts: List[str] = []
+        completed = False
+        try:
+            stream = self.llm.stream(prompt, config={"callbacks": [capture]}, **kwargs)
+        except BaseException:
+            if conv is not None:
+                conv.end()
+            raise
+        try:
+            for token in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                count += 1
+                parts.append(token)
+                yield token
+            else:
+                completed = True
+        finally:
+            # 스트림을 닫으면 Ollama HTTP 연결이 끊겨 서버 측 생성도 중단됨
+            try:
+                stream.close()
+            finally:
+                if conv is not None:
+                    if completed:
+                        conv.commit("".join(parts), capture.info)
+                    conv.end()
+            result = self._stream_metrics(
+                started, first_token_at, count, bool(cancel_event is not None and cancel_event.is_set()), capture)
+            if metrics is not None:
+                metrics.update(result)
+
+    async def aanswer_with_context(self, user_question: str) -> str:
+        """Async variant of answer_with_context (ollama AsyncClient)"""
+        if not self.loaded_docs:
+            return "(선택된 파일 내용이 없습니다. 먼저 파일을 선택하고 읽어주세요.)"
+        prompt, kwargs, conv = await self._aprepare_qa(user_question)
+        capture = GenerationInfoCapture()
+        try:
+            with span("llm_answer"):
+                answer = await self.llm.ainvoke(prompt, config={"callbacks": [capture]}, **kwargs)
+            if conv is not None:
+                conv.commit(answer, capture.info)
+            return answer
+        except Exception as e:
+            return f"LLM 호출 실패: {e}"
+        finally:
+            if conv is not None:
+                conv.end()
+
+    async def astream_answer(self, user_question: str,
+                             metrics: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Async variant of stream_answer; closing the generator (aclose) cancels generation"""
+        if not self.loaded_docs:
+            yield "(선택된 파일 내용이 없습니다. 먼저 파일을 선택하고 읽어주세요.)"
+            return
+        prompt, kwargs, conv = await self._aprepare_qa(user_question)
+        capture = GenerationInfoCapture()
+        started = time.perf_counter()
+        first_token_at: Optional[float] = None
+        count = 0
+        parts: List[str] = []
+        completed = False
+        try:
+            stream = self.llm.astream(prompt, config={"callbacks": [capture]}, **kwargs)
+        except BaseException:
+            if conv is not None:
+                conv.end()
+            raise
+        try:
+            async for token in stream:
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                count += 1
+                parts.append(token)
+                yield token
+            completed = True
+        finally:
+            try:
+                await stream.aclose()
+            finally:
+                if conv is not None:
+                    if completed:
+                        conv.commit("".join(parts), capture.info)
+                    conv.end()
+            result = self._stream_metrics(started, first_token_at, count, not completed, capture)
+            if metrics is not None:
+                metrics.update(result)
+
+    @staticmethod
+    def _stream_metrics(started: float, first_token_at: Optional[float], count: int, cancelled: bool,
+                        capture: GenerationInfoCapture) -> Dict[str, Any]:
+        record_span("llm_stream", time.perf_counter() - started)
+        if first_token_at:
+            record_span("llm_ttft", first_token_at - started)
+        return {
+            "ttft_ms": round((first_token_at - started) * 1000, 1) if first_token_at else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+            "tokens": count,
+            "cancelled": cancelled,
+            "prompt_eval_count": capture.info.get("prompt_eval_count"),
+        }
+
+    def iter_map_reduce_answer(self, user_question: str,
+                               cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Map-reduce Q&A across all loaded documents; yields partial answers, then answer tokens"""
+        if not self.loaded_docs:
+            yield {"type": "token", "text": "(선택된 파일 내용이 없습니다. 먼저 파일을 선택하고 읽어주세요.)"}
+            return
+        yield from iter_map_reduce(
+            self.llm, self._get_retriever(), user_question,
+            token_budget=self.context_token_budget,
+            max_concurrency=self.map_reduce_concurrency,
+            cancel_event=cancel_event,
         )
+
+    def answer_map_reduce(self, user_question: str) -> str:
+        """Blocking variant of iter_map_reduce_answer returning only the final answer"""
         try:
-            return self.llm.invoke(prompt)
+            return "".join(ev["text"] for ev in self.iter_map_reduce_answer(user_question) if ev["type"] == "token")
         except Exception as e:
             return f"LLM 호출 실패: {e}"
 
@@ -417,14 +855,10 @@ def run_interactive_flow(base_path: str):
 
         results = sess.initial_search(keywords)
         if results and isinstance(results, list):
-            results = [r for r in results if not r.startswith("해당 키워드를") and os.path.exists(r)]
-
-        years = sess.extract_year_filters(question)
-        if years:
-            results = sess.filter_results_by_years(results, years)
-        day_flags = sess.extract_relative_day_flags(question)
-        if any(day_flags.values()):
-            results = sess.filter_results_by_relative_days(results, day_flags)
+            results = [r for r in results if not r.startswith("해당 키워드를")]
+
+        results = sess.filter_results_by_periods(results, question)
+        results = sess.verify_visible(results, 50)
 
         print("\n[검색 결과]")
         if not results:
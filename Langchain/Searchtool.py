@@ -2,23 +2,21 @@ import os
 import sys
 import json
 import re
+import time
+import bisect
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Tuple, Optional
+
+import numpy as np
 from langchain.tools import tool
 
-from parsers.Parser_txt import parse_txt
-from parsers.Parser_word import parse_word
-from parsers.Parser_pdf import parse_pdf
-from parsers.Parser_excel import parse_excel
-from parsers.Parser_csv import parse_csv
-from parsers.Parser_pptx import parse_pptx
-from parsers.Parser_hwp import parse_hwp
+from parsers.registry import LazyParserMapping
+from Langchain.metadata_filters import MetadataFilter, metadata_index_for, strip_filter_phrases
+from Langchain.metrics import cache_event, record_span
 
-PARSER_MAPPING = {
-    '.txt': parse_txt, '.md': parse_txt, '.docx': parse_word, '.pdf': parse_pdf,
-    '.xlsx': parse_excel, '.xls': parse_excel, '.csv': parse_csv,
-    '.pptx': parse_pptx, '.hwp': parse_hwp,
-}
+# 파서 모듈은 처음 사용할 때 로드됨 (parsers/registry.py 참고)
+PARSER_MAPPING = LazyParserMapping()
 
 _structured_indexer = None
 
@@ -32,6 +30,14 @@ def get_structured_indexer():
             raise ImportError("StructuredIndex를 사용할 수 없습니다. structured_indexing 모듈을 확인해주세요.")
     return _structured_indexer
 
+def canonical_base_path(base_path: str) -> str:
+    """Resolve symlinks/relative parts and trailing separators so one folder maps to one session"""
+    return str(Path(base_path).expanduser().resolve())
+
+def index_csv_path(cache_dir: Path, base_path: str) -> Path:
+    safe_path = str(Path(base_path)).replace(':', '').replace('\\', '_').replace('/', '_')
+    return cache_dir / f"structured_index_{safe_path}.csv"
+
 def _normalize_base_path(path: str) -> str:
     if not path:
         return path
@@ -233,9 +239,24 @@ def extract_meaningful_keywords(query: str) -> List[str]:
         '문서', '엑셀', '파워포인트', '텍스트', '한글', '마이크로소프트', 'excel', 'powerpoint', 'text'
     }
 
-    exclude_words = korean_stopwords | english_stopwords | time_words | extension_words
+    # 기간/크기 조건은 MetadataFilter가 처리하므로 키워드에서 제외
+    filter_words = {
+        '최근', '이번', '지난', '저번', '금주', '이달', '금월', '전월', '오늘', '어제', '그제', '그저께',
+        '이상', '이하', '초과', '미만', '이내', '부터', '까지', '보다', '넘는', '넘은',
+        'last', 'past', 'week', 'weeks', 'month', 'months', 'days', 'year', 'years', 'between',
+        'larger', 'smaller', 'bigger', 'greater', 'than', 'more', 'less', 'over', 'under', 'above', 'below',
+        'least', 'most', 'january', 'february', 'march', 'april', 'may', 'june', 'july', 'august',
+        'september', 'october', 'november', 'december'
+    }
+    filter_token = re.compile(
+        r'^\d+(?:년|월|일|주|개월|달|tb|gb|mb|kb|bytes?|테라|기가|메가|킬로|바이트)'
+        r'(?:부터|까지|이상|이하|초과|미만|이내|보다)?$'
+    )
+
+    exclude_words = korean_stopwords | english_stopwords | time_words | extension_words | filter_words
 
-    tokens = re.findall(r'[\w가-힣]+', query.lower())
+    # "지난주", "이번달"처럼 붙여 쓴 기간 표현도 MetadataFilter가 처리한 구간째 제거
+    tokens = re.findall(r'[\w가-힣]+', strip_filter_phrases(query))
 
     meaningful_keywords = []
     for token in tokens:
@@ -243,7 +264,7 @@ def extract_meaningful_keywords(query: str) -> List[str]:
            (re.match(r'^[a-zA-Z]+$', token) and len(token) >= 3) or \
            (re.match(r'^[\w가-힣]+$', token) and len(token) >= 3):
 
-            if token.isdigit():
+            if token.isdigit() or filter_token.match(token):
                 continue
 
             if token not in exclude_words:
@@ -258,10 +279,77 @@ def extract_meaningful_keywords(query: str) -> List[str]:
 
     return unique_keywords
 
-def advanced_search_pipeline(query: str, file_infos, limit: int = 200, llm_keywords: Optional[List[str]] = None):
-    """Advanced search pipeline with LLM-based keywords and AND/OR mixed logic"""
+def build_name_vocabulary(file_infos) -> List[str]:
+    """Sorted, de-duplicated lowercase tokens of all file/folder names in the index"""
+    vocab = set()
+    # 메모리 매핑 인덱스는 FileInfo를 만들지 않고 이름만 읽음
+    names = file_infos.names() if hasattr(file_infos, 'names') else (info.name for info in file_infos)
+    for name in names:
+        for token in re.findall(r'[\w가-힣]+', name.lower()):
+            for part in token.split('_'):
+                if len(part) >= 2 and not part.isdigit():
+                    vocab.add(part)
+    return sorted(vocab)
+
+def _vocab_hit(token: str, vocabulary: List[str]) -> bool:
+    """Exact or prefix match against the sorted vocabulary (bisect)"""
+    i = bisect.bisect_left(vocabulary, token)
+    return i < len(vocabulary) and vocabulary[i].startswith(token)
+
+def classify_query(query: str, vocabulary: List[str], max_keywords: int = 4) -> Dict[str, Any]:
+    """Decide whether rule-based keywords are good enough to skip the LLM
+
+    The query is treated as well-formed when it has 1..max_keywords meaningful keywords
+    and every one of them hits the index vocabulary.
+    """
+    keywords = extract_meaningful_keywords(query)
     extensions = extract_extensions_from_query(query)
     years = extract_year_filters(query)
+    misses = [k for k in keywords if not _vocab_hit(k, vocabulary)]
+
+    if not keywords and MetadataFilter.from_query(query, years):
+        route, reason = 'fast', 'date/size filters only'
+    elif not keywords:
+        route, reason = 'llm', 'no rule-based keywords'
+    elif len(keywords) > max_keywords:
+        route, reason = 'llm', f'{len(keywords)} keywords (natural-language query)'
+    elif misses:
+        route, reason = 'llm', f'not in index vocabulary: {", ".join(misses)}'
+    else:
+        route, reason = 'fast', 'all keywords hit the index vocabulary'
+
+    return {
+        'route': route,
+        'reason': reason,
+        'keywords': keywords,
+        'extensions': extensions,
+        'years': years,
+    }
+
+def _rows_by_value(file_infos, meta, flt: MetadataFilter) -> list:
+    """Infos of all rows matching flt, newest (or largest) first"""
+    rows = meta.select(flt)
+    columns = [c for c, _ in flt.criteria]
+    column = 'mtime' if 'mtime' in columns else columns[0]
+    rows = rows[np.argsort(-meta.values[column][rows], kind='stable')]
+    if hasattr(file_infos, 'rows'):
+        return file_infos.rows(rows)
+    return [file_infos[int(r)] for r in rows]
+
+def advanced_search_pipeline(query: str, file_infos, limit: int = 200, llm_keywords: Optional[List[str]] = None,
+                             match_cache: Optional[Dict[str, list]] = None,
+                             metadata_filter: Optional[MetadataFilter] = None):
+    """Advanced search pipeline with LLM-based keywords and AND/OR mixed logic
+
+    match_cache (keyword -> matched infos) lets a later pass over the same index
+    reuse the name/path matches of keywords that were already scanned.
+    Date/size phrases in the query (plus metadata_filter, e.g. structured request
+    parameters) are answered from the sorted secondary indexes of the index.
+    """
+    t0 = time.perf_counter()
+    extensions = extract_extensions_from_query(query)
+    years = extract_year_filters(query)
+    flt = MetadataFilter.from_query(query, years).extend(metadata_filter)
 
     if llm_keywords:
         meaningful_keywords = llm_keywords
@@ -269,20 +357,44 @@ def advanced_search_pipeline(query: str, file_infos, limit: int = 200, llm_keywo
         meaningful_keywords = extract_meaningful_keywords(query)
 
     expanded_keywords = expand_business_keywords(meaningful_keywords)
+    record_span("query_parse", time.perf_counter() - t0)
 
     all_results = []
+    scan_sec = filter_sec = 0.0
+    # MappedIndex(공유 스냅샷)는 매핑된 소문자 이름/경로 열을 직접 검색
+    mapped_match = getattr(file_infos, 'match', None)
 
     for keyword in expanded_keywords:
-        keyword_results = []
-        for info in file_infos:
-            if keyword.lower() in info.name.lower() or keyword.lower() in info.path.lower():
-                keyword_results.append(info)
+        kw = keyword.lower()
+        t0 = time.perf_counter()
+        cached = match_cache.get(kw) if match_cache is not None else None
+        if match_cache is not None:
+            cache_event("keyword_match", cached is not None)
+        if cached is not None:
+            keyword_results = list(cached)
+        elif mapped_match is not None:
+            keyword_results = mapped_match(kw)
+            if match_cache is not None:
+                match_cache[kw] = list(keyword_results)
+        else:
+            keyword_results = []
+            for info in file_infos:
+                if kw in info.name.lower() or kw in info.path.lower():
+                    keyword_results.append(info)
+            if match_cache is not None:
+                match_cache[kw] = list(keyword_results)
+        t1 = time.perf_counter()
 
         keyword_results = filter_by_extensions(keyword_results, extensions)
-        keyword_results = filter_by_years(keyword_results, years)
+        filter_sec += time.perf_counter() - t1
+        scan_sec += t1 - t0
 
         all_results.extend(keyword_results)
 
+    record_span("match_scan", scan_sec)
+    record_span("match_filter", filter_sec)
+    t0 = time.perf_counter()
+
     seen_paths = set()
     unique_results = []
     for info in all_results:
@@ -290,34 +402,109 @@ def advanced_search_pipeline(query: str, file_infos, limit: int = 200, llm_keywo
             seen_paths.add(info.path)
             unique_results.append(info)
 
+    if flt:
+        t1 = time.perf_counter()
+        meta = metadata_index_for(file_infos)
+        if expanded_keywords:
+            unique_results = meta.filter_infos(unique_results, flt)
+        else:
+            # 키워드 없이 기간/크기 조건만 있는 질의: 구간 슬라이스가 곧 결과
+            unique_results = filter_by_extensions(_rows_by_value(file_infos, meta, flt), extensions)
+        record_span("metadata_filter", time.perf_counter() - t1)
+        t0 += time.perf_counter() - t1
+
     parseable = [info for info in unique_results if info.is_parseable]
     others = [info for info in unique_results if not info.is_parseable]
 
     final_results = parseable + others
+    record_span("rank", time.perf_counter() - t0)
 
     search_info = {
         'results': final_results[:limit],
         'expanded_keywords': expanded_keywords,
         'extensions': extensions,
         'years': years,
+        'filters': flt.to_dict() if flt else None,
         'total_matches': len(unique_results)
     }
 
     return search_info
 
+def prefill_match_cache(file_infos, keywords: List[str], match_cache: Dict[str, list]) -> None:
+    """Match many keywords in one pass over the index (each name/path is lowercased once)"""
+    pending = list(dict.fromkeys(k.lower() for k in keywords if k.lower() not in match_cache))
+    if not pending:
+        return
+    t0 = time.perf_counter()
+    mapped_match = getattr(file_infos, 'match', None)
+    if mapped_match is not None:
+        for kw in pending:
+            match_cache[kw] = mapped_match(kw)
+    else:
+        found: Dict[str, list] = {kw: [] for kw in pending}
+        for info in file_infos:
+            name_l = info.name.lower()
+            path_l = info.path.lower()
+            for kw in pending:
+                if kw in name_l or kw in path_l:
+                    found[kw].append(info)
+        match_cache.update(found)
+    record_span("match_scan", time.perf_counter() - t0)
+
+def batch_search(queries: List[str], file_infos, limit: int = 200,
+                 keywords_per_query: Optional[List[Optional[List[str]]]] = None,
+                 match_cache: Optional[Dict[str, list]] = None,
+                 metadata_filter: Optional[MetadataFilter] = None) -> Dict[str, Any]:
+    """Run several queries against one index snapshot with a single candidate pass
+
+    Returns per-query search_info dicts (same as advanced_search_pipeline) plus the union
+    (first-seen order) and intersection of their result lists.
+    """
+    match_cache = {} if match_cache is None else match_cache
+    keywords_per_query = keywords_per_query or [None] * len(queries)
+    expanded = [expand_business_keywords(kws or extract_meaningful_keywords(q))
+                for q, kws in zip(queries, keywords_per_query)]
+    prefill_match_cache(file_infos, [k for kws in expanded for k in kws], match_cache)
+
+    per_query = [advanced_search_pipeline(q, file_infos, limit, llm_keywords=kws, match_cache=match_cache,
+                                          metadata_filter=metadata_filter)
+                 for q, kws in zip(queries, keywords_per_query)]
+
+    union: Dict[str, Any] = {}
+    for info in per_query:
+        for fi in info['results']:
+            union.setdefault(fi.path, fi)
+    common = None
+    for info in per_query:
+        paths = {fi.path for fi in info['results']}
+        common = paths if common is None else common & paths
+    common = common or set()
+
+    return {
+        'queries': per_query,
+        'union': list(union.values()),
+        'intersection': [fi for path, fi in union.items() if path in common],
+    }
+
+def merge_search_results(primary, secondary, limit: int = 200):
+    """Keep primary results first, then append unseen secondary results (parseable first)"""
+    seen = {info.path for info in primary}
+    extra = [info for info in secondary if info.path not in seen]
+    extra = [i for i in extra if i.is_parseable] + [i for i in extra if not i.is_parseable]
+    return (list(primary) + extra)[:limit]
+
 def preindex_path(base_path: str) -> Dict[str, Any]:
     """Prepare index (create or load cache)"""
     StructuredIndexClass = get_structured_indexer()
 
     try:
-        from pathlib import Path
-
+        # 서버(SessionManager, /index)와 같은 CSV/FileInfo 경로를 쓰도록 정규화
+        base_path = canonical_base_path(base_path)
         work_dir = Path(__file__).parent.parent
         cache_dir = work_dir / ".odin_index"
         cache_dir.mkdir(exist_ok=True)
 
-        safe_path = str(Path(base_path)).replace(':', '').replace('\\', '_').replace('/', '_')
-        csv_path = cache_dir / f"structured_index_{safe_path}.csv"
+        csv_path = index_csv_path(cache_dir, base_path)
 
         indexer = StructuredIndexClass(base_path)
 
@@ -327,24 +514,31 @@ def preindex_path(base_path: str) -> Dict[str, Any]:
             file_infos = indexer.build_index()
             indexer.save_to_csv(file_infos, str(csv_path))
 
-        total_count = len(file_infos)
-        parseable_count = sum(1 for info in file_infos if info.is_parseable)
-        folder_count = sum(1 for info in file_infos if info.is_directory)
-        file_count = sum(1 for info in file_infos if not info.is_directory)
-
-        return {
-            'base_path': _normalize_base_path(base_path),
-            'count': total_count,
-            'parseable_count': parseable_count,
-            'folder_count': folder_count,
-            'file_count': file_count,
-            'source': 'structured',
-            'file_infos': file_infos,
-            'indexer': indexer,
-        }
+        return summarize_index(base_path, file_infos, indexer)
     except Exception as e:
         raise Exception(f"구조화 인덱싱 실패: {e}")
 
+def summarize_index(base_path: str, file_infos: List[Any], indexer: Any = None) -> Dict[str, Any]:
+    """Build the preindex_path() result dict from already loaded file infos"""
+    if indexer is None:
+        indexer = get_structured_indexer()(base_path)
+    if hasattr(file_infos, 'summary'):
+        counts = file_infos.summary()
+    else:
+        counts = {
+            'count': len(file_infos),
+            'parseable_count': sum(1 for info in file_infos if info.is_parseable),
+            'folder_count': sum(1 for info in file_infos if info.is_directory),
+            'file_count': sum(1 for info in file_infos if not info.is_directory),
+        }
+    return {
+        'base_path': _normalize_base_path(base_path),
+        **counts,
+        'source': 'structured',
+        'file_infos': file_infos,
+        'indexer': indexer,
+    }
+
 @tool
 def file_system_search(input_data: str) -> list[str]:
     """
@@ -369,14 +563,12 @@ def file_system_search(input_data: str) -> list[str]:
 
     StructuredIndexClass = get_structured_indexer()
 
+    base_path = canonical_base_path(base_path)
     try:
-        from pathlib import Path
-
         work_dir = Path(__file__).parent.parent
         cache_dir = work_dir / ".odin_index"
 
-        safe_path = str(Path(base_path)).replace(':', '').replace('\\', '_').replace('/', '_')
-        csv_path = cache_dir / f"structured_index_{safe_path}.csv"
+        csv_path = index_csv_path(cache_dir, base_path)
 
         if csv_path.exists() and not reindex:
             indexer = StructuredIndexClass(base_path)
@@ -405,4 +597,20 @@ def file_system_search(input_data: str) -> list[str]:
                 return ["해당 키워드를 포함하는 파일/폴더를 찾지 못했습니다."]
 
     except Exception as e:
-        return [f"검색 실패: {e}"]
\ No newline at end of file
+        return [f"검색 실패: {e}"]
+
+# 테스트 함수
+def test_filter_only_queries():
+    """기간/크기 표현만 있는 질의는 키워드 없이 필터 전용(빠른 경로)으로 처리되는지 확인"""
+    for query in ["지난주 파일", "지난 주 파일", "이번주 파일", "이번달 보고서", "지난달 50MB 이상",
+                  "저번달 파일", "최근 3개월 파일", "2024년 3월부터 5월까지"]:
+        keywords = extract_meaningful_keywords(query)
+        route = classify_query(query, [])
+        print(f"{query}: keywords={keywords}, route={route['route']} ({route['reason']})")
+        assert MetadataFilter.from_query(query, extract_year_filters(query)), query
+        if query != "이번달 보고서":
+            assert keywords == [] and route['route'] == 'fast', query
+    assert extract_meaningful_keywords("이번달 보고서") == ["보고서"]
+
+if __name__ == "__main__":
+    test_filter_only_queries()
@@ -0,0 +1,106 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from Langchain.retrieval import BM25Index, format_chunks, select_chunks
+
+QA_INSTRUCTIONS = (
+    "다음은 사용자가 선택하여 제공한 문서들입니다. 문서 내용만 근거로 삼아 한국어로만 답변하세요.\n"
+    "- 반드시 한국어(한글)로만 출력하세요. 영어 문장/단어를 불필요하게 포함하지 마세요.\n"
+    "- 답변은 간결하고 정확하게 서술하세요.\n"
+    "- 필요하면 관련 파일명을 함께 언급하세요.\n"
+)
+
+
+class GenerationInfoCapture(BaseCallbackHandler):
+    """Capture Ollama's final response fields (context, prompt_eval_count, ...) from on_llm_end"""
+
+    def __init__(self) -> None:
+        self.info: Dict[str, Any] = {}
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        try:
+            self.info = dict(response.generations[0][0].generation_info or {})
+        except (IndexError, AttributeError, TypeError):
+            self.info = {}
+
+
+class QAConversation:
+    """
+    Follow-up Q&A over a fixed set of loaded documents.
+
+    The first turn sends the instructions and retrieved chunks as a prefix; later turns only
+    append newly retrieved chunks and the question. When Ollama returns its `context` token
+    state, it is passed back so each follow-up only evaluates the new tokens; otherwise the
+    whole transcript is re-sent with an unchanged prefix so Ollama's prompt cache can reuse it.
+
+    A turn (prepare -> generate -> commit) must run between begin() and end(); only one turn
+    can be in progress at a time.
+    """
+
+    def __init__(self, retriever: BM25Index, token_budget: int = 3000,
+                 followup_budget: Optional[int] = None, max_context_tokens: int = 8000) -> None:
+        self.retriever = retriever
+        self.token_budget = token_budget
+        self.followup_budget = followup_budget if followup_budget is not None else token_budget // 3
+        self.max_context_tokens = max_context_tokens
+        self.turn_metrics: List[Dict[str, Any]] = []
+        self._turn_lock = threading.Lock()
+        self.reset()
+
+    def begin(self) -> bool:
+        """Claim the conversation for one turn; False if another turn is still in progress"""
+        return self._turn_lock.acquire(blocking=False)
+
+    def end(self) -> None:
+        self._turn_lock.release()
+
+    def reset(self) -> None:
+        self._context_tokens: Optional[List[int]] = None
+        self._transcript: List[str] = []
+        self._sent: set = set()
+        self._pending: set = set()
+        self._pending_turn = ""
+
+    def prepare(self, question: str) -> Tuple[str, Dict[str, Any]]:
+        """Return (prompt, extra generate kwargs) for the next turn"""
+        if self._context_tokens is not None and len(self._context_tokens) > self.max_context_tokens:
+            # 컨텍스트 창을 넘기기 전에 새 대화로 시작
+            self.reset()
+
+        first = not self._transcript
+        budget = self.token_budget if first else self.followup_budget
+        chunks = select_chunks(self.retriever, question, budget, exclude=self._sent, fallback=first)
+        self._pending = {(c.path, c.index) for c in chunks}
+        new_context = format_chunks(self.retriever, chunks)
+
+        if first:
+            turn = f"{QA_INSTRUCTIONS}문서들:\n{new_context}\n\n질문: {question}\n\n한국어 답변:"
+        elif new_context:
+            turn = f"\n\n[추가 문서]\n{new_context}\n\n질문: {question}\n\n한국어 답변:"
+        else:
+            turn = f"\n\n질문: {question}\n\n한국어 답변:"
+        self._pending_turn = turn
+
+        if self._context_tokens:
+            return turn, {"context": self._context_tokens}
+        return "".join(self._transcript) + turn, {}
+
+    def commit(self, answer: str, generation_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Record a finished turn; returns the per-turn prompt-eval metrics"""
+        info = generation_info or {}
+        self._transcript.append(self._pending_turn + (answer or ""))
+        self._sent |= self._pending
+        context = info.get("context")
+        self._context_tokens = list(context) if context else None
+
+        metrics = {
+            "turn": len(self._transcript),
+            "prompt_eval_count": info.get("prompt_eval_count"),
+            "prompt_eval_ms": round(info["prompt_eval_duration"] / 1e6, 1) if info.get("prompt_eval_duration") else None,
+            "eval_count": info.get("eval_count"),
+            "used_context_state": bool(context),
+        }
+        self.turn_metrics.append(metrics)
+        return metrics
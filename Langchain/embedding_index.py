@@ -0,0 +1,267 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Langchain.retrieval import chunk_text
+
+
+class HashingEmbedder:
+    """Deterministic embedder (hashed character n-grams) for tests and offline use"""
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> List[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        t = f" {text.lower()} "
+        for n in (2, 3):
+            for i in range(len(t) - n + 1):
+                h = int.from_bytes(hashlib.blake2b(t[i:i + n].encode("utf-8"), digest_size=4).digest(), "little")
+                vec[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class OllamaEmbedder:
+    """Ollama 임베딩 엔드포인트(/api/embed) 래퍼"""
+
+    def __init__(self, model_name: str = "nomic-embed-text") -> None:
+        from langchain_ollama import OllamaEmbeddings
+        self.name = model_name
+        self._client = OllamaEmbeddings(model=model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._client.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._client.embed_query(text)
+
+
+def get_embedder(model_name: Optional[str] = None):
+    """ODIN_EMBED_MODEL 환경변수(기본 nomic-embed-text)에 따라 임베더 생성. 'hashing'은 오프라인 스텁"""
+    model_name = model_name or os.environ.get("ODIN_EMBED_MODEL", "nomic-embed-text")
+    if model_name == "hashing":
+        return HashingEmbedder()
+    return OllamaEmbedder(model_name)
+
+
+def _entry_text(path: str, base_path: str) -> str:
+    """파일명(확장자 제외)과 상위 폴더명으로 임베딩 대상 문자열 구성"""
+    p = Path(path)
+    try:
+        rel_parts = p.relative_to(base_path).parts[:-1]
+    except ValueError:
+        rel_parts = p.parent.parts[-3:]
+    stem = re.sub(r"[_\-.]+", " ", p.stem)
+    folders = " / ".join(rel_parts[-3:])
+    return f"{stem} ({folders})" if folders else stem
+
+
+class EmbeddingIndex:
+    """파일명/폴더명(선택적으로 문서 조각) 임베딩 인덱스 (float16 행렬)"""
+
+    # 이 행 수를 넘으면 IVF(거친 클러스터) 검색 사용
+    IVF_THRESHOLD = 50000
+
+    def __init__(self, base_path: str, embedder) -> None:
+        self.base_path = str(Path(base_path).resolve())
+        self.embedder = embedder
+        self.keys: List[str] = []          # 행 키: 경로 또는 "경로#조각번호"
+        self.paths: List[str] = []         # 행이 가리키는 파일 경로
+        self.stamps: Dict[str, str] = {}   # 경로 -> 수정시각/크기 스탬프
+        self.matrix = np.zeros((0, 0), dtype=np.float16)
+        self._ivf: Optional[Tuple[np.ndarray, List[np.ndarray]]] = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _embed(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        rows: List[List[float]] = []
+        for i in range(0, len(texts), batch_size):
+            rows.extend(self.embedder.embed_documents(texts[i:i + batch_size]))
+        arr = np.asarray(rows, dtype=np.float32)
+        norms = np.linalg.norm(arr, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (arr / norms).astype(np.float16)
+
+    def _append(self, keys: List[str], paths: List[str], texts: List[str]) -> None:
+        if not keys:
+            return
+        vecs = self._embed(texts)
+        if self.matrix.size == 0:
+            self.matrix = vecs
+        else:
+            self.matrix = np.vstack([self.matrix, vecs])
+        self.keys.extend(keys)
+        self.paths.extend(paths)
+        self._ivf = None
+
+    def _drop_paths(self, drop: set) -> None:
+        if not drop:
+            return
+        keep = [i for i, p in enumerate(self.paths) if p not in drop]
+        self.matrix = self.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float16)
+        self.keys = [self.keys[i] for i in keep]
+        self.paths = [self.paths[i] for i in keep]
+        for p in drop:
+            self.stamps.pop(p, None)
+        self._ivf = None
+
+    def update(self, file_infos: Iterable) -> Dict[str, int]:
+        """구조화 인덱스 결과와 비교하여 추가/변경/삭제된 항목만 다시 임베딩"""
+        current: Dict[str, str] = {}
+        for info in file_infos:
+            current[info.path] = f"{info.modified_time}|{info.size_bytes}"
+
+        removed = {p for p in self.stamps if p not in current}
+        changed = {p for p, s in current.items() if p in self.stamps and self.stamps[p] != s}
+        added = [p for p in current if p not in self.stamps]
+        self._drop_paths(removed | changed)
+
+        todo = added + sorted(changed)
+        self._append(todo, todo, [_entry_text(p, self.base_path) for p in todo])
+        for p in todo:
+            self.stamps[p] = current[p]
+        return {"added": len(added), "changed": len(changed), "removed": len(removed)}
+
+    def add_documents(self, docs: Dict[str, str], chunk_size: int = 800, overlap: int = 100) -> int:
+        """문서 내용 조각도 인덱싱 (같은 경로의 기존 조각은 교체)"""
+        chunk_keys = {k for k in self.keys if "#" in k}
+        stale = {k.split("#", 1)[0] for k in chunk_keys} & set(docs)
+        if stale:
+            keep = [i for i, k in enumerate(self.keys) if not ("#" in k and k.split("#", 1)[0] in stale)]
+            self.matrix = self.matrix[keep] if keep else np.zeros((0, 0), dtype=np.float16)
+            self.keys = [self.keys[i] for i in keep]
+            self.paths = [self.paths[i] for i in keep]
+            self._ivf = None
+        keys: List[str] = []
+        paths: List[str] = []
+        texts: List[str] = []
+        for path, text in docs.items():
+            for i, (_, piece) in enumerate(chunk_text(text, chunk_size, overlap)):
+                keys.append(f"{path}#{i}")
+                paths.append(path)
+                texts.append(piece)
+        self._append(keys, paths, texts)
+        return len(keys)
+
+    def _build_ivf(self, n_iter: int = 8, seed: int = 0) -> None:
+        """Coarse k-means quantizer over the rows (nlist ~ sqrt(n))"""
+        data = self.matrix.astype(np.float32)
+        n = data.shape[0]
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        sample = data[rng.choice(n, size=min(n, nlist * 40), replace=False)]
+        centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)]
+        for _ in range(n_iter):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    v = members.mean(axis=0)
+                    centroids[c] = v / (np.linalg.norm(v) or 1.0)
+        assign = np.empty(n, dtype=np.int32)
+        for start in range(0, n, 65536):
+            assign[start:start + 65536] = np.argmax(data[start:start + 65536] @ centroids.T, axis=1)
+        lists = [np.nonzero(assign == c)[0] for c in range(nlist)]
+        self._ivf = (centroids, lists)
+
+    def search(self, query: str, top_k: int = 50, nprobe: int = 8,
+               path_filter: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """쿼리와 코사인 유사도가 높은 경로를 (경로, 점수) 목록으로 반환
+
+        ``path_filter``가 있으면 통과한 경로만으로 top_k를 채움 (후보가 모자라면 후보 수를 늘려 다시 탐색)
+        """
+        if not self.keys:
+            return []
+        q = np.asarray(self.embedder.embed_query(query), dtype=np.float32)
+        q /= (np.linalg.norm(q) or 1.0)
+
+        if len(self.keys) > self.IVF_THRESHOLD:
+            if self._ivf is None:
+                self._build_ivf()
+            centroids, lists = self._ivf
+            probe = np.argsort(-(centroids @ q))[:nprobe]
+            rows = np.concatenate([lists[c] for c in probe]) if len(probe) else np.array([], dtype=np.int64)
+        else:
+            rows = np.arange(len(self.keys))
+        if rows.size == 0:
+            return []
+
+        scores = self.matrix[rows].astype(np.float32) @ q
+        k = min(len(scores), top_k * 4)
+        results: List[Tuple[str, float]] = []
+        seen = set()
+        while True:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            for i in top:
+                path = self.paths[rows[i]]
+                if path in seen:
+                    continue
+                seen.add(path)
+                if path_filter is not None and not path_filter(path):
+                    continue
+                results.append((path, float(scores[i])))
+                if len(results) >= top_k:
+                    return results
+            if path_filter is None or k >= len(scores):
+                return results
+            k = min(len(scores), k * 4)
+
+    def save(self, npz_path: str) -> None:
+        np.savez(
+            npz_path,
+            matrix=self.matrix,
+            keys=np.asarray(self.keys, dtype=object),
+            paths=np.asarray(self.paths, dtype=object),
+            stamp_paths=np.asarray(list(self.stamps.keys()), dtype=object),
+            stamp_values=np.asarray(list(self.stamps.values()), dtype=object),
+            model=np.asarray(getattr(self.embedder, "name", "")),
+        )
+
+    def load(self, npz_path: str) -> bool:
+        """저장된 인덱스 로드. 모델이 다르거나 파일이 손상되었으면 False"""
+        if not os.path.exists(npz_path):
+            return False
+        try:
+            with np.load(npz_path, allow_pickle=True) as data:
+                if str(data["model"]) != getattr(self.embedder, "name", ""):
+                    return False
+                self.matrix = data["matrix"]
+                self.keys = list(data["keys"])
+                self.paths = list(data["paths"])
+                self.stamps = dict(zip(data["stamp_paths"], data["stamp_values"]))
+        except (OSError, ValueError, KeyError):
+            return False
+        self._ivf = None
+        return True
+
+
+def embedding_index_path(cache_dir: Path, safe_path: str, model_name: str) -> Path:
+    safe_model = re.sub(r"[^0-9A-Za-z_.-]+", "_", model_name)
+    return cache_dir / f"embeddings_{safe_path}_{safe_model}.npz"
+
+
+def update_embedding_index(base_path: str, file_infos: Sequence, cache_dir: Path, safe_path: str,
+                           embedder=None) -> EmbeddingIndex:
+    """저장된 임베딩 인덱스를 불러와 증분 갱신 후 저장"""
+    embedder = embedder or get_embedder()
+    index = EmbeddingIndex(base_path, embedder)
+    npz_path = embedding_index_path(cache_dir, safe_path, getattr(embedder, "name", "model"))
+    index.load(str(npz_path))
+    stats = index.update(file_infos)
+    if any(stats.values()):
+        index.save(str(npz_path))
+        print(f"임베딩 인덱스 갱신: 추가 {stats['added']}, 변경 {stats['changed']}, 삭제 {stats['removed']} (총 {len(index)}행)")
+    return index
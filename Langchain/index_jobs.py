@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Langchain.session_manager import canonical_base_path
+from Langchain.structured_indexing import IndexCancelled
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+_FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+def device_id(path: str) -> str:
+    """Identify the storage device holding path (st_dev; drive letter as fallback)"""
+    try:
+        return f"dev:{os.stat(path).st_dev}"
+    except OSError:
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        return f"drive:{drive.lower() or '/'}"
+
+
+def _follow(source: Future, target: Future) -> None:
+    """Complete target with source's outcome once source finishes"""
+    def copy(done: Future) -> None:
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+    source.add_done_callback(copy)
+
+
+class IndexJob:
+    """백그라운드 인덱싱 작업 하나의 상태"""
+
+    def __init__(self, kind: str, base_path: str, params: Dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.base_path = base_path
+        self.params = params
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.phase = "queued"
+        self.scanned = 0
+        self.total_estimate: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.future: Future = Future()
+        self.superseded_by: Optional["IndexJob"] = None
+        self._device_slot: Optional[threading.BoundedSemaphore] = None
+
+    def end_scan(self) -> None:
+        """Give the storage device back to other queued scans (later phases don't read the disk)"""
+        slot, self._device_slot = self._device_slot, None
+        if slot is not None:
+            slot.release()
+
+    def report(self, scanned: int, phase: Optional[str] = None, total_estimate: Optional[int] = None) -> None:
+        self.scanned = scanned
+        if phase:
+            self.phase = phase
+        if total_estimate is not None:
+            self.total_estimate = total_estimate
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = (end - self.started_at) if self.started_at else 0.0
+        progress = None
+        if self.status == COMPLETED:
+            progress = 1.0
+        elif self.total_estimate:
+            progress = round(min(0.99, self.scanned / self.total_estimate), 3)
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "base_path": self.base_path,
+            "params": self.params,
+            "status": self.status,
+            "phase": self.phase,
+            "scanned": self.scanned,
+            "total_estimate": self.total_estimate,
+            "progress": progress,
+            "items_per_sec": round(self.scanned / elapsed, 1) if elapsed > 0 else None,
+            "elapsed_sec": round(elapsed, 2),
+            "queued_sec": round((self.started_at or end) - self.created_at, 2),
+            "created_at": self.created_at,
+            "error": self.error,
+            "result": self.result,
+            "superseded_by": self.superseded_by.id if self.superseded_by is not None else None,
+        }
+
+
+class JobManager:
+    """
+    Queue of index build/refresh jobs.
+
+    Identical in-flight jobs (same kind, canonical base path and params) are merged into one.
+    A job kind listed in `supersedes` (by default "rebuild" over "index") cancels an in-flight
+    narrower job for the same folder, whose waiters then get the wider job's result; a narrower
+    job submitted while the wider one is in flight just joins it.
+
+    Jobs for the same folder run one at a time, and at most `scans_per_device` scans run
+    concurrently on each storage device. Device slots are taken in arrival order, so a long scan
+    delays queued scans of other folders on the same device; a job hands its slot back with
+    IndexJob.end_scan() as soon as it stops reading the disk (e.g. before embedding).
+    """
+
+    def __init__(self, max_workers: int = 4, scans_per_device: int = 1, keep_finished: int = 100,
+                 supersedes: Optional[Dict[str, Tuple[str, ...]]] = None) -> None:
+        self.scans_per_device = max(1, scans_per_device)
+        self.supersedes = supersedes if supersedes is not None else {"rebuild": ("index",)}
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="odin-job")
+        self._jobs: "OrderedDict[str, IndexJob]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str, str], IndexJob] = {}
+        self._device_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._base_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "JobManager":
+        return cls(
+            max_workers=int(os.environ.get("ODIN_JOB_WORKERS", "4")),
+            scans_per_device=int(os.environ.get("ODIN_SCANS_PER_DEVICE", "1")),
+        )
+
+    def submit(self, kind: str, base_path: str, params: Dict[str, Any],
+               work: Callable[[IndexJob], Any]) -> Tuple[IndexJob, bool]:
+        """Queue work(job); returns (job, deduplicated) where deduplicated means an in-flight job was reused"""
+        base = canonical_base_path(base_path)
+        norm, params_key = os.path.normcase(base), json.dumps(params, sort_keys=True)
+        key = (kind, norm, params_key)
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None and existing.status not in _FINISHED:
+                return existing.superseded_by or existing, True
+            # 같은 폴더의 더 넓은 작업(rebuild)이 진행 중이면 그 결과를 함께 기다림
+            for wider, narrower in self.supersedes.items():
+                covering = self._inflight.get((wider, norm, params_key)) if kind in narrower else None
+                if covering is not None and covering.status not in _FINISHED:
+                    return covering, True
+            job = IndexJob(kind, base, params)
+            # 이 작업이 대신하는 좁은 작업(index)은 취소하고, 그 작업을 기다리던 요청은 이 작업의 결과를 받음
+            for narrower in self.supersedes.get(kind, ()):
+                old = self._inflight.get((narrower, norm, params_key))
+                if old is not None and old.status not in _FINISHED:
+                    old.superseded_by = job
+                    old.cancel_event.set()
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._trim()
+        self._executor.submit(self._run, job, key, work)
+        return job, False
+
+    def _slot(self, base: str) -> Tuple[threading.BoundedSemaphore, threading.Lock]:
+        dev = device_id(base)
+        with self._lock:
+            slot = self._device_slots.setdefault(dev, threading.BoundedSemaphore(self.scans_per_device))
+            base_lock = self._base_locks.setdefault(os.path.normcase(base), threading.Lock())
+        return slot, base_lock
+
+    def _run(self, job: IndexJob, key: Tuple[str, str, str], work: Callable[[IndexJob], Any]) -> None:
+        slot, base_lock = self._slot(job.base_path)
+        try:
+            if job.cancel_event.is_set():
+                raise IndexCancelled(job.base_path)
+            # 같은 폴더는 순서대로, 같은 장치는 scans_per_device개까지만 동시에 스캔
+            with base_lock:
+                slot.acquire()
+                job._device_slot = slot
+                try:
+                    if job.cancel_event.is_set():
+                        raise IndexCancelled(job.base_path)
+                    job.status = RUNNING
+                    job.phase = "scanning"
+                    job.started_at = time.time()
+                    job.result = work(job)
+                finally:
+                    job.end_scan()
+            job.status = COMPLETED
+            job.phase = "done"
+        except IndexCancelled:
+            job.status = CANCELLED
+            job.phase = "superseded" if job.superseded_by is not None else "cancelled"
+        except Exception as e:
+            job.status = FAILED
+            job.phase = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._inflight.get(key) is job:
+                    del self._inflight[key]
+            if job.status == COMPLETED:
+                job.future.set_result(job.result)
+            elif job.superseded_by is not None:
+                _follow(job.superseded_by.future, job.future)
+            else:
+                job.future.set_exception(IndexCancelled(job.base_path) if job.status == CANCELLED
+                                         else RuntimeError(job.error))
+            print(f"[작업] {job.kind} {job.status}: {job.base_path} ({job.scanned}개 항목, {job.to_dict()['elapsed_sec']}s)")
+
+    def cancel(self, job_id: str) -> Optional[IndexJob]:
+        job = self.get(job_id)
+        if job is not None and job.status not in _FINISHED:
+            job.cancel_event.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IndexJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _trim(self) -> None:
+        finished = [j for j in self._jobs.values() if j.status in _FINISHED]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job.id]
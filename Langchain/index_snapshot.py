@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# 여러 워커 프로세스가 읽기 전용으로 공유하는 메모리 매핑 파일 인덱스 스냅샷
+
+import json
+import math
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Langchain.metadata_filters import COLUMNS, MetadataIndex, iso_to_epoch
+from Langchain.structured_indexing import FileInfo
+
+_MAGIC = b"ODINIDX1"
+_STR_FIELDS = ("path", "name", "parent_path", "extension", "created_time", "modified_time")
+_FLAG_DIR = 1
+_FLAG_PARSEABLE = 2
+
+
+def _enc(text: str) -> bytes:
+    return text.encode("utf-8", "surrogateescape")
+
+
+def _dec(data: bytes) -> str:
+    return data.decode("utf-8", "surrogateescape")
+
+
+def _offsets(parts: List[bytes]) -> np.ndarray:
+    out = np.zeros(len(parts) + 1, dtype=np.int64)
+    if parts:
+        np.cumsum([len(p) for p in parts], out=out[1:])
+    return out
+
+
+def write_snapshot(path: Path, infos: Sequence[FileInfo], base_path: str = "") -> None:
+    """Write infos as a column-oriented snapshot file (atomic replace)"""
+    arrays: List[Tuple[str, np.ndarray]] = []
+    encoded: Dict[str, List[bytes]] = {}
+    for field in _STR_FIELDS:
+        parts = [_enc(getattr(fi, field) or "") for fi in infos]
+        encoded[field] = parts
+        arrays.append((f"{field}.off", _offsets(parts)))
+        arrays.append((f"{field}.blob", np.frombuffer(b"".join(parts), dtype=np.uint8)))
+
+    # 키워드 매칭용: 행마다 "이름\n경로\n" (소문자). 파일 전체에서 bytes.find로 한 번에 검색
+    lower = [_enc(fi.name.lower()) + b"\n" + _enc(fi.path.lower()) + b"\n" for fi in infos]
+    arrays.append(("lower.off", _offsets(lower)))
+    arrays.append(("lower.blob", np.frombuffer(b"".join(lower), dtype=np.uint8)))
+
+    paths = encoded["path"]
+    arrays.append(("path.order", np.array(sorted(range(len(paths)), key=paths.__getitem__), dtype=np.int64)))
+    arrays.append(("size", np.array([int(fi.size_bytes or 0) for fi in infos], dtype=np.int64)))
+    # 기간/크기 필터용 숫자 열 (로컬 epoch 초, 해석 불가 시 NaN)과 값 순으로 정렬된 보조 인덱스
+    meta = MetadataIndex.from_infos(infos)
+    arrays.append(("mtime", meta.values["mtime"]))
+    arrays.append(("ctime", meta.values["ctime"]))
+    for column in COLUMNS:
+        arrays.append((f"{column}.order", meta.orders[column].astype(np.int64)))
+        arrays.append((f"{column}.sorted", meta.sorted[column]))
+    arrays.append(("depth", np.array([int(fi.depth_level or 0) for fi in infos], dtype=np.int32)))
+    arrays.append(("flags", np.array(
+        [(_FLAG_DIR if fi.is_directory else 0) | (_FLAG_PARSEABLE if fi.is_parseable else 0) for fi in infos],
+        dtype=np.uint8)))
+
+    layout: Dict[str, List[Any]] = {}
+    pos = 0
+    for name, arr in arrays:
+        pos = (pos + 7) & ~7
+        layout[name] = [pos, arr.dtype.str, int(arr.size)]
+        pos += arr.nbytes
+    header = json.dumps({"count": len(infos), "base_path": base_path, "arrays": layout}).encode("utf-8")
+    data_start = (len(_MAGIC) + 8 + len(header) + 7) & ~7
+
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, arr in arrays:
+            f.write(b"\0" * (data_start + layout[name][0] - f.tell()))
+            f.write(arr.tobytes())
+    os.replace(tmp, path)
+
+
+class MappedIndex(Sequence[FileInfo]):
+    """
+    Read-only FileInfo sequence backed by a memory-mapped snapshot.
+
+    All worker processes map the same file, so the index is held once in the OS page cache.
+    FileInfo objects are built only for rows that are accessed; match() scans the mapped
+    lowercase name/path column without materializing anything.
+    """
+
+    def __init__(self, path: Path, version: int = 0) -> None:
+        self.path = Path(path)
+        self.version = version
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"not an index snapshot: {self.path}")
+        header_len = int.from_bytes(self._mm[len(_MAGIC):len(_MAGIC) + 8], "little")
+        start = len(_MAGIC) + 8
+        header = json.loads(self._mm[start:start + header_len])
+        data_start = (start + header_len + 7) & ~7
+        self.count: int = header["count"]
+        self.base_path: str = header.get("base_path", "")
+        self._a: Dict[str, np.ndarray] = {}
+        self._blob_start: Dict[str, int] = {}
+        for name, (offset, dtype, size) in header["arrays"].items():
+            if name.endswith(".blob"):
+                self._blob_start[name[:-5]] = data_start + offset
+            else:
+                self._a[name] = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=size, offset=data_start + offset)
+        self.nbytes = len(self._mm)
+        self._meta: Optional[MetadataIndex] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _bytes(self, field: str, row: int) -> bytes:
+        off = self._a[f"{field}.off"]
+        start = self._blob_start[field]
+        return self._mm[start + int(off[row]):start + int(off[row + 1])]
+
+    def _str(self, field: str, row: int) -> str:
+        return _dec(self._bytes(field, row))
+
+    def _row(self, row: int) -> FileInfo:
+        flags = int(self._a["flags"][row])
+        return FileInfo(
+            path=self._str("path", row),
+            name=self._str("name", row),
+            parent_path=self._str("parent_path", row),
+            is_directory=bool(flags & _FLAG_DIR),
+            extension=self._str("extension", row),
+            size_bytes=int(self._a["size"][row]),
+            created_time=self._str("created_time", row),
+            modified_time=self._str("modified_time", row),
+            is_parseable=bool(flags & _FLAG_PARSEABLE),
+            depth_level=int(self._a["depth"][row]),
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[FileInfo]:
+        for i in range(self.count):
+            yield self._row(i)
+
+    def rows(self, rows: Iterable[int]) -> List[FileInfo]:
+        return [self._row(int(r)) for r in rows]
+
+    def match_rows(self, keyword: str) -> List[int]:
+        """Rows whose lowercase name or path contains keyword (already lowercase)"""
+        needle = _enc(keyword)
+        if not needle:
+            return list(range(self.count))
+        off = self._a["lower.off"]
+        lo = self._blob_start["lower"]
+        hi = lo + int(off[-1])
+        rows: List[int] = []
+        pos = self._mm.find(needle, lo, hi)
+        while pos != -1:
+            row = int(np.searchsorted(off, pos - lo, side="right")) - 1
+            row_end = lo + int(off[row + 1])
+            if pos + len(needle) < row_end:
+                rows.append(row)
+                pos = self._mm.find(needle, row_end, hi)
+            else:
+                pos = self._mm.find(needle, pos + 1, hi)
+        return rows
+
+    def match(self, keyword: str) -> List[FileInfo]:
+        return self.rows(self.match_rows(keyword))
+
+    def names(self) -> Iterator[str]:
+        for i in range(self.count):
+            yield self._str("name", i)
+
+    def summary(self) -> Dict[str, int]:
+        flags = self._a["flags"]
+        folders = int(np.count_nonzero(flags & _FLAG_DIR))
+        return {
+            "count": self.count,
+            "parseable_count": int(np.count_nonzero(flags & _FLAG_PARSEABLE)),
+            "folder_count": folders,
+            "file_count": self.count - folders,
+        }
+
+    def find_row(self, path: str) -> Optional[int]:
+        """Binary search over the path-sorted row order"""
+        target = _enc(path)
+        order = self._a["path.order"]
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._bytes("path", int(order[mid])) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._bytes("path", int(order[lo])) == target:
+            return int(order[lo])
+        return None
+
+    def find_path(self, path: str) -> Optional[FileInfo]:
+        row = self.find_row(path)
+        return self._row(row) if row is not None else None
+
+    def metadata_index(self) -> MetadataIndex:
+        """Sorted mtime/ctime/size indexes stored in the snapshot (built from rows for older snapshots)"""
+        if self._meta is None:
+            if "size.sorted" in self._a:
+                values = {"mtime": self._a["mtime"], "ctime": self._a["ctime"], "size": self._a["size"]}
+                self._meta = MetadataIndex(values, {c: self._a[f"{c}.order"] for c in COLUMNS},
+                                           {c: self._a[f"{c}.sorted"] for c in COLUMNS}, source=self)
+            else:
+                self._meta = MetadataIndex.from_infos(self)
+        return self._meta
+
+    def modified_epochs(self, paths: Iterable[str]) -> List[float]:
+        """Modification times (epoch seconds) for paths; NaN for unknown paths"""
+        mtime = self._a.get("mtime")
+        out: List[float] = []
+        for p in paths:
+            row = self.find_row(p)
+            if row is None:
+                out.append(math.nan)
+            elif mtime is not None:
+                out.append(float(mtime[row]))
+            else:  # mtime 열이 없는 이전 스냅샷
+                out.append(iso_to_epoch(self._str("modified_time", row)))
+        return out
+
+
+def path_lookup(infos: Sequence[FileInfo]) -> Callable[[str], Optional[FileInfo]]:
+    """path -> FileInfo (or None) for a list or a mapped snapshot"""
+    if isinstance(infos, MappedIndex):
+        return infos.find_path
+    return {fi.path: fi for fi in infos}.get
+
+
+def select_by_paths(infos: Sequence[FileInfo], paths: Iterable[str]) -> List[FileInfo]:
+    """FileInfos for the given paths in that order (unknown paths are skipped)"""
+    lookup = path_lookup(infos)
+    found = (lookup(p) for p in paths)
+    return [fi for fi in found if fi is not None]
+
+
+# ----- 버전 관리 (매니페스트 + 버전별 스냅샷 파일) -----
+def read_manifest(manifest_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def publish_snapshot(snapshot_dir: Path, name: str, infos: Sequence[FileInfo], base_path: str = "") -> Dict[str, Any]:
+    """Write a new snapshot version and bump the manifest; call only while holding the owner lock"""
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = snapshot_dir / f"{name}.json"
+    previous = read_manifest(manifest_path) or {}
+    version = int(previous.get("version", 0)) + 1
+    file_name = f"{name}.v{version}.idx"
+    write_snapshot(snapshot_dir / file_name, infos, base_path)
+    manifest = {"version": version, "file": file_name, "count": len(infos), "base_path": base_path}
+    tmp = manifest_path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, manifest_path)
+    _remove_old_versions(snapshot_dir, name, keep=(version, version - 1))
+    return manifest
+
+
+def _remove_old_versions(snapshot_dir: Path, name: str, keep: Tuple[int, ...]) -> None:
+    # 직전 버전은 아직 읽는 워커가 있을 수 있으므로 남겨 둠 (Windows에서는 매핑 중인 파일 삭제가 실패함)
+    pattern = re.compile(re.escape(name) + r"\.v(\d+)\.idx$")
+    for p in snapshot_dir.glob(f"{name}.v*.idx"):
+        m = pattern.match(p.name)
+        if m and int(m.group(1)) not in keep:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+def open_snapshot(snapshot_dir: Path, manifest: Dict[str, Any]) -> MappedIndex:
+    return MappedIndex(snapshot_dir / manifest["file"], version=int(manifest["version"]))
+
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """Exclusive cross-process lock (blocks until acquired)"""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue  # LK_LOCK은 약 10초 후 포기하므로 다시 시도
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,174 @@
+import atexit
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from Langchain.index_snapshot import file_lock
+from Langchain.metrics import cache_event
+
+# 문장 끝 조사/어미 (긴 것부터 검사)
+_PARTICLES = sorted([
+    '에서는', '으로는', '에서', '으로', '에게', '까지', '부터', '처럼', '하고',
+    '은', '는', '이', '가', '을', '를', '의', '에', '로', '와', '과', '도', '만',
+], key=len, reverse=True)
+_PUNCT_RE = re.compile(r"[^\w가-힣]+")
+
+
+def normalize_question(text: str) -> str:
+    """공백/구두점/대소문자와 토큰 끝 조사 차이를 흡수한 캐시 키용 정규화"""
+    tokens = []
+    for tok in _PUNCT_RE.split((text or '').lower()):
+        if not tok:
+            continue
+        if re.search(r"[가-힣]$", tok):
+            for p in _PARTICLES:
+                if tok.endswith(p) and len(tok) - len(p) >= 2:
+                    tok = tok[:-len(p)]
+                    break
+        tokens.append(tok)
+    return " ".join(tokens)
+
+
+def default_cache_path() -> Path:
+    if getattr(sys, 'frozen', False):
+        app_path = Path(sys.executable).parent
+    else:
+        app_path = Path(__file__).parent.parent
+    cache_dir = app_path / ".odin_index"
+    cache_dir.mkdir(exist_ok=True)
+    return cache_dir / "llm_prompt_cache.json"
+
+
+class PromptCache:
+    """LLM 프롬프트 결과의 영구 캐시 (TTL + LRU, JSON 파일 저장)
+
+    set() only marks the cache dirty; the file is rewritten at most once per ``save_delay_sec``
+    (and at exit), outside the lock that guards lookups. Several worker processes may share the
+    file: each save merges with what is on disk under a file lock, newest entry per key wins.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 2000, ttl_sec: float = 7 * 24 * 3600,
+                 save_delay_sec: float = 2.0) -> None:
+        self.path = Path(path) if path else default_cache_path()
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.save_delay_sec = save_delay_sec
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._load()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(kind: str, model: str, version: str, text: str) -> str:
+        return "\x1f".join([kind, model, version, normalize_question(text)])
+
+    def _read_file(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self) -> None:
+        now = time.time()
+        for key, entry in self._read_file().items():
+            if isinstance(entry, dict) and now - entry.get('ts', 0) <= self.ttl_sec:
+                self._entries[key] = entry
+
+    def _merge(self, on_disk: dict, mine: dict) -> dict:
+        """Union of the file and this process's entries (newer ts wins), expired dropped, oldest trimmed"""
+        merged = {k: e for k, e in on_disk.items() if isinstance(e, dict)}
+        for key, entry in mine.items():
+            old = merged.get(key)
+            if old is None or old.get('ts', 0) <= entry['ts']:
+                merged[key] = entry
+        now = time.time()
+        live = sorted((kv for kv in merged.items() if now - kv[1].get('ts', 0) <= self.ttl_sec),
+                      key=lambda kv: kv[1].get('ts', 0))
+        return dict(live[-self.max_entries:])
+
+    def flush(self) -> None:
+        """Write pending changes to disk now"""
+        with self._save_lock:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                snapshot = dict(self._entries)
+            # 직렬화/파일 쓰기는 조회 잠금 밖에서 (같은 프로세스는 _save_lock, 다른 워커와는 파일 잠금으로 순서 보장)
+            try:
+                with file_lock(self.path.with_suffix('.lock')):
+                    merged = self._merge(self._read_file(), snapshot)
+                    fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=f"{self.path.stem}.{os.getpid()}.",
+                                               suffix='.tmp')
+                    try:
+                        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                            json.dump(merged, f, ensure_ascii=False)
+                        os.replace(tmp, self.path)
+                    except BaseException:
+                        try:
+                            os.unlink(tmp)
+                        except OSError:
+                            pass
+                        raise
+            except OSError:
+                pass
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                cache_event("llm_prompt", False)
+                return None
+            if time.time() - entry['ts'] > self.ttl_sec:
+                del self._entries[key]
+                self.misses += 1
+                cache_event("llm_prompt", False)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            cache_event("llm_prompt", True)
+            return entry['value']
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = {'ts': time.time(), 'value': value}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_prompt_cache: Optional[PromptCache] = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    global _prompt_cache
+    if _prompt_cache is None:
+        with _prompt_cache_lock:
+            if _prompt_cache is None:
+                _prompt_cache = PromptCache()
+    return _prompt_cache
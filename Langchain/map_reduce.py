@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional
+
+from Langchain.retrieval import BM25Index, format_chunks, select_chunks
+
+NO_RELEVANT_CONTENT = "관련 내용 없음"
+
+MAP_PROMPT = (
+    "다음 문서 한 개에서 질문에 답하는 데 필요한 내용만 한국어로 간결하게 정리하세요.\n"
+    "- 문서에 근거한 사실만 적고, 추측하지 마세요.\n"
+    f"- 관련 내용이 없으면 정확히 \"{NO_RELEVANT_CONTENT}\"이라고만 출력하세요.\n"
+    "문서:\n{context}\n\n질문: {question}\n\n정리:"
+)
+
+REDUCE_PROMPT = (
+    "다음은 여러 문서에서 질문과 관련된 내용을 문서별로 정리한 것입니다. 이 내용만 근거로 삼아 한국어로만 답변하세요.\n"
+    "- 반드시 한국어(한글)로만 출력하세요.\n"
+    "- 답변은 간결하고 정확하게 서술하고, 필요하면 관련 파일명을 함께 언급하세요.\n"
+    "문서별 정리:\n{partials}\n\n질문: {question}\n\n한국어 답변:"
+)
+
+
+def iter_map_reduce(llm, retriever: BM25Index, question: str, token_budget: int = 3000,
+                    max_concurrency: int = 3, cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Answer a question over many documents with per-document map prompts run concurrently
+    (at most max_concurrency in flight) and a final reduce prompt.
+
+    Yields {"type": "partial", "path", "text"} as each map call completes,
+    then {"type": "token", "text"} for the streamed reduce answer.
+    """
+    paths = list(dict.fromkeys(c.path for c in retriever.chunks))
+
+    def _map(path: str) -> str:
+        chunks = select_chunks(retriever, question, token_budget, path=path)
+        prompt = MAP_PROMPT.format(context=format_chunks(retriever, chunks), question=question)
+        return (llm.invoke(prompt) or "").strip()
+
+    partials: Dict[str, str] = {}
+    failed = set()
+    pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="odin-map")
+    try:
+        pending = {pool.submit(_map, p): p for p in paths}
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for f in done:
+                path = pending.pop(f)
+                try:
+                    text = f.result()
+                except Exception as e:
+                    text = f"LLM 호출 실패: {e}"
+                    failed.add(path)
+                partials[path] = text
+                yield {"type": "partial", "path": path, "text": text}
+    finally:
+        # 취소/연결 종료(제너레이터 close) 시 대기 중인 map 호출은 버리고 기다리지 않음
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    # 실패한 map 호출의 오류 문구는 문서 내용이 아니므로 reduce 프롬프트에서 제외
+    relevant = [(p, partials[p]) for p in paths
+                if p not in failed and partials.get(p)
+                and NO_RELEVANT_CONTENT not in partials[p][:len(NO_RELEVANT_CONTENT) + 5]]
+    if not relevant:
+        yield {"type": "token", "text": "선택된 문서에서 질문과 관련된 내용을 찾지 못했습니다."}
+        return
+
+    blocks: List[str] = [f"[FILE]{p}\n{text}" for p, text in relevant]
+    prompt = REDUCE_PROMPT.format(partials="\n\n".join(blocks), question=question)
+    stream = llm.stream(prompt)
+    try:
+        for token in stream:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if token:
+                yield {"type": "token", "text": token}
+    finally:
+        stream.close()
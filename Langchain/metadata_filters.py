@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+# 메타데이터 필터: 기간/크기 조건을 파일마다 stat하지 않고 인덱스의 숫자 열(수정/생성 시각, 크기)로 판정
+
+import math
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (라벨, 시작, 끝) — 로컬 시각 epoch 초, 끝은 포함하지 않음
+TimeRange = Tuple[str, float, float]
+
+_DATE = r"(20\d{2})\s*(?:[-./]|년)\s*(\d{1,2})\s*(?:[-./]|월)\s*(\d{1,2})\s*일?"
+_DATE_RANGE_RE = re.compile(_DATE + r"\s*(?:~|-|–|부터|에서)\s*" + _DATE + r"(?:\s*까지)?")
+_DATE_RE = re.compile(_DATE)
+
+_MONTHS = {m: i for i, m in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)}
+_MON = (r"\b(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+        r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?")
+_MONTH_RANGE_RES = [
+    # 2024년 3월부터 5월까지, 2023년 11월~2024년 2월
+    (re.compile(r"(20\d{2})\s*년\s*(\d{1,2})\s*월\s*(?:~|-|–|부터|에서)\s*(?:(20\d{2})\s*년\s*)?(\d{1,2})\s*월(?:\s*까지)?"),
+     lambda g: (g[0], g[1], g[2] or g[0], g[3])),
+    # between March and May 2024, from March to May 2024
+    (re.compile(r"(?:between|from)\s+" + _MON + r"\s+(?:(20\d{2})\s+)?(?:and|to|-)\s+" + _MON + r"\s+(20\d{2})"),
+     lambda g: (g[1] or g[3], _MONTHS[g[0][:3]], g[3], _MONTHS[g[2][:3]])),
+]
+_MONTH_RES = [
+    (re.compile(r"(20\d{2})\s*년\s*(\d{1,2})\s*월"), lambda g: (g[0], g[1])),
+    (re.compile(r"(20\d{2})[-./](\d{1,2})(?![-./\d])"), lambda g: (g[0], g[1])),
+    (re.compile(_MON + r"\s+(20\d{2})"), lambda g: (g[1], _MONTHS[g[0][:3]])),
+]
+_RECENT_UNITS = {"일": "day", "day": "day", "days": "day", "주": "week", "week": "week", "weeks": "week",
+                 "개월": "month", "달": "month", "month": "month", "months": "month",
+                 "년": "year", "year": "year", "years": "year"}
+_RECENT_RES = [
+    # 숫자는 세 자리까지: "지난 2024년", "2024년 동안"은 기간이 아니라 연도
+    re.compile(r"(?:최근|지난|last|past)\s*(\d{1,3})\s*(일|주|개월|달|년|days?|weeks?|months?|years?)(?![a-z])"),
+    re.compile(r"(?<!\d)(\d{1,3})\s*(일|주|개월|달|년)\s*(?:이내|안에|동안)"),
+]
+
+_SIZE_UNITS = {"b": 1, "byte": 1, "bytes": 1, "바이트": 1, "k": 1 << 10, "kb": 1 << 10, "킬로": 1 << 10,
+               "m": 1 << 20, "mb": 1 << 20, "메가": 1 << 20, "g": 1 << 30, "gb": 1 << 30, "기가": 1 << 30,
+               "t": 1 << 40, "tb": 1 << 40, "테라": 1 << 40}
+_SIZE = r"(\d+(?:\.\d+)?)\s*(tb|gb|mb|kb|bytes?|테라|기가|메가|킬로|바이트|t|g|m|k|b)(?![a-z])"
+_SIZE_RANGE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:~|-)\s*" + _SIZE)
+# (정규식, 숫자/단위/비교어 그룹 위치) — 비교어가 _INCLUSIVE에 있으면 경계값 포함
+_SIZE_MIN_RES = [(re.compile(_SIZE + r"\s*(?:보다\s*)?(이상|초과|넘는|넘은|넘게|큰)"), (1, 2, 3)),
+                 (re.compile(r"(larger than|bigger than|greater than|more than|over|above|at least|>=|>)\s*" + _SIZE),
+                  (2, 3, 1))]
+_SIZE_MAX_RES = [(re.compile(_SIZE + r"\s*(?:보다\s*)?(이하|미만|안\s*되는|작은)"), (1, 2, 3)),
+                 (re.compile(r"(smaller than|less than|under|below|at most|<=|<)\s*" + _SIZE), (2, 3, 1))]
+_INCLUSIVE = {"이상", "이하", "at least", "at most", ">=", "<="}
+
+
+def iso_to_epoch(iso: str) -> float:
+    """Local-time epoch seconds of an index timestamp (NaN when it cannot be parsed)"""
+    try:
+        return datetime.fromisoformat(iso.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return math.nan
+
+
+def _day(d: datetime) -> datetime:
+    return d.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_start(d: datetime, offset: int = 0) -> datetime:
+    months = d.year * 12 + d.month - 1 + offset
+    return datetime(months // 12, months % 12 + 1, 1)
+
+
+def _date(y: str, m: str, d: str) -> Optional[datetime]:
+    try:
+        return datetime(int(y), int(m), int(d))
+    except ValueError:
+        return None
+
+
+def year_ranges(years: Iterable[int]) -> List[TimeRange]:
+    return [(f"{y}년", datetime(y, 1, 1).timestamp(), datetime(y + 1, 1, 1).timestamp()) for y in years]
+
+
+def relative_day_ranges(flags: Dict[str, bool], now: Optional[datetime] = None) -> List[TimeRange]:
+    """Ranges for the today/yesterday/day_before_yesterday flags"""
+    today = _day(now or datetime.now())
+    out: List[TimeRange] = []
+    for key, label, back in (("today", "오늘", 0), ("yesterday", "어제", 1), ("day_before_yesterday", "그제", 2)):
+        if flags.get(key):
+            start = today - timedelta(days=back)
+            out.append((label, start.timestamp(), (start + timedelta(days=1)).timestamp()))
+    return out
+
+
+def extract_period_ranges(text: str, now: Optional[datetime] = None) -> List[TimeRange]:
+    """Week/month phrases and explicit dates or date ranges ("2024-03-01~2024-05-31", "2024년 3월 5일")"""
+    t = text.strip()
+    now = now or datetime.now()
+    today = _day(now)
+    monday = today - timedelta(days=today.weekday())
+    out: List[TimeRange] = []
+
+    tl = t.lower()
+    if re.search(r"이번\s*주|금주|this week", tl):
+        out.append(("이번 주", monday.timestamp(), (monday + timedelta(days=7)).timestamp()))
+    if re.search(r"(?:지난|저번)\s*주|last week", tl):
+        out.append(("지난 주", (monday - timedelta(days=7)).timestamp(), monday.timestamp()))
+    if re.search(r"이번\s*달|이달|금월|this month", tl):
+        out.append(("이번 달", _month_start(today).timestamp(), _month_start(today, 1).timestamp()))
+    if re.search(r"(?:지난|저번)\s*달|전월|last month", tl):
+        out.append(("지난 달", _month_start(today, -1).timestamp(), _month_start(today).timestamp()))
+    out.extend(_recent_ranges(tl, today))
+
+    rest = t
+    for m in _DATE_RANGE_RE.finditer(t):
+        a, b = _date(*m.group(1, 2, 3)), _date(*m.group(4, 5, 6))
+        if a and b:
+            a, b = min(a, b), max(a, b)
+            out.append((f"{a:%Y-%m-%d}~{b:%Y-%m-%d}", a.timestamp(), (b + timedelta(days=1)).timestamp()))
+        rest = rest.replace(m.group(0), " ")
+    for m in _DATE_RE.finditer(rest):
+        d = _date(*m.group(1, 2, 3))
+        if d:
+            out.append((f"{d:%Y-%m-%d}", d.timestamp(), (d + timedelta(days=1)).timestamp()))
+        rest = rest.replace(m.group(0), " ")
+    out.extend(_month_ranges(rest.lower()))
+    return out
+
+
+def _month_ranges(text: str) -> List[TimeRange]:
+    """Month spans ("2024년 3월부터 5월까지", "between March and May 2024", "2024년 3월")"""
+    out: List[TimeRange] = []
+    for regex, fields in _MONTH_RANGE_RES:
+        for m in regex.finditer(text):
+            y1, m1, y2, m2 = (int(v) for v in fields(m.groups()))
+            if not (1 <= m1 <= 12 and 1 <= m2 <= 12):
+                continue
+            a, b = sorted((datetime(y1, m1, 1), datetime(y2, m2, 1)))
+            out.append((f"{a:%Y-%m}~{b:%Y-%m}", a.timestamp(), _month_start(b, 1).timestamp()))
+            text = text.replace(m.group(0), " ")
+    for regex, fields in _MONTH_RES:
+        for m in regex.finditer(text):
+            y, mo = (int(v) for v in fields(m.groups()))
+            if 1 <= mo <= 12:
+                start = datetime(y, mo, 1)
+                out.append((f"{start:%Y-%m}", start.timestamp(), _month_start(start, 1).timestamp()))
+            text = text.replace(m.group(0), " ")
+    return out
+
+
+def _recent_ranges(text: str, today: datetime) -> List[TimeRange]:
+    """Rolling windows ending today ("최근 3개월", "2주 이내", "last 10 days")"""
+    out: List[TimeRange] = []
+    end = (today + timedelta(days=1)).timestamp()
+    for regex in _RECENT_RES:
+        for m in regex.finditer(text):
+            n, unit = int(m.group(1)), _RECENT_UNITS[m.group(2)]
+            if unit == "day":
+                start = today - timedelta(days=n)
+            elif unit == "week":
+                start = today - timedelta(weeks=n)
+            else:
+                months = n * (12 if unit == "year" else 1)
+                first = _month_start(today, -months)
+                # 같은 날짜가 없는 달(예: 31일)은 그 달의 마지막 날로
+                start = first.replace(day=min(today.day, (_month_start(first, 1) - timedelta(days=1)).day))
+            out.append((m.group(0).strip(), start.timestamp(), end))
+    return out
+
+
+def _size_bytes(number: str, unit: str) -> float:
+    return float(number) * _SIZE_UNITS[unit]
+
+
+def extract_size_range(text: str) -> Optional[Tuple[str, float, float]]:
+    """(label, min_bytes, max_bytes) from "50MB 이상", "larger than 1GB", "10~20MB"; max is exclusive"""
+    t = text.lower()
+    lo, hi = -math.inf, math.inf
+    labels: List[str] = []
+    m = _SIZE_RANGE_RE.search(t)
+    if m:
+        lo = _size_bytes(m.group(1), m.group(3))
+        hi = math.nextafter(_size_bytes(m.group(2), m.group(3)), math.inf)
+        labels.append(m.group(0).strip())
+    for regex, (num, unit, op) in _SIZE_MIN_RES:
+        for m in regex.finditer(t):
+            v = _size_bytes(m.group(num), m.group(unit))
+            lo = max(lo, v if m.group(op) in _INCLUSIVE else math.nextafter(v, math.inf))
+            labels.append(m.group(0).strip())
+    for regex, (num, unit, op) in _SIZE_MAX_RES:
+        for m in regex.finditer(t):
+            v = _size_bytes(m.group(num), m.group(unit))
+            hi = min(hi, math.nextafter(v, math.inf) if m.group(op) in _INCLUSIVE else v)
+            labels.append(m.group(0).strip())
+    if not labels:
+        return None
+    return (", ".join(labels), lo, hi)
+
+
+_PERIOD_WORD_RE = re.compile(
+    r"(?:이번|지난|저번)\s*(?:주|달)|금주|이달|금월|전월|최근에?|오늘|어제|그저께|그제|"
+    r"\b(?:this|last) (?:week|month)\b")
+
+
+def strip_filter_phrases(text: str) -> str:
+    """Remove the date/size phrases MetadataFilter.from_query understands, so they are not taken as keywords"""
+    t = text.lower()
+    regexes = [_DATE_RANGE_RE, _DATE_RE] + [r for r, _ in _MONTH_RANGE_RES] + [r for r, _ in _MONTH_RES]
+    regexes += _RECENT_RES + [_SIZE_RANGE_RE] + [r for r, _ in _SIZE_MIN_RES] + [r for r, _ in _SIZE_MAX_RES]
+    # 기간 단어는 숫자 기간("지난 3개월")을 지운 다음에 처리
+    regexes.append(_PERIOD_WORD_RE)
+    for regex in regexes:
+        t = regex.sub(" ", t)
+    return t
+
+
+def in_ranges(epoch: float, ranges: Sequence[TimeRange]) -> bool:
+    return any(start <= epoch < end for _, start, end in ranges)
+
+
+class MtimeLookup:
+    """
+    Path -> modification time from the loaded index.
+
+    MappedIndex snapshots answer from their numeric mtime column (binary search by path);
+    plain FileInfo lists are indexed by path once and timestamps are parsed only for the
+    paths that are actually asked about.
+    """
+
+    def __init__(self, file_infos: Sequence[Any]) -> None:
+        self.file_infos = file_infos
+        self._by_path: Optional[Dict[str, Any]] = None
+
+    def mtimes(self, paths: Sequence[str]) -> List[float]:
+        """Epoch seconds per path (NaN for paths the index does not know)"""
+        modified_epochs = getattr(self.file_infos, 'modified_epochs', None)
+        if modified_epochs is not None:
+            return modified_epochs(paths)
+        if self._by_path is None:
+            self._by_path = {fi.path: fi for fi in self.file_infos}
+        out: List[float] = []
+        for p in paths:
+            fi = self._by_path.get(p)
+            out.append(iso_to_epoch(fi.modified_time) if fi is not None else math.nan)
+        return out
+
+    def filter(self, paths: List[str], ranges: Sequence[TimeRange]) -> List[str]:
+        """Keep paths modified inside any of the ranges"""
+        if not ranges:
+            return paths
+        return [p for p, mt in zip(paths, self.mtimes(paths)) if in_ranges(mt, ranges)]
+
+
+# ----- 정렬된 보조 인덱스 (수정/생성 시각, 크기) -----
+COLUMNS = ("mtime", "ctime", "size")
+
+
+class MetadataFilter:
+    """
+    AND of criteria over numeric index columns.
+
+    Each criterion is (column, [(lo, hi), ...]) and matches when the column value falls in any
+    of its half-open [lo, hi) ranges; open bounds are -inf/inf.
+    """
+
+    def __init__(self) -> None:
+        self.criteria: List[Tuple[str, List[Tuple[float, float]]]] = []
+        self.labels: List[str] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.criteria)
+
+    def add(self, column: str, ranges: Sequence[TimeRange]) -> "MetadataFilter":
+        if ranges:
+            if column not in COLUMNS:
+                raise ValueError(f"unknown column: {column}")
+            self.criteria.append((column, [(float(lo), float(hi)) for _, lo, hi in ranges]))
+            self.labels.extend(label for label, _, _ in ranges)
+        return self
+
+    def extend(self, other: Optional["MetadataFilter"]) -> "MetadataFilter":
+        if other:
+            self.criteria.extend(other.criteria)
+            self.labels.extend(other.labels)
+        return self
+
+    @classmethod
+    def from_query(cls, text: str, years: Sequence[int] = (), now: Optional[datetime] = None) -> "MetadataFilter":
+        """Year, relative-day, period and size phrases of a natural-language query"""
+        t = text.strip()
+        flags = {"today": "오늘" in t, "yesterday": "어제" in t, "day_before_yesterday": "그제" in t or "그저께" in t}
+        flt = cls()
+        flt.add("mtime", year_ranges(years))
+        flt.add("mtime", relative_day_ranges(flags, now))
+        flt.add("mtime", extract_period_ranges(t, now))
+        size = extract_size_range(t)
+        if size:
+            flt.add("size", [size])
+        return flt
+
+    def to_dict(self) -> Dict[str, Any]:
+        def bound(v: float) -> Optional[float]:
+            return v if math.isfinite(v) else None
+        return {
+            "labels": list(self.labels),
+            "criteria": [{"column": c, "ranges": [[bound(lo), bound(hi)] for lo, hi in ranges]}
+                         for c, ranges in self.criteria],
+        }
+
+
+class MetadataIndex:
+    """
+    Sorted secondary indexes over mtime, ctime and size.
+
+    For every column, `order` holds row ids sorted by value and `sorted` the values in that
+    order (NaN last), so a range query is two searchsorted calls and a slice of row ids.
+    `values` stays row-aligned for checking individual candidate rows.
+    """
+
+    def __init__(self, values: Dict[str, np.ndarray], orders: Optional[Dict[str, np.ndarray]] = None,
+                 sorted_values: Optional[Dict[str, np.ndarray]] = None, source: Any = None) -> None:
+        self.values = values
+        self.orders = orders or {c: np.argsort(v, kind="stable") for c, v in values.items()}
+        self.sorted = sorted_values or {c: values[c][self.orders[c]] for c in values}
+        self.count = len(next(iter(values.values()))) if values else 0
+        self._source = source
+        self._row_by_id: Optional[Dict[int, int]] = None
+
+    @classmethod
+    def from_infos(cls, infos: Sequence[Any]) -> "MetadataIndex":
+        values = {
+            "mtime": np.array([iso_to_epoch(fi.modified_time) for fi in infos], dtype=np.float64),
+            "ctime": np.array([iso_to_epoch(fi.created_time) for fi in infos], dtype=np.float64),
+            "size": np.array([float(fi.size_bytes or 0) for fi in infos], dtype=np.float64),
+        }
+        return cls(values, source=infos)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for d in (self.values, self.orders, self.sorted) for a in d.values())
+
+    def _slices(self, column: str, ranges: Sequence[Tuple[float, float]]) -> List[Tuple[int, int]]:
+        col = self.sorted[column]
+        return [(int(np.searchsorted(col, lo, side="left")), int(np.searchsorted(col, hi, side="left")))
+                for lo, hi in ranges]
+
+    def range_rows(self, column: str, ranges: Sequence[Tuple[float, float]]) -> np.ndarray:
+        """Sorted unique row ids whose value lies in any of the [lo, hi) ranges"""
+        order = self.orders[column]
+        parts = [order[a:b] for a, b in self._slices(column, ranges) if b > a]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts))
+
+    def select(self, flt: MetadataFilter) -> np.ndarray:
+        """Row ids matching every criterion (intersection of bisect slices)"""
+        rows: Optional[np.ndarray] = None
+        for column, ranges in flt.criteria:
+            found = self.range_rows(column, ranges)
+            rows = found if rows is None else np.intersect1d(rows, found, assume_unique=True)
+        return rows if rows is not None else np.arange(self.count)
+
+    def estimate(self, flt: MetadataFilter) -> int:
+        """Upper bound on matching rows (size of the narrowest criterion), without materializing slices"""
+        sizes = [sum(b - a for a, b in self._slices(c, r)) for c, r in flt.criteria]
+        return min(sizes) if sizes else self.count
+
+    def row_of(self, info: Any) -> Optional[int]:
+        find_row = getattr(self._source, 'find_row', None)
+        if find_row is not None:
+            return find_row(info.path)
+        if self._row_by_id is None:
+            self._row_by_id = {id(fi): i for i, fi in enumerate(self._source or [])}
+        return self._row_by_id.get(id(info))
+
+    def filter_infos(self, infos: List[Any], flt: MetadataFilter) -> List[Any]:
+        """Keep candidate infos matching flt (order preserved)"""
+        if not flt or not infos:
+            return infos
+        rows = [self.row_of(fi) for fi in infos]
+        known = np.array([r if r is not None else -1 for r in rows], dtype=np.int64)
+        if self.estimate(flt) <= len(infos):
+            # 조건에 맞는 행이 후보보다 적으면 구간 슬라이스와 교집합
+            keep = np.isin(known, self.select(flt))
+        else:
+            # 후보가 적으면 후보 행의 값만 확인
+            keep = known >= 0
+            safe = np.where(keep, known, 0)
+            for column, ranges in flt.criteria:
+                v = self.values[column][safe]
+                hit = np.zeros(len(infos), dtype=bool)
+                for lo, hi in ranges:
+                    hit |= (v >= lo) & (v < hi)
+                keep &= hit
+        return [fi for fi, k in zip(infos, keep) if k]
+
+
+# MappedIndex가 아닌 FileInfo 목록용 보조 인덱스 캐시 (목록 객체를 참조로 잡아 두어 id 재사용을 막음)
+_INDEX_CACHE: "OrderedDict[int, Tuple[Any, MetadataIndex]]" = OrderedDict()
+_INDEX_CACHE_SIZE = 4
+_INDEX_CACHE_LOCK = threading.Lock()
+
+
+def metadata_index_for(file_infos: Sequence[Any]) -> MetadataIndex:
+    """Secondary indexes for a loaded index: stored in the snapshot, or built once per FileInfo list"""
+    builder = getattr(file_infos, 'metadata_index', None)
+    if builder is not None:
+        return builder()
+    key = id(file_infos)
+    with _INDEX_CACHE_LOCK:
+        cached = _INDEX_CACHE.get(key)
+        if cached is not None and cached[0] is file_infos and cached[1].count == len(file_infos):
+            _INDEX_CACHE.move_to_end(key)
+            return cached[1]
+    index = MetadataIndex.from_infos(file_infos)
+    with _INDEX_CACHE_LOCK:
+        _INDEX_CACHE[key] = (file_infos, index)
+        _INDEX_CACHE.move_to_end(key)
+        while len(_INDEX_CACHE) > _INDEX_CACHE_SIZE:
+            _INDEX_CACHE.popitem(last=False)
+    return index
@@ -0,0 +1,217 @@
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 초 단위 히스토그램 버킷 (1ms ~ 2분)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 현재 요청에서 기록된 (단계, 초) 목록. Server-Timing 헤더용 (요청 밖에서는 None)
+_REQUEST_SPANS: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "odin_request_spans", default=None)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _label_str(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # bucket counts..., sum, count
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%g"' % bound
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le)} {_fmt(count)}")
+            le_inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_label_str(self.labelnames, key, le_inf)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_sum{_label_str(self.labelnames, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_label_str(self.labelnames, key)} {_fmt(series[-1])}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose samples are produced by a callback at scrape time"""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable[[], Iterable[Tuple[Sequence[str], float]]]] = None) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        try:
+            samples = list(self.callback()) if self.callback else []
+        except Exception:
+            samples = []
+        return self.header() + [f"{self.name}{_label_str(self.labelnames, labels)} {_fmt(value)}"
+                                for labels, value in samples]
+
+
+_REGISTRY: List[_Metric] = []
+_REGISTRY_NAMES: Dict[str, _Metric] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def register(metric: _Metric) -> _Metric:
+    """Add a metric to the /metrics output (re-registering a name replaces the old one)"""
+    with _REGISTRY_LOCK:
+        old = _REGISTRY_NAMES.get(metric.name)
+        if old is not None:
+            _REGISTRY.remove(old)
+        _REGISTRY.append(metric)
+        _REGISTRY_NAMES[metric.name] = metric
+    return metric
+
+
+def render_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)"""
+    with _REGISTRY_LOCK:
+        metrics = list(_REGISTRY)
+    lines: List[str] = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = register(Histogram(
+    "odin_stage_duration_seconds", "Time spent in each pipeline stage", ["stage"]))
+CACHE_EVENTS = register(Counter(
+    "odin_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]))
+
+
+# ----- 단계별 시간 측정 -----
+def record_span(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    spans = _REQUEST_SPANS.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` (histogram + current request's Server-Timing)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(stage, time.perf_counter() - started)
+
+
+def timed(stage: str):
+    """Decorator version of span() for sync and async functions"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_event(cache: str, hit: bool) -> None:
+    CACHE_EVENTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def begin_request_spans() -> Tuple[List[Tuple[str, float]], contextvars.Token]:
+    spans: List[Tuple[str, float]] = []
+    return spans, _REQUEST_SPANS.set(spans)
+
+
+def end_request_spans(token: contextvars.Token) -> None:
+    _REQUEST_SPANS.reset(token)
+
+
+def format_server_timing(spans: List[Tuple[str, float]], total_sec: Optional[float] = None) -> str:
+    """Aggregate spans per stage into a Server-Timing header value (durations in ms)"""
+    totals: Dict[str, List[float]] = {}
+    for stage, seconds in spans:
+        entry = totals.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = []
+    for stage, (seconds, count) in totals.items():
+        part = f"{stage};dur={seconds * 1000:.1f}"
+        if count > 1:
+            part += f';desc="x{count}"'
+        parts.append(part)
+    if total_sec is not None:
+        parts.append(f"total;dur={total_sec * 1000:.1f}")
+    return ", ".join(parts)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Ollama 상태/모델 목록 조회: HTTP API(연결 재사용) + 짧은 TTL 캐시 + 백그라운드 갱신, 실패 시 CLI로 대체
+
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from Langchain.metrics import cache_event
+
+DEFAULT_HOST = "http://127.0.0.1:11434"
+
+
+def ollama_base_url(host: Optional[str] = None) -> str:
+    """Normalize OLLAMA_HOST ("host", "host:port" or a URL) to a base URL"""
+    host = (host or os.environ.get("OLLAMA_HOST") or "").strip()
+    if not host:
+        return DEFAULT_HOST
+    if "://" not in host:
+        host = "http://" + host
+    parts = urlsplit(host)
+    hostname = parts.hostname or "127.0.0.1"
+    if hostname == "0.0.0.0":
+        hostname = "127.0.0.1"
+    if ":" in hostname:
+        hostname = f"[{hostname}]"
+    port = parts.port or (443 if parts.scheme == "https" else 11434)
+    return f"{parts.scheme}://{hostname}:{port}{parts.path.rstrip('/')}"
+
+
+def _parse_cli_list(out: str) -> List[str]:
+    names: List[str] = []
+    for i, line in enumerate(l.strip() for l in out.splitlines() if l.strip()):
+        if i == 0 and ("NAME" in line and "SIZE" in line):
+            continue
+        parts = line.split()
+        if parts:
+            names.append(parts[0])
+    return names
+
+
+class _Cached:
+    def __init__(self) -> None:
+        self.value: Optional[Dict[str, Any]] = None
+        self.fetched_at = 0.0
+        self.refreshing = False
+
+
+class ModelRegistry:
+    """
+    Cached view of the local Ollama server.
+
+    Values younger than the TTL are returned as-is; older ones are still returned immediately
+    while a single background refresh runs (stale-while-revalidate), so polling /health or
+    /ollama/models never waits on Ollama after the first call. The `ollama` CLI is only used
+    when the HTTP API cannot be reached.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, health_ttl_sec: float = 2.0, models_ttl_sec: float = 15.0,
+                 timeout_sec: float = 1.0) -> None:
+        self.base_url = base_url or ollama_base_url()
+        self.ttl = {"health": health_ttl_sec, "models": models_ttl_sec}
+        self.timeout_sec = timeout_sec
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout_sec)
+        self._cache = {"health": _Cached(), "models": _Cached()}
+        self._fetchers: Dict[str, Callable[[], Dict[str, Any]]] = {
+            "health": self._fetch_health, "models": self._fetch_models}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="odin-ollama-probe")
+
+    @classmethod
+    def from_env(cls) -> "ModelRegistry":
+        return cls(
+            health_ttl_sec=float(os.environ.get("ODIN_OLLAMA_HEALTH_TTL_SEC", "2")),
+            models_ttl_sec=float(os.environ.get("ODIN_OLLAMA_MODELS_TTL_SEC", "15")),
+            timeout_sec=float(os.environ.get("ODIN_OLLAMA_PROBE_TIMEOUT_SEC", "1")),
+        )
+
+    # ----- 조회 -----
+    def _fetch_health(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            resp = self._client.get("/api/version")
+            resp.raise_for_status()
+            return {"available": True, "version": resp.json().get("version"), "source": "http",
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except (httpx.HTTPError, ValueError) as e:
+            http_error = str(e) or type(e).__name__
+        # HTTP로 연결되지 않을 때만 CLI 확인 (서버가 다른 주소에 떠 있는 경우 등)
+        try:
+            proc = subprocess.run(["ollama", "list"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                  timeout=max(1.0, self.timeout_sec), check=False)
+            available = proc.returncode == 0
+        except Exception:
+            available = False
+        return {"available": available, "version": None, "source": "cli", "error": http_error,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    def _fetch_models(self) -> Dict[str, Any]:
+        try:
+            resp = self._client.get("/api/tags")
+            resp.raise_for_status()
+            models = resp.json().get("models") or []
+            return {
+                "models": [m.get("name") or m.get("model") for m in models],
+                "details": [{"name": m.get("name") or m.get("model"), "size": m.get("size"),
+                             "modified_at": m.get("modified_at"), "digest": m.get("digest")} for m in models],
+                "source": "http",
+            }
+        except (httpx.HTTPError, ValueError) as e:
+            http_error = str(e) or type(e).__name__
+        try:
+            out = subprocess.check_output(["ollama", "list"], stderr=subprocess.STDOUT, text=True,
+                                          timeout=max(5.0, self.timeout_sec))
+            return {"models": _parse_cli_list(out), "details": [], "source": "cli"}
+        except Exception as e:
+            return {"models": [], "details": [], "source": "none", "error": f"{http_error}; {e}"}
+
+    def refresh(self, key: str) -> Dict[str, Any]:
+        """Fetch now (blocking) and update the cache"""
+        try:
+            value = self._fetchers[key]()
+        except Exception as e:
+            value = {"error": str(e), "source": "none"}
+        entry = self._cache[key]
+        with self._lock:
+            entry.value = {**value, "checked_at": time.time()}
+            entry.fetched_at = time.monotonic()
+            entry.refreshing = False
+            return entry.value
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached value without blocking (schedules a background refresh when stale); None before the first fetch"""
+        entry = self._cache[key]
+        with self._lock:
+            value = entry.value
+            stale = value is None or time.monotonic() - entry.fetched_at > self.ttl[key]
+            if stale and value is not None and not entry.refreshing:
+                entry.refreshing = True
+                self._refresher.submit(self.refresh, key)
+        cache_event(f"ollama_{key}", value is not None and not stale)
+        return value
+
+    def get(self, key: str) -> Dict[str, Any]:
+        """Cached value, fetching synchronously only when nothing has been cached yet"""
+        value = self.peek(key)
+        return value if value is not None else self.refresh(key)
+
+    def health(self) -> Dict[str, Any]:
+        return self.get("health")
+
+    def models(self) -> Dict[str, Any]:
+        return self.get("models")
+
+    def prime(self) -> None:
+        """Fetch everything in the background (server startup)"""
+        for key in self._cache:
+            self._refresher.submit(self.refresh, key)
@@ -0,0 +1,314 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 요청 하나를 프로파일링할 때만 설정됨 (작업 스레드에서도 보이도록 contextvar 사용)
+_ACTIVE_PROFILE: contextvars.ContextVar[Optional["CProfileSession"]] = contextvars.ContextVar(
+    "odin_active_profile", default=None)
+
+# 샘플링에서 "대기 중"으로 보고 제외할 최하단 프레임 (유휴 스레드 풀/이벤트 루프)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"), ("queue.py", "get"), ("thread.py", "_worker"),
+}
+
+# tracemalloc 결과를 묶을 코드 영역
+MEMORY_SCOPES: Dict[str, Tuple[str, ...]] = {
+    "index": ("Langchain/structured_indexing.py", "Langchain/session_manager.py", "Langchain/Searchtool.py"),
+    "session": ("Langchain/InteractiveSearch.py", "Langchain/embedding_index.py"),
+    "parsers": ("parsers/",),
+}
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get("ODIN_PROFILING", "0") == "1"
+
+
+def _profile_name(target: str, suffix: str) -> str:
+    return f"{target}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{suffix}"
+
+
+# ----- cProfile -----
+class CProfileSession:
+    """
+    Deterministic profile of one request.
+
+    The event-loop thread is profiled for the whole request; blocking work handed to executor
+    threads through run_profiled() gets its own Profile that is merged in at the end.
+    On Python 3.12+ cProfile uses the single process-wide sys.monitoring slot, so the request
+    profile already records every thread and no per-thread Profile is started.
+    Other requests running on the loop at the same time also show up in the result.
+    """
+
+    def __init__(self) -> None:
+        self._main = cProfile.Profile()
+        self._workers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "CProfileSession":
+        self._token = _ACTIVE_PROFILE.set(self)
+        self.started = time.perf_counter()
+        self._main.enable()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._main.disable()
+        self.elapsed = time.perf_counter() - self.started
+        _ACTIVE_PROFILE.reset(self._token)
+
+    def add(self, prof: cProfile.Profile) -> None:
+        with self._lock:
+            self._workers.append(prof)
+
+    def stats(self) -> pstats.Stats:
+        st = pstats.Stats(self._main)
+        with self._lock:
+            for prof in self._workers:
+                st.add(prof)
+        return st
+
+    def save(self, out_dir: Path, target: str) -> Path:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / _profile_name(target, ".prof")
+        self.stats().dump_stats(str(path))
+        return path
+
+    def top(self, limit: int = 25, sort: str = "cumulative") -> str:
+        buf = io.StringIO()
+        st = self.stats()
+        st.stream = buf
+        st.strip_dirs().sort_stats(sort).print_stats(limit)
+        return buf.getvalue()
+
+
+def run_profiled(func, *args, **kwargs):
+    """Call func; when a cProfile session is active in this context, profile it in this thread"""
+    session = _ACTIVE_PROFILE.get()
+    if session is None:
+        return func(*args, **kwargs)
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError:
+        # 3.12+: 프로파일러 슬롯이 프로세스에 하나뿐이고 요청 프로파일이 이미 이 스레드도 기록 중
+        return func(*args, **kwargs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        prof.disable()
+        session.add(prof)
+
+
+# ----- 샘플링 프로파일러 -----
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampler over all threads (sys._current_frames).
+
+    Captures executor threads and the event loop alike; idle waits are dropped.
+    The result is a speedscope file with one sampled profile per thread.
+    """
+
+    def __init__(self, interval_sec: float = 0.005) -> None:
+        self.interval = max(0.001, interval_sec)
+        self._frames: List[Dict[str, Any]] = []
+        self._frame_ids: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, List[List[int]]] = {}
+        self._weights: Dict[int, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.sample_count = 0
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_filename, code.co_name, code.co_firstlineno)
+        fid = self._frame_ids.get(key)
+        if fid is None:
+            fid = self._frame_ids[key] = len(self._frames)
+            self._frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return fid
+
+    @staticmethod
+    def _is_idle(frame) -> bool:
+        return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FRAMES
+
+    def _sample(self, weight: float) -> None:
+        own = threading.get_ident()
+        for tid, frame in sys._current_frames().items():
+            if tid == own or self._is_idle(frame):
+                continue
+            stack: List[int] = []
+            while frame is not None:
+                stack.append(self._frame_id(frame))
+                frame = frame.f_back
+            stack.reverse()  # speedscope: 루트 -> 리프 순서
+            self._samples.setdefault(tid, []).append(stack)
+            self._weights.setdefault(tid, []).append(weight)
+        self.sample_count += 1
+
+    def _loop(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._loop, name="odin-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        profiles = []
+        for tid, samples in self._samples.items():
+            weights = self._weights[tid]
+            profiles.append({
+                "type": "sampled",
+                "name": names.get(tid, f"thread-{tid}"),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            })
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+            "name": name,
+            "exporter": "odin-sampler",
+        }
+
+    def save(self, out_dir: Path, target: str) -> Path:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        path = out_dir / _profile_name(target, ".speedscope.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_speedscope(target), f)
+        return path
+
+    def top(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Functions with the most self time (leaf samples) across threads"""
+        totals: Dict[int, float] = {}
+        for tid, samples in self._samples.items():
+            for stack, weight in zip(samples, self._weights[tid]):
+                if stack:
+                    totals[stack[-1]] = totals.get(stack[-1], 0.0) + weight
+        ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+        return [{**self._frames[fid], "self_sec": round(sec, 4)} for fid, sec in ranked]
+
+
+# ----- tracemalloc 스냅샷 비교 -----
+class MemoryTracker:
+    """tracemalloc baseline/diff helper; allocations are attributed to the innermost frame in scope"""
+
+    def __init__(self) -> None:
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 25) -> Dict[str, Any]:
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._baseline = self._previous = tracemalloc.take_snapshot()
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = self._previous = None
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {"tracing": tracemalloc.is_tracing(), "frames": tracemalloc.get_traceback_limit(),
+                "traced_kb": round(current / 1024, 1), "peak_kb": round(peak / 1024, 1)}
+
+    @staticmethod
+    def _in_scope(filename: str, patterns: Tuple[str, ...]) -> bool:
+        filename = filename.replace("\\", "/")
+        return any(p in filename for p in patterns)
+
+    def diff(self, scope: str = "all", since: str = "baseline", limit: int = 30) -> Dict[str, Any]:
+        if scope != "all" and scope not in MEMORY_SCOPES:
+            raise ValueError(f"unknown scope: {scope}")
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._baseline is None:
+                raise RuntimeError("tracemalloc is not running")
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            old = self._previous if since == "previous" else self._baseline
+            self._previous = snapshot
+
+        patterns = tuple(p for ps in MEMORY_SCOPES.values() for p in ps) if scope == "all" else MEMORY_SCOPES[scope]
+        grouped: Dict[Tuple[str, int], List[int]] = {}
+        for stat in snapshot.compare_to(old, "traceback"):
+            # 가장 안쪽의 우리 코드 줄에 할당을 귀속 (csv, json 등 표준 라이브러리 내부가 아니라)
+            frame = next((f for f in stat.traceback if self._in_scope(f.filename, patterns)), None)
+            if frame is None:
+                continue
+            entry = grouped.setdefault((frame.filename, frame.lineno), [0, 0, 0])
+            entry[0] += stat.size_diff
+            entry[1] += stat.size
+            entry[2] += stat.count_diff
+        ranked = sorted(grouped.items(), key=lambda kv: abs(kv[1][0]), reverse=True)[:limit]
+        return {
+            "scope": scope,
+            "since": since,
+            **self.status(),
+            "total_diff_kb": round(sum(v[0] for v in grouped.values()) / 1024, 1),
+            "top": [{"file": f, "line": line, "size_diff_kb": round(d / 1024, 1), "size_kb": round(s / 1024, 1),
+                     "count_diff": c} for (f, line), (d, s, c) in ranked],
+        }
+
+
+# 테스트 함수
+def test_profiled_run_blocking():
+    """프로파일링 중인 요청이 작업 스레드로 넘긴 호출(server._run_blocking과 같은 경로)이 실패하지 않고 기록되는지 확인"""
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    def blocking_work(n: int) -> int:
+        return sum(i * i for i in range(n))
+
+    async def request(pool: ThreadPoolExecutor) -> int:
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(pool, lambda: ctx.run(run_profiled, blocking_work, 200_000))
+
+    with ThreadPoolExecutor(max_workers=2) as pool, CProfileSession() as profile:
+        result = asyncio.run(request(pool))
+    assert result == blocking_work(200_000)
+    profiled = {func[2] for func in profile.stats().stats}
+    assert "blocking_work" in profiled, sorted(profiled)[:20]
+    print(f"Python {sys.version.split()[0]}: 작업 스레드 호출 프로파일 OK ({profile.elapsed * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    test_profiled_run_blocking()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# 검색 결과 응답 인코딩: orjson/msgpack(선택 설치) + 부모 폴더 사전 인코딩 compact 레이아웃
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 없으면 표준 json 사용
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+FULL = "full"
+COMPACT = "compact"
+COMPACT_COLUMNS = ["dir", "name", "extension", "size_bytes", "is_directory", "created", "modified"]
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type from an Accept header (msgpack only when requested and installed)"""
+    if msgpack is not None and accept:
+        for part in accept.split(","):
+            if part.split(";")[0].strip().lower() in _MSGPACK_TYPES:
+                return MSGPACK
+    return JSON
+
+
+def dumps_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode(obj: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(obj, use_bin_type=True)
+    return dumps_json(obj)
+
+
+def file_items(infos: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Same fields as FileInfoDTO, built as plain dicts (no per-item model validation)"""
+    return [{
+        "path": i.path,
+        "name": i.name,
+        "extension": i.extension,
+        "size_bytes": int(i.size_bytes),
+        "is_directory": bool(i.is_directory),
+        "created_time": i.created_time,
+        "modified_time": i.modified_time,
+    } for i in infos]
+
+
+def _epoch(iso: str, cache: Dict[str, Optional[int]]) -> Optional[int]:
+    if iso in cache:
+        return cache[iso]
+    try:
+        value = int(datetime.fromisoformat(iso).timestamp())
+    except (TypeError, ValueError):
+        value = None
+    cache[iso] = value
+    return value
+
+
+def compact_items(infos: Sequence[Any]) -> Dict[str, Any]:
+    """
+    Column layout: parent folders are stored once in `dirs` and rows refer to them by index
+    (path = dirs[dir] + sep + name; dir -1 means name holds the full path). Timestamps are
+    local-time epoch seconds instead of ISO strings.
+    """
+    sep = os.sep
+    dirs: List[str] = []
+    dir_ids: Dict[str, int] = {}
+    stamps: Dict[str, Optional[int]] = {}
+    rows: List[List[Any]] = []
+    for i in infos:
+        parent = i.parent_path if hasattr(i, "parent_path") else os.path.dirname(i.path)
+        if parent and i.path == parent.rstrip(sep) + sep + i.name:
+            d = dir_ids.get(parent)
+            if d is None:
+                d = dir_ids[parent] = len(dirs)
+                dirs.append(parent.rstrip(sep))
+            name = i.name
+        else:
+            d, name = -1, i.path
+        rows.append([d, name, i.extension, int(i.size_bytes), 1 if i.is_directory else 0,
+                     _epoch(i.created_time, stamps), _epoch(i.modified_time, stamps)])
+    return {"sep": sep, "dirs": dirs, "columns": COMPACT_COLUMNS, "rows": rows}
+
+
+def search_payload(keywords: List[str], expanded_keywords: List[str], extensions: List[str], years: List[int],
+                   infos: Sequence[Any], layout: str = FULL,
+                   filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """SearchResponse-shaped dict; layout=compact replaces `items` with `compact`"""
+    payload: Dict[str, Any] = {
+        "keywords": list(keywords),
+        "expanded_keywords": list(expanded_keywords),
+        "extensions": list(extensions),
+        "years": list(years),
+    }
+    if filters:
+        payload["filters"] = filters
+    payload.update(items_payload(infos, layout))
+    return payload
+
+
+def items_payload(infos: Sequence[Any], layout: str = FULL) -> Dict[str, Any]:
+    """{"items": [...]} or, for layout=compact, {"layout": "compact", "compact": {...}}"""
+    if layout == COMPACT:
+        return {"layout": COMPACT, "compact": compact_items(infos)}
+    return {"items": file_items(infos)}
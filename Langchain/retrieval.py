@@ -0,0 +1,163 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+_WORD_RE = re.compile(r"[0-9A-Za-z가-힣]+")
+_HANGUL_RE = re.compile(r"^[가-힣]+$")
+_HANGUL_CHAR_RE = re.compile(r"[가-힣]")
+
+
+@dataclass
+class Chunk:
+    """문서 조각"""
+    path: str
+    index: int
+    start: int
+    text: str
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens plus Hangul character bigrams (particle-tolerant matching)"""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and _HANGUL_RE.match(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token estimate: ~1 token per Hangul syllable, ~4 chars per token otherwise"""
+    hangul = len(_HANGUL_CHAR_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 200) -> List[tuple]:
+    """Split text into overlapping (start, text) windows, preferring line/space boundaries"""
+    if not text:
+        return []
+    chunks = []
+    n = len(text)
+    start = 0
+    while start < n:
+        end = min(n, start + chunk_size)
+        if end < n:
+            cut = text.rfind("\n", start + chunk_size // 2, end)
+            if cut == -1:
+                cut = text.rfind(" ", start + chunk_size // 2, end)
+            if cut != -1:
+                end = cut + 1
+        piece = text[start:end].strip()
+        if piece:
+            chunks.append((start, piece))
+        if end >= n:
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class BM25Index:
+    """In-memory BM25 index over document chunks"""
+
+    def __init__(self, docs: Dict[str, str], chunk_size: int = 800, overlap: int = 200,
+                 k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.chunks: List[Chunk] = []
+        self._tfs: List[Counter] = []
+        self._lens: List[int] = []
+        df: Counter = Counter()
+        for path, text in docs.items():
+            for i, (start, piece) in enumerate(chunk_text(text, chunk_size, overlap)):
+                tf = Counter(tokenize(piece))
+                self.chunks.append(Chunk(path=path, index=i, start=start, text=piece))
+                self._tfs.append(tf)
+                self._lens.append(sum(tf.values()))
+                df.update(tf.keys())
+        n = len(self.chunks)
+        self._avg_len = (sum(self._lens) / n) if n else 0.0
+        self._idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    def search(self, query: str, top_k: Optional[int] = None) -> List[tuple]:
+        """Return (score, chunk) pairs sorted by descending score (score > 0 only)"""
+        q_terms = [t for t in dict.fromkeys(tokenize(query)) if t in self._idf]
+        if not q_terms:
+            return []
+        scored = []
+        avg = self._avg_len or 1.0
+        for chunk, tf, length in zip(self.chunks, self._tfs, self._lens):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / avg)
+            for t in q_terms:
+                f = tf.get(t)
+                if f:
+                    score += self._idf[t] * f * (self.k1 + 1) / (f + norm)
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda x: -x[0])
+        return scored[:top_k] if top_k else scored
+
+
+def pack_chunks(chunks: List[Chunk], token_budget: int) -> List[Chunk]:
+    """Greedily keep chunks (in given priority order) until the token budget is spent"""
+    packed: List[Chunk] = []
+    used = 0
+    for chunk in chunks:
+        cost = estimate_tokens(chunk.text)
+        if used + cost > token_budget:
+            continue
+        packed.append(chunk)
+        used += cost
+    if not packed and chunks:
+        # 예산이 조각 하나보다 작으면 최상위 조각을 잘라서라도 포함
+        top = chunks[0]
+        ratio = token_budget / max(1, estimate_tokens(top.text))
+        packed.append(Chunk(path=top.path, index=top.index, start=top.start,
+                            text=top.text[:max(1, int(len(top.text) * ratio))]))
+    return packed
+
+
+def select_chunks(index: BM25Index, question: str, token_budget: int = 3000,
+                  exclude: Optional[set] = None, fallback: bool = True, path: Optional[str] = None) -> List[Chunk]:
+    """Pick the best chunks for a question under the token budget
+
+    exclude skips (path, index) keys already used; path restricts selection to one document.
+    """
+    exclude = exclude or set()
+    ranked = [c for _, c in index.search(question)
+              if (c.path, c.index) not in exclude and (path is None or c.path == path)]
+    if not ranked and fallback:
+        # 일치하는 조각이 없으면(예: "요약해줘") 각 문서 앞부분부터 번갈아 채움
+        by_doc: Dict[str, List[Chunk]] = {}
+        for c in index.chunks:
+            if (c.path, c.index) not in exclude and (path is None or c.path == path):
+                by_doc.setdefault(c.path, []).append(c)
+        depth = max((len(v) for v in by_doc.values()), default=0)
+        ranked = [v[i] for i in range(depth) for v in by_doc.values() if i < len(v)]
+    return pack_chunks(ranked, token_budget) if ranked else []
+
+
+def format_chunks(index: BM25Index, chunks: List[Chunk]) -> str:
+    """Format chunks grouped by file, in document order"""
+    order = {}
+    for c in index.chunks:
+        order.setdefault(c.path, len(order))
+    selected = sorted(chunks, key=lambda c: (order.get(c.path, 0), c.index))
+
+    blocks: List[str] = []
+    current = None
+    for c in selected:
+        if c.path != current:
+            if blocks:
+                blocks.append("")
+            blocks.append(f"[FILE]{c.path}")
+            current = c.path
+        blocks.append(c.text)
+    return "\n".join(blocks)
+
+
+def build_context(index: BM25Index, question: str, token_budget: int = 3000) -> str:
+    """Select the best chunks for a question and format them grouped by file in document order"""
+    return format_chunks(index, select_chunks(index, question, token_budget))
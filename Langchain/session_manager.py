@@ -0,0 +1,465 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Langchain.InteractiveSearch import SearchSession
+from Langchain.index_snapshot import MappedIndex, file_lock, open_snapshot, publish_snapshot, read_manifest
+from Langchain.metrics import cache_event, span
+from Langchain.Searchtool import canonical_base_path, index_csv_path, summarize_index
+from Langchain.structured_indexing import FileInfo, StructuredIndex
+
+
+def _base_key(base_path: str) -> str:
+    return os.path.normcase(canonical_base_path(base_path))
+
+
+def _estimate_infos_bytes(infos: List[FileInfo], sample: int = 64) -> int:
+    """Approximate memory of a FileInfo list from a small sample"""
+    if not infos:
+        return 0
+    step = max(1, len(infos) // sample)
+    picked = infos[::step][:sample]
+    per_item = sum(
+        sys.getsizeof(fi) + sys.getsizeof(fi.__dict__) + sum(sys.getsizeof(v) for v in fi.__dict__.values())
+        for fi in picked
+    ) / len(picked)
+    return int(per_item * len(infos)) + sys.getsizeof(infos)
+
+
+class _Entry:
+    """Heavy per-folder state: one session, the shared file index and the embedding index"""
+
+    def __init__(self, base_path: str) -> None:
+        self.base_path = base_path
+        self.session: Optional[SearchSession] = None
+        self.infos: Optional[List[FileInfo]] = None
+        self.infos_stamp: Optional[float] = None
+        self.infos_bytes = 0
+        self.session_stamp: Optional[int] = None
+        self.embedding_index: Any = None
+        self.size_bytes = 0  # 마지막으로 잰 memory_bytes() (SessionManager 합계에 반영된 값)
+        self.last_used = time.monotonic()
+        self.lock = threading.RLock()
+
+    def memory_bytes(self) -> int:
+        total = self.infos_bytes
+        if self.session is not None:
+            total += sum(self.session.memory_usage().values())
+        emb = self.embedding_index
+        if emb is not None:
+            total += int(getattr(emb.matrix, "nbytes", 0)) + sum(sys.getsizeof(k) for k in emb.keys)
+        return total
+
+
+class SessionManager:
+    """
+    Bounded store of SearchSessions keyed by canonical base path.
+
+    Evicts idle entries after `idle_ttl_sec` and least recently used entries when there are
+    more than `max_sessions` or the estimated memory exceeds `memory_cap_bytes`. The file index
+    is loaded once per folder and shared by the session and the search endpoints; loaded
+    document texts of an evicted session are spilled to disk and restored on the next access.
+
+    With shared_index (multi-worker serving) the file index is published as a versioned,
+    memory-mapped snapshot written only by the process holding the folder's owner lock; other
+    workers remap it when the manifest version changes. Loaded documents are published to the
+    session file after each change so any worker can serve the next request.
+    """
+
+    def __init__(self, cache_dir: Path, session_factory: Optional[Callable[..., SearchSession]] = None,
+                 max_sessions: int = 8, idle_ttl_sec: float = 1800.0, memory_cap_bytes: int = 1024 * 1024 * 1024,
+                 spill_dir: Optional[Path] = None, shared_index: bool = False) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.session_factory = session_factory or SearchSession
+        self.max_sessions = max_sessions
+        self.idle_ttl_sec = idle_ttl_sec
+        self.memory_cap_bytes = memory_cap_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else self.cache_dir / "sessions"
+        self.shared_index = shared_index
+        self.snapshot_dir = self.cache_dir / "snapshots"
+        self.evictions = 0
+        self._total_bytes = 0
+        self._spilling: Dict[str, threading.Event] = {}
+        self._model: Optional[str] = None
+        self._model_stamp: Optional[int] = None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, cache_dir: Path, **kwargs: Any) -> "SessionManager":
+        return cls(
+            cache_dir,
+            max_sessions=int(os.environ.get("ODIN_MAX_SESSIONS", "8")),
+            idle_ttl_sec=float(os.environ.get("ODIN_SESSION_TTL_SEC", "1800")),
+            memory_cap_bytes=int(float(os.environ.get("ODIN_SESSION_MEMORY_MB", "1024")) * 1024 * 1024),
+            shared_index=os.environ.get("ODIN_SHARED_INDEX", "0") == "1",
+            **kwargs,
+        )
+
+    # ----- 항목 관리 -----
+    def _entry(self, base_path: str) -> _Entry:
+        key = _base_key(base_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(canonical_base_path(base_path))
+                self._entries[key] = entry
+            self._entries.move_to_end(key)
+            entry.last_used = time.monotonic()
+        return entry
+
+    def peek_session(self, base_path: str) -> Optional[SearchSession]:
+        """Return the live session without creating one (still counts as a use)"""
+        with self._lock:
+            entry = self._entries.get(_base_key(base_path))
+            if entry is None or entry.session is None:
+                return None
+            self._entries.move_to_end(_base_key(base_path))
+            entry.last_used = time.monotonic()
+        # 다른 워커가 문서 상태를 바꿨으면 get_session()에서 (작업 스레드로) 동기화
+        if self.shared_index and self._session_file_stamp(entry.base_path) != entry.session_stamp:
+            return None
+        return entry.session
+
+    def get_session(self, base_path: str, model_name: str) -> SearchSession:
+        entry = self._entry(base_path)
+        if entry.session is None:
+            with entry.lock:
+                if entry.session is None:
+                    infos = self._ensure_infos(entry)
+                    sess = self.session_factory(entry.base_path, model_name=model_name,
+                                                index_info=summarize_index(entry.base_path, infos))
+                    entry.session_stamp = self._session_file_stamp(entry.base_path)
+                    self._wait_spill(entry.base_path)
+                    spilled = self._read_spill(entry.base_path)
+                    if spilled:
+                        sess.restore_documents(spilled)
+                        print(f"[세션] 디스크에 보관된 문서 {len(sess.loaded_docs)}개 복원: {entry.base_path}")
+                    entry.session = sess
+            self.enforce_limits(keep=entry, measure=True)
+        elif self.shared_index:
+            self._sync_session(entry)
+        return entry.session
+
+    def sessions(self) -> List[SearchSession]:
+        with self._lock:
+            return [e.session for e in self._entries.values() if e.session is not None]
+
+    # ----- 공유 파일 인덱스 -----
+    def _ensure_infos(self, entry: _Entry) -> List[FileInfo]:
+        if self.shared_index:
+            return self._ensure_shared_infos(entry)
+        csv_path = index_csv_path(self.cache_dir, entry.base_path)
+        try:
+            stamp = os.path.getmtime(csv_path)
+        except OSError:
+            stamp = None
+        with entry.lock:
+            if entry.infos is not None and (stamp is None or stamp == entry.infos_stamp):
+                cache_event("file_index", True)
+                return entry.infos
+            cache_event("file_index", False)
+            indexer = StructuredIndex(entry.base_path)
+            if stamp is not None:
+                with span("index_load"):
+                    infos = indexer.load_from_csv(str(csv_path))
+            else:
+                with span("index_scan"):
+                    infos = indexer.build_index()
+                    indexer.save_to_csv(infos, str(csv_path))
+                stamp = os.path.getmtime(csv_path)
+            self._set_infos(entry, infos, stamp)
+            return infos
+
+    def _snapshot_name(self, base_path: str) -> str:
+        return index_csv_path(self.cache_dir, base_path).stem
+
+    def index_owner(self, base_path: str):
+        """Cross-process lock held while building/publishing a folder's index (no-op in single-process mode)"""
+        if not self.shared_index:
+            return nullcontext()
+        return file_lock(self.snapshot_dir / f"{self._snapshot_name(base_path)}.lock")
+
+    def _ensure_shared_infos(self, entry: _Entry) -> List[FileInfo]:
+        name = self._snapshot_name(entry.base_path)
+        manifest_path = self.snapshot_dir / f"{name}.json"
+        manifest = read_manifest(manifest_path)
+        if manifest is None:
+            # 아직 스냅샷이 없음: 소유 잠금을 잡은 프로세스 하나만 CSV를 읽거나 스캔해서 게시
+            # (잠금 순서는 항상 소유 잠금 -> entry.lock 이므로 여기서는 entry.lock을 잡지 않음)
+            with self.index_owner(entry.base_path):
+                manifest = read_manifest(manifest_path)
+                if manifest is None:
+                    indexer = StructuredIndex(entry.base_path)
+                    csv_path = index_csv_path(self.cache_dir, entry.base_path)
+                    if csv_path.exists():
+                        with span("index_load"):
+                            infos = indexer.load_from_csv(str(csv_path))
+                    else:
+                        with span("index_scan"):
+                            infos = indexer.build_index()
+                            indexer.save_to_csv(infos, str(csv_path))
+                    manifest = publish_snapshot(self.snapshot_dir, name, infos, entry.base_path)
+        with entry.lock:
+            if entry.infos is not None and entry.infos_stamp is not None and manifest["version"] <= entry.infos_stamp:
+                cache_event("file_index", True)
+                return entry.infos
+            cache_event("file_index", False)
+            with span("index_map"):
+                try:
+                    mapped = open_snapshot(self.snapshot_dir, manifest)
+                except FileNotFoundError:
+                    # 읽는 사이에 더 새 버전이 두 번 게시되어 이전 파일이 정리됨
+                    manifest = read_manifest(manifest_path)
+                    mapped = open_snapshot(self.snapshot_dir, manifest)
+            if entry.infos_stamp is not None:
+                print(f"[인덱스] 스냅샷 v{mapped.version} 적용 ({len(mapped)}개 항목): {entry.base_path}")
+            self._set_infos(entry, mapped, mapped.version)
+            return mapped
+
+    def _set_infos(self, entry: _Entry, infos: List[FileInfo], stamp: Optional[float]) -> None:
+        entry.infos = infos
+        entry.infos_stamp = stamp
+        # 매핑된 스냅샷은 프로세스 간 공유 페이지 캐시이므로 세션 메모리 상한에 포함하지 않음
+        entry.infos_bytes = 0 if isinstance(infos, MappedIndex) else _estimate_infos_bytes(infos)
+        if entry.session is not None:
+            entry.session.set_index_info(summarize_index(entry.base_path, infos))
+
+    def get_index_infos(self, base_path: str) -> List[FileInfo]:
+        """Shared FileInfo list for the folder (reloaded only when the index CSV changes)"""
+        entry = self._entry(base_path)
+        stamp = entry.infos_stamp
+        infos = self._ensure_infos(entry)
+        # 검색마다 불리므로 인덱스를 다시 읽은 경우에만 크기를 다시 잰다
+        self.enforce_limits(keep=entry, measure=entry.infos_stamp != stamp)
+        return infos
+
+    def set_index_infos(self, base_path: str, infos: List[FileInfo]) -> None:
+        """Publish a freshly built index (after /index) to the session and search endpoints
+
+        In shared mode this writes a new snapshot version; call it inside index_owner().
+        """
+        entry = self._entry(base_path)
+        if self.shared_index:
+            manifest = publish_snapshot(self.snapshot_dir, self._snapshot_name(entry.base_path), infos, entry.base_path)
+            mapped = open_snapshot(self.snapshot_dir, manifest)
+            with entry.lock:
+                self._set_infos(entry, mapped, mapped.version)
+            self.enforce_limits(keep=entry)
+            return
+        csv_path = index_csv_path(self.cache_dir, entry.base_path)
+        try:
+            stamp = os.path.getmtime(csv_path)
+        except OSError:
+            stamp = None
+        with entry.lock:
+            self._set_infos(entry, infos, stamp)
+        self.enforce_limits(keep=entry)
+
+    def get_embedding_index(self, base_path: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(_base_key(base_path))
+        return entry.embedding_index if entry is not None else None
+
+    def set_embedding_index(self, base_path: str, index: Any) -> None:
+        entry = self._entry(base_path)
+        entry.embedding_index = index
+        self.enforce_limits(keep=entry)
+
+    # ----- 모델 선택 (공유 모드에서는 워커 간 공유) -----
+    def _model_path(self) -> Path:
+        return self.snapshot_dir / "selected_model.json"
+
+    def select_model(self, model_name: str) -> None:
+        """Make model_name the model for every folder; in shared mode other workers pick it up per request"""
+        if self.shared_index:
+            path = self._model_path()
+            with file_lock(self.snapshot_dir / "selected_model.lock"):
+                tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"model": model_name}, f)
+                os.replace(tmp, path)
+        self._model = model_name
+        for sess in self.sessions():
+            if sess.model_name != model_name:
+                sess.set_model(model_name)
+
+    def current_model(self, default: str) -> str:
+        """Selected model (re-read from the shared file only when it changed)"""
+        if self.shared_index:
+            path = self._model_path()
+            try:
+                stamp = os.stat(path).st_mtime_ns
+            except OSError:
+                stamp = None
+            if stamp != self._model_stamp:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        self._model = json.load(f).get("model") or None
+                except (OSError, ValueError):
+                    pass
+                self._model_stamp = stamp
+        return self._model or default
+
+    # ----- 제거/보관 -----
+    def _spill_path(self, base_path: str) -> Path:
+        digest = hashlib.sha1(_base_key(base_path).encode("utf-8")).hexdigest()[:16]
+        return self.spill_dir / f"session_{digest}.json"
+
+    def _session_file_stamp(self, base_path: str) -> Optional[int]:
+        try:
+            return os.stat(self._spill_path(base_path)).st_mtime_ns
+        except OSError:
+            return None
+
+    def publish_session(self, base_path: str) -> None:
+        """Share this worker's loaded documents with the other workers (shared mode only)"""
+        if not self.shared_index:
+            return
+        with self._lock:
+            entry = self._entries.get(_base_key(base_path))
+        if entry is not None and entry.session is not None:
+            with entry.lock:
+                self._write_spill(entry, force=True)
+                entry.session_stamp = self._session_file_stamp(entry.base_path)
+
+    def update_usage(self, base_path: str) -> None:
+        """Re-measure the folder's session after its documents changed (e.g. /proceed) and apply the limits"""
+        with self._lock:
+            entry = self._entries.get(_base_key(base_path))
+        if entry is not None:
+            self.enforce_limits(keep=entry, measure=True)
+
+    def _sync_session(self, entry: _Entry) -> None:
+        stamp = self._session_file_stamp(entry.base_path)
+        if stamp == entry.session_stamp:
+            return
+        with entry.lock:
+            state = self._read_spill(entry.base_path)
+            entry.session_stamp = stamp
+            if state is not None and entry.session is not None:
+                entry.session.restore_documents(state)
+        if state is not None:
+            # 복원된 문서만큼 크기가 바뀌었으므로 다시 잰다
+            self.enforce_limits(keep=entry, measure=True)
+
+    def _write_spill(self, entry: _Entry, force: bool = False) -> None:
+        sess = entry.session
+        if sess is None or not (sess.loaded_docs or force):
+            return
+        try:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self._spill_path(entry.base_path)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"base_path": entry.base_path, **sess.export_documents()}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[세션] 문서 보관 실패 ({entry.base_path}): {e}")
+
+    def _read_spill(self, base_path: str) -> Optional[Dict[str, Any]]:
+        path = self._spill_path(base_path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not self.shared_index:
+            # 공유 모드에서는 다른 워커도 읽으므로 남겨 둠
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        return data
+
+    def _wait_spill(self, base_path: str) -> None:
+        """Block until an in-flight spill of this folder has been written"""
+        with self._lock:
+            done = self._spilling.get(_base_key(base_path))
+        if done is not None:
+            done.wait()
+
+    def _evict(self, key: str, reason: str) -> Optional[Tuple[_Entry, str]]:
+        """Unlink the entry (caller holds _lock); the spill is written later by _finish_evict()"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self.evictions += 1
+        self._total_bytes -= entry.size_bytes
+        # 공유 모드의 세션 파일은 /proceed 때마다 게시되는 워커 간 공유 상태이므로 제거 시 덮어쓰지 않음
+        # (오래된 문서로 다른 워커가 나중에 게시한 상태를 되돌리게 됨)
+        if not self.shared_index and entry.session is not None:
+            self._spilling.setdefault(key, threading.Event())
+        return entry, reason
+
+    def _finish_evict(self, entry: _Entry, reason: str) -> None:
+        key = _base_key(entry.base_path)
+        if not self.shared_index:
+            try:
+                with entry.lock:
+                    self._write_spill(entry)
+            finally:
+                with self._lock:
+                    done = self._spilling.pop(key, None)
+                if done is not None:
+                    done.set()
+        print(f"[세션] 제거 ({reason}): {entry.base_path}")
+
+    def enforce_limits(self, keep: Optional[_Entry] = None, measure: bool = True) -> None:
+        """Drop idle entries, then LRU entries while over the session count or memory cap
+
+        Sizes are tracked incrementally: only ``keep`` is re-measured, and spill files are
+        written after the global lock is released.
+        """
+        size = keep.memory_bytes() if keep is not None and measure else None
+        now = time.monotonic()
+        evicted: List[Tuple[_Entry, str]] = []
+        with self._lock:
+            if size is not None and self._entries.get(_base_key(keep.base_path)) is keep:
+                self._total_bytes += size - keep.size_bytes
+                keep.size_bytes = size
+
+            for key, entry in list(self._entries.items()):
+                if entry is not keep and now - entry.last_used > self.idle_ttl_sec:
+                    evicted.append(self._evict(key, "유휴 시간 초과"))
+
+            live = sum(1 for e in self._entries.values() if e.session is not None)
+            for key in list(self._entries.keys()):
+                if self._total_bytes <= self.memory_cap_bytes and live <= self.max_sessions:
+                    break
+                entry = self._entries[key]
+                if entry is keep:
+                    continue
+                reason = "메모리 상한" if self._total_bytes > self.memory_cap_bytes else "세션 수 상한"
+                if entry.session is not None:
+                    live -= 1
+                evicted.append(self._evict(key, reason))
+
+        for entry, reason in filter(None, evicted):
+            self._finish_evict(entry, reason)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._entries.values())
+        per_base = [{"base_path": e.base_path, "bytes": e.memory_bytes(), "has_session": e.session is not None,
+                     "index_entries": len(e.infos) if e.infos is not None else 0,
+                     "index_version": e.infos_stamp if self.shared_index else None,
+                     "mapped_bytes": e.infos.nbytes if isinstance(e.infos, MappedIndex) else 0,
+                     "embedding_rows": len(e.embedding_index) if e.embedding_index is not None else 0,
+                     "idle_sec": round(time.monotonic() - e.last_used, 1)} for e in entries]
+        return {
+            "sessions": sum(1 for e in entries if e.session is not None),
+            "entries": len(entries),
+            "memory_bytes": sum(p["bytes"] for p in per_base),
+            "memory_cap_bytes": self.memory_cap_bytes,
+            "max_sessions": self.max_sessions,
+            "evictions": self.evictions,
+            "bases": per_base,
+        }
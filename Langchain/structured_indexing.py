@@ -6,7 +6,7 @@ import json
 import csv
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Tuple, Optional
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -24,6 +24,9 @@ class FileInfo:
     is_parseable: bool
     depth_level: int
 
+class IndexCancelled(Exception):
+    """인덱싱 도중 취소 요청을 받음"""
+
 class StructuredIndex:
     """구조화된 파일 인덱스"""
     
@@ -36,9 +39,23 @@ class StructuredIndex:
             'program files', 'program files (x86)', 'programdata', 'msocache', 'perflogs', 'recovery',
             'documents and settings'
         }
+        # 백그라운드 작업용: 진행률 콜백(누적 처리 항목 수)과 취소 이벤트(threading.Event)
+        self.progress_callback: Optional[Callable[[int], None]] = None
+        self.cancel_event = None
+        self.scanned = 0
+
+    def _tick(self) -> None:
+        """Count one visited entry; report progress and honour cancellation every 256 entries"""
+        self.scanned += 1
+        if self.scanned % 256 == 0:
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise IndexCancelled(str(self.base_path))
+            if self.progress_callback is not None:
+                self.progress_callback(self.scanned)
         
     def _get_file_info(self, path: Path, depth: int) -> Optional[FileInfo]:
         """개별 파일/폴더의 메타데이터 추출"""
+        self._tick()
         try:
             stat = path.stat()
             is_dir = path.is_dir()
@@ -227,6 +244,7 @@ class StructuredIndex:
                         if not any(item.name.lower().startswith(exc) for exc in self.exclude_dirs):
                             _scan_files(item)
                     else:
+                        self._tick()
                         try:
                             stat = item.stat()
                             modified_time = datetime.fromtimestamp(stat.st_mtime).isoformat()
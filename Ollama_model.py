@@ -1,8 +1,50 @@
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
 from langchain_ollama import OllamaLLM as Ollama # <-- 이렇게 수정합니다.
 
-def get_ollama_llm(model_name: str = "llama3:8b") -> Ollama:
+DEFAULT_MODEL = "llama3:8b"
+# 마지막 요청 후 모델을 메모리에 유지할 시간 (Ollama keep_alive 형식, 예: "30m", "-1")
+KEEP_ALIVE = os.environ.get("ODIN_OLLAMA_KEEP_ALIVE", "30m")
+
+_LLM_POOL: Dict[Tuple[str, str], Ollama] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_ollama_llm(model_name: str = DEFAULT_MODEL, keep_alive: Optional[str] = None) -> Ollama:
     """
-    지정된 모델 이름으로 Ollama LLM 인스턴스를 생성하고 반환합니다.
+    지정된 모델 이름의 Ollama LLM 인스턴스를 반환합니다.
+    프로세스 전체에서 (모델, keep_alive) 조합별로 하나의 클라이언트를 공유하여 HTTP 연결을 재사용합니다.
     """
-    print(f"Ollama 모델 '{model_name}'을 로드합니다.")
-    return Ollama(model=model_name)
\ No newline at end of file
+    key = (model_name, keep_alive or KEEP_ALIVE)
+    llm = _LLM_POOL.get(key)
+    if llm is not None:
+        return llm
+    with _POOL_LOCK:
+        llm = _LLM_POOL.get(key)
+        if llm is None:
+            print(f"Ollama 모델 '{model_name}'을 로드합니다.")
+            llm = Ollama(model=model_name, keep_alive=key[1])
+            _LLM_POOL[key] = llm
+    return llm
+
+
+def warm_up(model_name: str = DEFAULT_MODEL, background: bool = True) -> None:
+    """
+    빈 프롬프트로 generate를 호출해 모델을 메모리에 미리 올립니다 (토큰 생성 없음).
+    Ollama가 없거나 모델이 없으면 조용히 무시합니다.
+    """
+    def _run():
+        try:
+            import ollama
+            ollama.Client().generate(model=model_name, prompt="", keep_alive=KEEP_ALIVE)
+            print(f"Ollama 모델 '{model_name}' 워밍업 완료")
+        except Exception:
+            pass
+
+    get_ollama_llm(model_name)
+    if background:
+        threading.Thread(target=_run, name=f"ollama-warmup-{model_name}", daemon=True).start()
+    else:
+        _run()
@@ -1,13 +1,22 @@
 import os
 import sys
+import asyncio
+import contextvars
+import functools
+import multiprocessing
 import uvicorn
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from concurrent.futures import Executor, ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 import subprocess
+import threading
 import time
+import json
 
 if sys.platform == "win32":
     os.environ['PYTHONIOENCODING'] = 'utf-8'
@@ -28,8 +37,22 @@ _PROJECT_ROOT = str(_Path(__file__).resolve().parent.parent)
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
+from Ollama_model import DEFAULT_MODEL, warm_up
 from Langchain.structured_indexing import StructuredIndex, FileInfo
 from Langchain.InteractiveSearch import SearchSession
+from Langchain.embedding_index import EmbeddingIndex, embedding_index_path, get_embedder, update_embedding_index
+from Langchain.session_manager import SessionManager, canonical_base_path, index_csv_path
+from Langchain.index_jobs import IndexJob, JobManager
+from Langchain.index_snapshot import path_lookup, select_by_paths
+from Langchain.metadata_filters import MetadataFilter, iso_to_epoch
+from Langchain.response_encoding import COMPACT, FULL, dumps_json, encode, items_payload, negotiate, search_payload
+from Langchain.structured_indexing import IndexCancelled
+from Langchain.llm_cache import get_prompt_cache
+from Langchain.ollama_registry import ModelRegistry
+from Langchain.metrics import (Gauge, Histogram, begin_request_spans, end_request_spans,
+                               format_server_timing, register, render_prometheus, span)
+from Langchain.profiling import CProfileSession, MemoryTracker, SamplingProfiler, profiling_enabled, run_profiled
+from parsers.registry import is_supported
 
 app = FastAPI(title="Odin Backend API", version="0.1.0")
 app.add_middleware(
@@ -40,8 +63,99 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-_SESSIONS: Dict[str, SearchSession] = {}
 _STARTED_AT = time.time()
+# Ollama 상태/모델 목록 캐시 (HTTP API, 짧은 TTL + 백그라운드 갱신)
+_OLLAMA_REGISTRY = ModelRegistry.from_env()
+
+HTTP_REQUEST_SECONDS = register(Histogram(
+    "odin_http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]))
+# 모든 응답에 Server-Timing 헤더 추가 (꺼져 있어도 요청 헤더 x-server-timing: 1 이면 추가)
+_SERVER_TIMING_ALWAYS = os.environ.get("ODIN_SERVER_TIMING", "0") == "1"
+
+
+class TimingMiddleware:
+    """Pure ASGI middleware: per-route latency histogram + Server-Timing header with stage spans.
+
+    Written as raw ASGI (not BaseHTTPMiddleware) so streaming responses are not buffered.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        spans, token = begin_request_spans()
+        want_header = _SERVER_TIMING_ALWAYS or any(
+            k == b"x-server-timing" and v not in (b"0", b"") for k, v in scope.get("headers") or [])
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if want_header:
+                    value = format_server_timing(spans, time.perf_counter() - started)
+                    headers = list(message.get("headers") or [])
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    headers.append((b"timing-allow-origin", b"*"))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end_request_spans(token)
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope.get("method", ""),
+                route=getattr(route, "path", "unmatched"), status=str(status["code"]))
+
+
+app.add_middleware(TimingMiddleware)
+
+# 느린 작업이 빠른 요청을 막지 않도록 작업 종류별로 분리한 제한 스레드 풀
+# (LLM 호출은 비동기 클라이언트를 사용하므로 스레드를 점유하지 않음)
+_INDEX_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ODIN_INDEX_WORKERS", "2")), thread_name_prefix="odin-index")
+_PARSE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("ODIN_PARSE_WORKERS", str(min(4, os.cpu_count() or 1)))), thread_name_prefix="odin-parse")
+
+# 요청 종류별 제한 시간(초). 초과 시 504 응답
+REQUEST_TIMEOUTS: Dict[str, float] = {
+    "fast": float(os.environ.get("ODIN_FAST_TIMEOUT_SEC", "5")),
+    "search": float(os.environ.get("ODIN_SEARCH_TIMEOUT_SEC", "60")),
+    "index": float(os.environ.get("ODIN_INDEX_TIMEOUT_SEC", "1800")),
+    "parse": float(os.environ.get("ODIN_PARSE_TIMEOUT_SEC", "300")),
+    "qa": float(os.environ.get("ODIN_QA_TIMEOUT_SEC", "600")),
+}
+
+async def _with_timeout(awaitable, kind: str):
+    """Await with the request-level timeout for `kind`; raises HTTP 504 when exceeded"""
+    timeout = REQUEST_TIMEOUTS[kind]
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"요청 시간 초과 ({kind}, {timeout:g}s)")
+
+async def _run_blocking(executor: Optional[Executor], kind: str, func, *args, **kwargs):
+    """Run blocking func in the given executor (None = default pool) under the request timeout.
+
+    On timeout the worker thread still finishes in the background; the bounded pools keep
+    such stragglers from starving other request kinds.
+    """
+    loop = asyncio.get_running_loop()
+    # 컨텍스트를 복사해 작업 스레드에서 기록한 단계 시간도 이 요청의 Server-Timing에 포함
+    ctx = contextvars.copy_context()
+    future = loop.run_in_executor(executor, functools.partial(ctx.run, run_profiled, func, *args, **kwargs))
+    return await _with_timeout(future, kind)
+
+@app.on_event("startup")
+def _warm_up_default_model():
+    # 첫 요청이 모델 로드 시간을 기다리지 않도록 백그라운드에서 미리 로드
+    warm_up(_current_model())
+    _OLLAMA_REGISTRY.prime()
 
 def get_cache_dir():
     """Get cache directory path based on execution location"""
@@ -56,8 +170,47 @@ def get_cache_dir():
     cache_dir.mkdir(exist_ok=True)
     return cache_dir
 
+# 폴더별 세션/파일 인덱스/임베딩 인덱스 (LRU·유휴 시간·메모리 상한으로 제한)
+_SESSION_MANAGER = SessionManager.from_env(get_cache_dir())
+# 인덱스 생성/갱신 백그라운드 작업 (중복 제거, 장치별 동시 스캔 제한)
+_JOB_MANAGER = JobManager.from_env()
+
+def _job_samples():
+    counts: Dict[str, int] = {}
+    for job in _JOB_MANAGER.list():
+        counts[job.status] = counts.get(job.status, 0) + 1
+    return [((status,), n) for status, n in sorted(counts.items())]
+
+# /metrics 수집 시점에 값을 읽는 게이지
+for _gauge in (
+    Gauge("odin_uptime_seconds", "Seconds since the backend started",
+          callback=lambda: [((), time.time() - _STARTED_AT)]),
+    Gauge("odin_sessions", "Live search sessions",
+          callback=lambda: [((), _SESSION_MANAGER.stats()["sessions"])]),
+    Gauge("odin_session_memory_bytes", "Estimated memory held by session state",
+          callback=lambda: [((), _SESSION_MANAGER.stats()["memory_bytes"])]),
+    Gauge("odin_session_memory_cap_bytes", "Configured session memory cap",
+          callback=lambda: [((), _SESSION_MANAGER.memory_cap_bytes)]),
+    Gauge("odin_session_evictions", "Sessions evicted since start (LRU, idle TTL or memory cap)",
+          callback=lambda: [((), _SESSION_MANAGER.evictions)]),
+    Gauge("odin_index_entries", "File index entries loaded per folder", ["base_path"],
+          callback=lambda: [((b["base_path"],), b["index_entries"]) for b in _SESSION_MANAGER.stats()["bases"]]),
+    Gauge("odin_embedding_rows", "Embedding index rows loaded per folder", ["base_path"],
+          callback=lambda: [((b["base_path"],), b["embedding_rows"]) for b in _SESSION_MANAGER.stats()["bases"]]),
+    Gauge("odin_index_jobs", "Index jobs by status (recent history)", ["status"], callback=_job_samples),
+    Gauge("odin_prompt_cache_entries", "Entries in the persistent LLM prompt cache",
+          callback=lambda: [((), len(get_prompt_cache()))]),
+):
+    register(_gauge)
+
 class IndexRequest(BaseModel):
     base_path: str
+    semantic: bool = False
+
+class JobRequest(BaseModel):
+    base_path: str
+    kind: str = "index"  # "index": 증분 갱신(인덱스가 없으면 전체 스캔), "rebuild": 전체 재스캔
+    semantic: bool = False
 
 class IndexResponse(BaseModel):
     count: int
@@ -72,6 +225,13 @@ class SearchRequest(BaseModel):
     base_path: str
     query: str
     allowed_exts: Optional[List[str]] = None
+    # 질의 문장의 기간/크기 표현과 함께 적용되는 구조화 조건 (ISO 날짜/시각, 바이트)
+    modified_after: Optional[str] = None   # 포함
+    modified_before: Optional[str] = None  # 미포함
+    created_after: Optional[str] = None
+    created_before: Optional[str] = None
+    min_size: Optional[int] = None         # 포함
+    max_size: Optional[int] = None         # 포함
 
 class FileInfoDTO(BaseModel):
     path: str
@@ -87,8 +247,22 @@ class SearchResponse(BaseModel):
     expanded_keywords: List[str]
     extensions: List[str]
     years: List[int]
+    filters: Optional[Dict] = None
     items: List[FileInfoDTO]
 
+class BatchSearchRequest(BaseModel):
+    base_path: str
+    queries: List[str]
+    allowed_exts: Optional[List[str]] = None
+    use_llm: bool = False  # True: 질의마다 키워드 추출(빠른 경로/LLM)을 병렬로 수행, False: 규칙 기반 키워드
+    limit: int = 200
+
+class SemanticSearchRequest(BaseModel):
+    base_path: str
+    query: str
+    top_k: int = 50
+    allowed_exts: Optional[List[str]] = None
+
 class RefineRequest(BaseModel):
     base_path: str
     keywords: List[str]
@@ -101,84 +275,131 @@ class ProceedRequest(BaseModel):
 class QARequest(BaseModel):
     base_path: str
     question: str
+    mode: Optional[str] = None  # "map_reduce": 문서별 병렬 추출 후 종합
 
 class QAResponse(BaseModel):
     answer: str
 
+def _current_model() -> str:
+    # 여러 워커로 실행 중이면 /ollama/select 결과를 공유 파일에서 읽어 모든 워커가 같은 모델을 사용
+    return _SESSION_MANAGER.current_model(DEFAULT_MODEL)
+
 def _get_session(base_path: str) -> SearchSession:
-    sess = _SESSIONS.get(base_path)
-    if not sess:
-        sess = SearchSession(base_path)
-        _SESSIONS[base_path] = sess
-    return sess
-
-def _load_parser_registry() -> Dict[str, str]:
-    import importlib
-    mapping = [
-        ("parsers.Parser_txt", "parse_txt", [".txt", ".md"]),
-        ("parsers.Parser_word", "parse_word", [".docx"]),
-        ("parsers.Parser_pdf", "parse_pdf", [".pdf"]),
-        ("parsers.Parser_excel", "parse_excel", [".xlsx", ".xls"]),
-        ("parsers.Parser_csv", "parse_csv", [".csv"]),
-        ("parsers.Parser_pptx", "parse_pptx", [".pptx"]),
-        ("parsers.Parser_hwp", "parse_hwp", [".hwp"]),
-    ]
-    reg: Dict[str, str] = {}
-    for mod_name, func_name, exts in mapping:
-        try:
-            mod = importlib.import_module(mod_name)
-            func = getattr(mod, func_name)
-            for ext in exts:
-                reg[ext] = func.__name__
-        except Exception:
-            continue
-    return reg
+    return _SESSION_MANAGER.get_session(base_path, _current_model())
+
+async def _aget_session(base_path: str) -> SearchSession:
+    """Existing sessions are returned directly; creating one (index load) runs in the index pool"""
+    sess = _SESSION_MANAGER.peek_session(base_path)
+    if sess:
+        model = _current_model()
+        if sess.model_name != model:
+            sess.set_model(model)
+        return sess
+    return await _run_blocking(_INDEX_EXECUTOR, "index", _get_session, base_path)
+
+async def _ollama_status(key: str) -> Dict:
+    """Cached Ollama probe; only the very first call waits for Ollama (in the default pool)"""
+    cached = _OLLAMA_REGISTRY.peek(key)
+    if cached is not None:
+        return cached
+    return await _run_blocking(None, "fast", _OLLAMA_REGISTRY.get, key)
 
 @app.get("/health")
-def api_health():
+async def api_health():
     """Health check endpoint"""
-    ollama_available = False
     try:
-        subprocess.run(["ollama", "list"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=1, check=False)
-        ollama_available = True
-    except Exception:
-        ollama_available = False
+        ollama = await _ollama_status("health")
+    except HTTPException:
+        ollama = {"available": False, "source": "none"}
 
+    stats = _SESSION_MANAGER.stats()
     return {
         "ok": True,
         "status": "ready",
         "uptime_sec": round(time.time() - _STARTED_AT, 2),
+        "worker": {"pid": os.getpid(), "shared_index": _SESSION_MANAGER.shared_index},
         "ollama": {
-            "available": ollama_available
-        }
+            "available": bool(ollama.get("available")),
+            "version": ollama.get("version"),
+            "source": ollama.get("source"),
+            "checked_at": ollama.get("checked_at"),
+        },
+        "sessions": {
+            "count": stats["sessions"],
+            "memory_mb": round(stats["memory_bytes"] / (1024 * 1024), 1),
+            "memory_cap_mb": round(stats["memory_cap_bytes"] / (1024 * 1024), 1),
+            "evictions": stats["evictions"],
+        },
     }
 
+@app.get("/metrics")
+async def api_metrics():
+    """Prometheus text format: stage/route latency histograms, cache hit counters, session gauges"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.post("/index", response_model=IndexResponse)
-def api_index(req: IndexRequest):
-    base = req.base_path
-    if not os.path.isdir(base):
+async def api_index(req: IndexRequest):
+    # 같은 폴더에 대한 동시 요청은 하나의 작업을 함께 기다림
+    job, _ = _submit_index_job(req.base_path, "index", req.semantic)
+    try:
+        # shield: 이 요청이 시간 초과되어도 작업(및 같은 작업을 기다리는 다른 요청)은 계속 진행
+        resp = await _with_timeout(asyncio.shield(asyncio.wrap_future(job.future)), "index")
+    except IndexCancelled:
+        raise HTTPException(status_code=409, detail=f"인덱싱 작업이 취소되었습니다 (job {job.id})")
+    await _aget_session(req.base_path)
+    return resp
+
+def _submit_index_job(base_path: str, kind: str, semantic: bool):
+    if not os.path.isdir(base_path):
         raise ValueError("Invalid base_path")
+    if kind not in ("index", "rebuild"):
+        raise HTTPException(status_code=400, detail=f"알 수 없는 작업 종류: {kind}")
+
+    def work(job: IndexJob) -> IndexResponse:
+        return _build_index(IndexRequest(base_path=job.base_path, semantic=semantic), job=job, full=(kind == "rebuild"))
+
+    return _JOB_MANAGER.submit(kind, base_path, {"semantic": semantic}, work)
+
+def _build_index(req: IndexRequest, job: Optional[IndexJob] = None, full: bool = False) -> IndexResponse:
+    if not os.path.isdir(req.base_path):
+        raise ValueError("Invalid base_path")
+    base = canonical_base_path(req.base_path)
 
     indexer = StructuredIndex(base)
-    from pathlib import Path
+    if job is not None:
+        indexer.progress_callback = job.report
+        indexer.cancel_event = job.cancel_event
     cache_dir = get_cache_dir()
-    safe_path = str(Path(base)).replace(':', '').replace('\\', '_').replace('/', '_')
-    csv_path = cache_dir / f"structured_index_{safe_path}.csv"
-
-    if csv_path.exists():
-        existing_infos = indexer.load_from_csv(str(csv_path))
-        infos = indexer.update_index_incremental(existing_infos)
-        if infos != existing_infos:
+    csv_path = index_csv_path(cache_dir, base)
+    safe_path = csv_path.stem[len("structured_index_"):]
+
+    # 취소되면 스캔 도중 IndexCancelled가 발생하고 CSV는 쓰지 않음
+    # 여러 워커로 실행 중이면 폴더별 소유 잠금을 잡은 프로세스 하나만 갱신하고 새 스냅샷 버전을 게시
+    with _SESSION_MANAGER.index_owner(base), span("index_build"):
+        if csv_path.exists() and not full:
+            existing_infos = indexer.load_from_csv(str(csv_path))
+            if job is not None:
+                job.report(0, "scanning", total_estimate=len(existing_infos))
+            infos = indexer.update_index_incremental(existing_infos)
+            if infos != existing_infos:
+                indexer.save_to_csv(infos, str(csv_path))
+        else:
+            infos = indexer.build_index()
             indexer.save_to_csv(infos, str(csv_path))
-    else:
-        infos = indexer.build_index()
-        indexer.save_to_csv(infos, str(csv_path))
+        _SESSION_MANAGER.set_index_infos(base, infos)
+    if job is not None:
+        # 임베딩 단계는 디스크를 스캔하지 않으므로 같은 장치의 다음 스캔이 시작되도록 장치 슬롯을 반환
+        job.end_scan()
+    if req.semantic:
+        if job is not None:
+            job.report(indexer.scanned, "embedding")
+        _SESSION_MANAGER.set_embedding_index(base, update_embedding_index(base, infos, cache_dir, safe_path))
+    if job is not None:
+        job.report(indexer.scanned)
 
     exts = sorted({fi.extension for fi in infos if not fi.is_directory and fi.extension})
-    parser_reg = _load_parser_registry()
-    ai_exts = sorted([e for e in exts if e in parser_reg and e != '.hwp'])
+    ai_exts = sorted([e for e in exts if is_supported(e)])
 
-    _get_session(base)
     return IndexResponse(
         count=len(infos),
         extensions=exts,
@@ -189,149 +410,364 @@ def api_index(req: IndexRequest):
         safe_path=safe_path,
     )
 
+@app.post("/jobs")
+async def api_jobs_submit(req: JobRequest):
+    job, deduplicated = _submit_index_job(req.base_path, req.kind, req.semantic)
+    return {**job.to_dict(), "deduplicated": deduplicated}
+
+@app.get("/jobs")
+async def api_jobs_list():
+    return {"jobs": [j.to_dict() for j in reversed(_JOB_MANAGER.list())]}
+
+@app.get("/jobs/{job_id}")
+async def api_jobs_get(job_id: str):
+    job = _JOB_MANAGER.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
+
+@app.delete("/jobs/{job_id}")
+async def api_jobs_cancel(job_id: str):
+    job = _JOB_MANAGER.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job.to_dict()
+
+def _load_index_infos(base_path: str) -> List[FileInfo]:
+    # 세션과 같은 FileInfo 목록을 공유 (CSV가 바뀔 때만 다시 로드)
+    return _SESSION_MANAGER.get_index_infos(base_path)
+
+def _to_search_response(keywords: List[str], search_info: Dict, results: List[FileInfo],
+                        allowed_exts: Optional[List[str]], layout: str = FULL) -> Dict:
+    with span("filter"):
+        return search_payload(keywords, search_info['expanded_keywords'], search_info['extensions'],
+                              search_info['years'], _filter_exts(results, allowed_exts), layout,
+                              filters=search_info.get('filters'))
+
+def _request_filter(req: SearchRequest) -> Optional[MetadataFilter]:
+    """MetadataFilter from the structured date/size fields of a search request (400 on bad values)"""
+    def bound(name: str, value: Optional[str], default: float) -> float:
+        if value is None:
+            return default
+        epoch = iso_to_epoch(value)
+        if epoch != epoch:  # NaN
+            raise HTTPException(status_code=400, detail=f"{name}: ISO 날짜/시각 형식이 아닙니다 ({value})")
+        return epoch
+
+    flt = MetadataFilter()
+    for column, after, before, prefix in (("mtime", req.modified_after, req.modified_before, "modified"),
+                                          ("ctime", req.created_after, req.created_before, "created")):
+        if after is not None or before is not None:
+            lo = bound(f"{prefix}_after", after, float("-inf"))
+            hi = bound(f"{prefix}_before", before, float("inf"))
+            flt.add(column, [(f"{prefix}: {after or ''}~{before or ''}", lo, hi)])
+    if req.min_size is not None or req.max_size is not None:
+        lo = float(req.min_size) if req.min_size is not None else float("-inf")
+        # 크기는 정수 바이트이므로 +1로 max_size까지 포함
+        hi = float(req.max_size) + 1 if req.max_size is not None else float("inf")
+        label = f"size: {'' if req.min_size is None else req.min_size}~{'' if req.max_size is None else req.max_size}"
+        flt.add("size", [(label, lo, hi)])
+    return flt or None
+
+def _filter_exts(infos: List[FileInfo], allowed_exts: Optional[List[str]]) -> List[FileInfo]:
+    allowed = set(allowed_exts or [])
+    if not allowed:
+        return infos
+    return [i for i in infos if (not i.is_directory and i.extension in allowed)]
+
+def _check_layout(layout: str) -> str:
+    if layout not in (FULL, COMPACT):
+        raise HTTPException(status_code=400, detail=f"알 수 없는 layout: {layout} (full 또는 compact)")
+    return layout
+
+def _encoded_response(request: Request, payload: Dict) -> Response:
+    """Serialize a SearchResponse-shaped dict directly (orjson, or msgpack when the Accept header asks for it)
+
+    Returning a Response skips FastAPI's per-item response_model validation; the declared
+    response_model still documents the full layout.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    with span("serialize"):
+        body = encode(payload, media_type)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
 @app.post("/search", response_model=SearchResponse)
-def api_search(req: SearchRequest):
-    sess = _get_session(req.base_path)
-    keywords = sess.extract_keywords(req.query)
+async def api_search(request: Request, req: SearchRequest, layout: str = FULL):
+    payload = await _with_timeout(_search(req, _check_layout(layout)), "search")
+    return _encoded_response(request, payload)
 
+async def _search(req: SearchRequest, layout: str = FULL) -> Dict:
     from Langchain.Searchtool import advanced_search_pipeline
 
-    indexer = StructuredIndex(req.base_path)
-    from pathlib import Path
-    cache_dir = get_cache_dir()
-    safe_path = str(Path(req.base_path)).replace(':', '').replace('\\', '_').replace('/', '_')
-    csv_path = cache_dir / f"structured_index_{safe_path}.csv"
-    if csv_path.exists():
-        infos = indexer.load_from_csv(str(csv_path))
+    metadata_filter = _request_filter(req)
+    sess = await _aget_session(req.base_path)
+    # 키워드 추출(LLM)과 인덱스 로드(디스크)를 동시에 진행
+    keywords, infos = await asyncio.gather(
+        sess.aextract_keywords(req.query),
+        _run_blocking(_INDEX_EXECUTOR, "search", _load_index_infos, req.base_path),
+    )
+    search_info = await _run_blocking(
+        _PARSE_EXECUTOR, "search", advanced_search_pipeline, req.query, infos, limit=200, llm_keywords=keywords,
+        metadata_filter=metadata_filter)
+    return _to_search_response(keywords, search_info, search_info['results'], req.allowed_exts, layout)
+
+# 한 요청에 담을 수 있는 최대 질의 수
+_BATCH_MAX_QUERIES = int(os.environ.get("ODIN_BATCH_MAX_QUERIES", "64"))
+
+@app.post("/search/batch")
+async def api_search_batch(request: Request, req: BatchSearchRequest, layout: str = FULL):
+    """Many queries against one index snapshot with one candidate pass; per-query results plus union/intersection"""
+    if not req.queries:
+        raise HTTPException(status_code=400, detail="queries가 비어 있습니다")
+    if len(req.queries) > _BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=400, detail=f"질의는 최대 {_BATCH_MAX_QUERIES}개까지 가능합니다")
+    payload = await _with_timeout(_search_batch(req, _check_layout(layout)), "search")
+    return _encoded_response(request, payload)
+
+async def _search_batch(req: BatchSearchRequest, layout: str = FULL) -> Dict:
+    from Langchain.Searchtool import batch_search, extract_meaningful_keywords
+
+    sess = await _aget_session(req.base_path)
+    load = _run_blocking(_INDEX_EXECUTOR, "search", _load_index_infos, req.base_path)
+    if req.use_llm:
+        keywords, infos = await asyncio.gather(
+            asyncio.gather(*(sess.aextract_keywords(q) for q in req.queries)), load)
+        keywords = list(keywords)
     else:
-        infos = indexer.build_index()
-        indexer.save_to_csv(infos, str(csv_path))
+        keywords, infos = [extract_meaningful_keywords(q) for q in req.queries], await load
+    limit = max(1, req.limit)
+    batch = await _run_blocking(_PARSE_EXECUTOR, "search", batch_search, req.queries, infos, limit,
+                                keywords if req.use_llm else None)
+
+    queries = []
+    for query, kws, info in zip(req.queries, keywords, batch['queries']):
+        payload = _to_search_response(kws, info, info['results'], req.allowed_exts, layout)
+        queries.append({"query": query, "total_matches": info['total_matches'], **payload})
+    return {
+        "queries": queries,
+        "union": items_payload(_filter_exts(batch['union'], req.allowed_exts), layout),
+        "intersection": items_payload(_filter_exts(batch['intersection'], req.allowed_exts), layout),
+    }
 
-    search_info = advanced_search_pipeline(req.query, infos, limit=200, llm_keywords=keywords)
-    merged = search_info['results']
+@app.post("/search/stream")
+async def api_search_stream(request: Request, req: SearchRequest, layout: str = FULL):
+    """Speculative search: stream rule-based results first, then the LLM-keyword results"""
+    from Langchain.Searchtool import advanced_search_pipeline, extract_meaningful_keywords, merge_search_results
 
+    _check_layout(layout)
+    metadata_filter = _request_filter(req)
+    sess = await _aget_session(req.base_path)
+
+    async def gen():
+        # LLM 키워드 추출은 즉시 시작하고, 기다리는 동안 규칙 기반 키워드로 먼저 검색
+        kw_task = asyncio.ensure_future(sess.aextract_keywords(req.query))
+        try:
+            infos = await _run_blocking(_INDEX_EXECUTOR, "search", _load_index_infos, req.base_path)
+            match_cache: Dict[str, list] = {}
+            rule_keywords = extract_meaningful_keywords(req.query)
+            provisional = await _run_blocking(
+                _PARSE_EXECUTOR, "search", advanced_search_pipeline, req.query, infos, 200, None, match_cache,
+                metadata_filter)
+            resp = _to_search_response(rule_keywords, provisional, provisional['results'], req.allowed_exts, layout)
+            yield _sse_format(dumps_json(resp).decode("utf-8"), event="provisional")
+
+            if await request.is_disconnected():
+                kw_task.cancel()
+                return
+            keywords = await _with_timeout(kw_task, "search")
+            final = await _run_blocking(
+                _PARSE_EXECUTOR, "search", advanced_search_pipeline, req.query, infos, 200, keywords, match_cache,
+                metadata_filter)
+            results = merge_search_results(final['results'], provisional['results'], limit=200)
+            resp = _to_search_response(keywords, final, results, req.allowed_exts, layout)
+            yield _sse_format(dumps_json(resp).decode("utf-8"), event="final")
+            yield _sse_format("done", event="done")
+        except HTTPException as e:
+            kw_task.cancel()
+            yield _sse_format(f"error: {e.detail}", event="error")
+        except Exception as e:
+            kw_task.cancel()
+            yield _sse_format(f"error: {e}", event="error")
+
+    return StreamingResponse(gen(), media_type="text/event-stream")
+
+@app.post("/search/semantic", response_model=SearchResponse)
+async def api_search_semantic(request: Request, req: SemanticSearchRequest, layout: str = FULL):
+    # 임베딩 질의(네트워크)와 npz/CSV 로드(디스크)를 포함하므로 기본 풀에서 실행
+    payload = await _run_blocking(None, "search", _semantic_search, req, _check_layout(layout))
+    return _encoded_response(request, payload)
+
+def _semantic_search(req: SemanticSearchRequest, layout: str = FULL) -> Dict:
+    base = canonical_base_path(req.base_path)
+    cache_dir = get_cache_dir()
+    safe_path = index_csv_path(cache_dir, base).stem[len("structured_index_"):]
+    emb = _SESSION_MANAGER.get_embedding_index(base)
+    if emb is None:
+        embedder = get_embedder()
+        emb = EmbeddingIndex(base, embedder)
+        if not emb.load(str(embedding_index_path(cache_dir, safe_path, embedder.name))):
+            raise ValueError("Semantic index not built; call /index with semantic=true first")
+        _SESSION_MANAGER.set_embedding_index(base, emb)
+
+    # 확장자 필터는 top_k로 자르기 전에 적용해야 허용된 파일로 top_k를 채울 수 있음 (폴더는 제외)
+    infos = _load_index_infos(base)
     allowed = set(req.allowed_exts or [])
+    path_filter = None
     if allowed:
-        merged = [i for i in merged if (not i.is_directory and i.extension in allowed)]
-
-    items = [FileInfoDTO(
-        path=i.path,
-        name=i.name,
-        extension=i.extension,
-        size_bytes=int(i.size_bytes),
-        is_directory=bool(i.is_directory),
-        created_time=i.created_time,
-        modified_time=i.modified_time,
-    ) for i in merged]
-
-    return SearchResponse(
-        keywords=keywords,
-        expanded_keywords=search_info['expanded_keywords'],
-        extensions=search_info['extensions'],
-        years=search_info['years'],
-        items=items
-    )
+        lookup = path_lookup(infos)
+
+        def path_filter(path: str) -> bool:
+            fi = lookup(path)
+            return fi is not None and not fi.is_directory and fi.extension in allowed
+    hits = emb.search(req.query, top_k=req.top_k, path_filter=path_filter)
+    merged = select_by_paths(infos, [p for p, _ in hits])
+
+    return search_payload([req.query], [req.query], [], [], merged, layout)
 
 @app.post("/refine", response_model=SearchResponse)
-def api_refine(req: RefineRequest):
-    sess = _get_session(req.base_path)
+async def api_refine(request: Request, req: RefineRequest, layout: str = FULL):
+    sess = await _aget_session(req.base_path)
+    payload = await _run_blocking(_INDEX_EXECUTOR, "search", _refine, sess, req, _check_layout(layout))
+    return _encoded_response(request, payload)
+
+def _refine(sess: SearchSession, req: RefineRequest, layout: str = FULL) -> Dict:
     current_paths = req.current_items
 
-    indexer = StructuredIndex(req.base_path)
-    from pathlib import Path
-    cache_dir = get_cache_dir()
-    safe_path = str(Path(req.base_path)).replace(':', '').replace('\\', '_').replace('/', '_')
-    csv_path = cache_dir / f"structured_index_{safe_path}.csv"
-    infos = indexer.load_from_csv(str(csv_path)) if os.path.exists(csv_path) else indexer.build_index()
-    info_by_path = {fi.path: fi for fi in infos}
     filtered_paths = sess.filter_results_by_keywords(current_paths, req.keywords)
-    merged_infos: List[FileInfo] = [info_by_path[p] for p in filtered_paths if p in info_by_path]
-    items = [FileInfoDTO(
-        path=i.path,
-        name=i.name,
-        extension=i.extension,
-        size_bytes=int(i.size_bytes),
-        is_directory=bool(i.is_directory),
-        created_time=i.created_time,
-        modified_time=i.modified_time,
-    ) for i in merged_infos]
-
-    return SearchResponse(
-        keywords=req.keywords,
-        expanded_keywords=req.keywords,
-        extensions=[],
-        years=[],
-        items=items
-    )
+    merged_infos: List[FileInfo] = select_by_paths(_load_index_infos(req.base_path), filtered_paths)
+    return search_payload(req.keywords, req.keywords, [], [], merged_infos, layout)
 
 class ModelSelectRequest(BaseModel):
     base_path: str
     model: str
 
 @app.get("/ollama/models")
-def api_ollama_models():
+async def api_ollama_models():
     try:
-        out = subprocess.check_output(["ollama", "list"], stderr=subprocess.STDOUT, text=True)
-        lines = [l.strip() for l in out.splitlines() if l.strip()]
-        names: List[str] = []
-        for i, line in enumerate(lines):
-            if i == 0 and ("NAME" in line and "SIZE" in line):
-                continue
-            parts = line.split()
-            if parts:
-                names.append(parts[0])
-        return {"models": names}
-    except Exception as e:
-        return {"models": [], "error": str(e)}
+        info = await _ollama_status("models")
+    except HTTPException as e:
+        return {"models": [], "error": e.detail}
+    resp = {"models": info.get("models") or [], "source": info.get("source")}
+    if info.get("error"):
+        resp["error"] = info["error"]
+    return resp
 
 @app.post("/ollama/pull")
-def api_ollama_pull(req: ModelSelectRequest):
+async def api_ollama_pull(req: ModelSelectRequest):
     try:
-        subprocess.check_call(["ollama", "pull", req.model])
+        # 모델 다운로드는 오래 걸리므로 요청 제한 시간을 적용하지 않음
+        await asyncio.get_running_loop().run_in_executor(None, subprocess.check_call, ["ollama", "pull", req.model])
+        await _run_blocking(None, "fast", _OLLAMA_REGISTRY.refresh, "models")
         return {"ok": True}
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
 @app.post("/ollama/select")
-def api_ollama_select(req: ModelSelectRequest):
-    sess = SearchSession(req.base_path, model_name=req.model)
-    _SESSIONS[req.base_path] = sess
+async def api_ollama_select(req: ModelSelectRequest):
+    # 모델 선택은 모든 폴더(여러 워커로 실행 중이면 모든 워커)에 적용
+    await _run_blocking(None, "fast", _SESSION_MANAGER.select_model, req.model)
+    await _aget_session(req.base_path)
+    warm_up(req.model)
     return {"ok": True, "model": req.model}
 
 @app.post("/proceed")
-def api_proceed(req: ProceedRequest):
-    sess = _get_session(req.base_path)
-    contents = sess.load_contents(req.paths)
+async def api_proceed(req: ProceedRequest):
+    sess = await _aget_session(req.base_path)
+    contents = await _run_blocking(_PARSE_EXECUTOR, "parse", _proceed, sess, req)
     return {"loaded": list(contents.keys())}
 
+def _proceed(sess: SearchSession, req: ProceedRequest) -> Dict[str, str]:
+    contents = sess.load_contents(req.paths)
+    # 여러 워커로 실행 중이면 다음 /qa를 받는 워커도 같은 문서를 보도록 게시
+    _SESSION_MANAGER.publish_session(req.base_path)
+    # 불러온 문서만큼 늘어난 메모리를 상한 계산에 반영
+    _SESSION_MANAGER.update_usage(req.base_path)
+    return contents
+
 @app.post("/qa", response_model=QAResponse)
-def api_qa(req: QARequest):
-    sess = _get_session(req.base_path)
-    answer = sess.answer_with_context(req.question)
+async def api_qa(req: QARequest):
+    sess = await _aget_session(req.base_path)
+    if req.mode == "map_reduce":
+        # map 단계는 자체 스레드 풀에서 병렬 실행
+        answer = await _run_blocking(None, "qa", sess.answer_map_reduce, req.question)
+    else:
+        answer = await _with_timeout(sess.aanswer_with_context(req.question), "qa")
     return QAResponse(answer=str(answer))
 
 def _sse_format(data: str, event: Optional[str] = None) -> str:
     lines = []
     if event:
         lines.append(f"event: {event}")
-    for line in str(data).splitlines() or [""]:
+    # splitlines() 대신 split: 토큰 안의 개행도 빈 data 줄로 보존
+    for line in str(data).split("\n"):
         lines.append(f"data: {line}")
     lines.append("")
-    return "\n".join(lines)
+    return "\n".join(lines) + "\n"
 
 @app.get("/qa/stream")
-def api_qa_stream(base_path: str, q: str):
-    sess = _get_session(base_path)
+async def api_qa_stream(request: Request, base_path: str, q: str, mode: Optional[str] = None):
+    sess = await _aget_session(base_path)
 
-    def gen():
+    async def map_reduce_events(cancel: threading.Event):
+        # map-reduce는 스레드 기반 병렬 처리를 사용하므로 이벤트를 하나씩 스레드에서 꺼냄
+        events = sess.iter_map_reduce_answer(q, cancel_event=cancel)
         try:
-            answer = str(sess.answer_with_context(q))
-            chunk_size = 80
-            for i in range(0, len(answer), chunk_size):
-                yield _sse_format(answer[i:i+chunk_size])
-            yield _sse_format("done", event="done")
+            while True:
+                ev = await run_in_threadpool(next, events, None)
+                if ev is None:
+                    return
+                yield ev
+        finally:
+            cancel.set()
+            try:
+                await run_in_threadpool(events.close)
+            except ValueError:
+                # 아직 토큰을 기다리는 중이면 cancel 플래그로 다음 토큰에서 종료됨
+                pass
+
+    # 스트림별 지표 (세션은 폴더 단위로 공유되므로 세션 속성에 두지 않음)
+    metrics: Dict = {}
+
+    async def token_events():
+        tokens = sess.astream_answer(q, metrics)
+        try:
+            async for token in tokens:
+                yield {"type": "token", "text": token}
+        finally:
+            await tokens.aclose()
+
+    async def gen():
+        cancel = threading.Event()
+        events = map_reduce_events(cancel) if mode == "map_reduce" else token_events()
+        deadline = asyncio.get_running_loop().time() + REQUEST_TIMEOUTS["qa"]
+        try:
+            while True:
+                if await request.is_disconnected():
+                    cancel.set()
+                    break
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    ev = await asyncio.wait_for(events.__anext__(), max(0.0, remaining))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    cancel.set()
+                    yield _sse_format(f"error: 요청 시간 초과 (qa, {REQUEST_TIMEOUTS['qa']:g}s)", event="error")
+                    return
+                if ev["type"] == "partial":
+                    yield _sse_format(json.dumps({"path": ev["path"], "text": ev["text"]}, ensure_ascii=False), event="partial")
+                else:
+                    yield _sse_format(ev["text"])
+            if not cancel.is_set():
+                if mode != "map_reduce":
+                    yield _sse_format(json.dumps(metrics), event="metrics")
+                yield _sse_format("done", event="done")
         except Exception as e:
             yield _sse_format(f"error: {e}", event="error")
+        finally:
+            # 클라이언트 연결 종료/취소 시 생성 중단 (Ollama 스트림을 닫음)
+            cancel.set()
+            await events.aclose()
 
     return StreamingResponse(gen(), media_type="text/event-stream")
 
@@ -347,6 +783,7 @@ def api_ollama_pull_stream(model: str):
                 yield _sse_format(line.rstrip())
             code = proc.wait()
             if code == 0:
+                _OLLAMA_REGISTRY.refresh("models")
                 yield _sse_format("ok", event="done")
             else:
                 yield _sse_format(f"exit code {code}", event="error")
@@ -355,6 +792,117 @@ def api_ollama_pull_stream(model: str):
 
     return StreamingResponse(gen(), media_type="text/event-stream")
 
+# ----- 요청 단위 프로파일링 (ODIN_PROFILING=1 일 때만) -----
+_PROFILE_LOCK = asyncio.Lock()
+_MEMORY_TRACKER = MemoryTracker()
+
+def _profile_dir():
+    return get_cache_dir() / "profiles"
+
+def _require_profiling():
+    if not profiling_enabled():
+        raise HTTPException(status_code=403, detail="프로파일링이 비활성화되어 있습니다 (ODIN_PROFILING=1 로 실행)")
+
+async def _profile_request(target: str, mode: str, interval_ms: float, limit: int, run):
+    """Run one request under cProfile ("cprofile", pstats file) or the sampler ("sampling", speedscope file)"""
+    _require_profiling()
+    if mode == "cprofile":
+        profiler = CProfileSession()
+    elif mode == "sampling":
+        profiler = SamplingProfiler(interval_ms / 1000.0)
+    else:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 프로파일 모드: {mode}")
+    if _PROFILE_LOCK.locked():
+        raise HTTPException(status_code=409, detail="다른 요청을 프로파일링하는 중입니다")
+
+    async with _PROFILE_LOCK:
+        result, error = None, None
+        with profiler:
+            try:
+                result = await run()
+            except HTTPException as e:
+                error = e.detail
+        path = await _run_blocking(None, "fast", profiler.save, _profile_dir(), target)
+    print(f"[프로파일] {target} ({mode}) {profiler.elapsed * 1000:.1f} ms -> {path}")
+    return {
+        "target": target,
+        "mode": mode,
+        "elapsed_ms": round(profiler.elapsed * 1000, 1),
+        "profile_path": str(path),
+        "file": path.name,
+        "top": profiler.top(limit),
+        "error": error,
+        "result": jsonable_encoder(result),
+    }
+
+@app.post("/profile/search")
+async def api_profile_search(req: SearchRequest, mode: str = "cprofile", interval_ms: float = 5.0, limit: int = 25):
+    return await _profile_request("search", mode, interval_ms, limit, lambda: _search(req))
+
+@app.post("/profile/index")
+async def api_profile_index(req: IndexRequest, mode: str = "cprofile", interval_ms: float = 5.0, limit: int = 25):
+    """Profiles an index refresh; runs inline in the index pool instead of through the job queue"""
+    async def run():
+        resp = await _run_blocking(_INDEX_EXECUTOR, "index", _build_index, req)
+        await _aget_session(req.base_path)
+        return resp
+
+    return await _profile_request("index", mode, interval_ms, limit, run)
+
+@app.post("/profile/proceed")
+async def api_profile_proceed(req: ProceedRequest, mode: str = "cprofile", interval_ms: float = 5.0, limit: int = 25):
+    return await _profile_request("proceed", mode, interval_ms, limit, lambda: api_proceed(req))
+
+@app.get("/profile/files")
+async def api_profile_files():
+    _require_profiling()
+    out_dir = _profile_dir()
+    files = sorted(out_dir.iterdir(), key=lambda p: p.stat().st_mtime, reverse=True) if out_dir.exists() else []
+    return {"files": [{"file": p.name, "bytes": p.stat().st_size} for p in files]}
+
+@app.get("/profile/files/{name}")
+async def api_profile_file(name: str):
+    _require_profiling()
+    path = _profile_dir() / os.path.basename(name)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="profile not found")
+    media_type = "application/json" if path.suffix == ".json" else "application/octet-stream"
+    return FileResponse(str(path), media_type=media_type, filename=path.name)
+
+@app.post("/profile/memory/start")
+async def api_profile_memory_start(frames: int = 25):
+    """Start tracemalloc and take the baseline snapshot"""
+    _require_profiling()
+    return await _run_blocking(None, "parse", _MEMORY_TRACKER.start, frames)
+
+@app.get("/profile/memory/diff")
+async def api_profile_memory_diff(scope: str = "all", since: str = "baseline", limit: int = 30):
+    """Allocation growth since the baseline (or the previous diff) in scope: index, session, parsers or all"""
+    _require_profiling()
+    try:
+        diff = await _run_blocking(None, "parse", _MEMORY_TRACKER.diff, scope, since, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="tracemalloc이 실행 중이 아닙니다 (/profile/memory/start 먼저 호출)")
+    diff["sessions"] = _SESSION_MANAGER.stats()["bases"]
+    return diff
+
+@app.post("/profile/memory/stop")
+async def api_profile_memory_stop():
+    _require_profiling()
+    return _MEMORY_TRACKER.stop()
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     port = int(os.environ.get("PORT", "8765"))
-    uvicorn.run(app, host="127.0.0.1", port=port, reload=False)
\ No newline at end of file
+    workers = int(os.environ.get("ODIN_WORKERS", "1"))
+    if workers > 1 and getattr(sys, 'frozen', False):
+        print("[서버] 패키징된 실행 파일에서는 단일 워커로 실행합니다 (ODIN_WORKERS 무시)")
+        workers = 1
+    if workers > 1:
+        # 워커 프로세스는 이 모듈을 다시 불러오며 환경 변수를 물려받음: 인덱스는 공유 스냅샷으로 사용
+        os.environ["ODIN_SHARED_INDEX"] = "1"
+        uvicorn.run("__main__:app", host="127.0.0.1", port=port, workers=workers, reload=False)
+    else:
+        uvicorn.run(app, host="127.0.0.1", port=port, reload=False)
\ No newline at end of file
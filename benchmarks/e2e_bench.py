@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# 종단간 지연 시간 벤치마크: 가짜 Ollama 서버를 띄우고 FastAPI 앱을 프로세스 안에서 구동
+#
+# 사용 예:
+#   python benchmarks/e2e_bench.py --clients 8 --requests 40
+#   python benchmarks/e2e_bench.py --corpus D:\문서 --scenarios search,qa_stream --ttft-ms 300
+
+import argparse
+import functools
+import inspect
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+BENCH_DIR = Path(__file__).resolve().parent
+if str(BENCH_DIR) not in sys.path:
+    sys.path.insert(0, str(BENCH_DIR))
+
+from fake_ollama import FakeOllamaConfig, FakeOllamaServer  # noqa: E402
+
+SEARCH_QUERIES = [
+    "2024 계약서",
+    "작년 회의록 찾아줘",
+    "budget report 2023",
+    "인사 평가 관련 문서",
+    "프로젝트 일정표 pdf",
+    "지난달 견적서",
+    "출장 보고서 2022",
+    "마케팅 전략 발표 자료",
+]
+QA_QUESTIONS = [
+    "계약 기간은 언제까지야?",
+    "대금 지급 조건을 요약해줘",
+    "회의에서 결정된 사항은?",
+    "일정이 지연된 이유가 뭐야?",
+]
+
+_TOPICS = ["계약서", "회의록", "견적서", "보고서", "일정표", "발표자료", "인사평가", "budget", "proposal", "invoice"]
+_FOLDERS = ["영업", "인사", "재무", "개발", "마케팅", "projects", "archive"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[k]
+
+
+def make_corpus(root: Path, n_files: int, seed: int = 0) -> None:
+    """Create a synthetic folder tree of small .txt/.md documents"""
+    rng = random.Random(seed)
+    body = ("계약 기간은 체결일로부터 일 년으로 한다. 대금은 매월 말일에 지급한다. "
+            "회의에서는 일정 지연과 예산 조정에 대해 논의하였다.\n") * 20
+    for i in range(n_files):
+        folder = root / rng.choice(_FOLDERS) / str(rng.choice(range(2019, 2026)))
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"{rng.choice(range(2019, 2026))}_{rng.choice(_TOPICS)}_{i:05d}{rng.choice(['.txt', '.md'])}"
+        (folder / name).write_text(f"# {name}\n{body}", encoding="utf-8")
+
+
+class StageTimer:
+    """Wrap app functions to record per-stage wall time (keyword/index/matching/parsing/generation)"""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._patched: List[tuple] = []
+
+    def record(self, stage: str, ms: float) -> None:
+        with self._lock:
+            self.samples.setdefault(stage, []).append(ms)
+
+    def reset(self) -> Dict[str, List[float]]:
+        with self._lock:
+            samples, self.samples = self.samples, {}
+        return samples
+
+    def wrap(self, owner: Any, attr: str, stage: str) -> None:
+        original = getattr(owner, attr)
+        timer = self
+
+        if inspect.isasyncgenfunction(original):
+            @functools.wraps(original)
+            async def wrapped(*args, **kwargs):
+                started = time.perf_counter()
+                gen = original(*args, **kwargs)
+                try:
+                    async for item in gen:
+                        yield item
+                finally:
+                    await gen.aclose()
+                    timer.record(stage, (time.perf_counter() - started) * 1000)
+        elif inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def wrapped(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    timer.record(stage, (time.perf_counter() - started) * 1000)
+        elif inspect.isgeneratorfunction(original):
+            @functools.wraps(original)
+            def wrapped(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    yield from original(*args, **kwargs)
+                finally:
+                    timer.record(stage, (time.perf_counter() - started) * 1000)
+        else:
+            @functools.wraps(original)
+            def wrapped(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    timer.record(stage, (time.perf_counter() - started) * 1000)
+
+        setattr(owner, attr, wrapped)
+        self._patched.append((owner, attr, original))
+
+    def install(self, server_module: Any) -> None:
+        import Langchain.Searchtool as searchtool
+        from Langchain.InteractiveSearch import SearchSession
+
+        self.wrap(server_module, "_load_index_infos", "index_load")
+        self.wrap(searchtool, "advanced_search_pipeline", "matching")
+        self.wrap(SearchSession, "load_contents", "parsing")
+        for attr in ("extract_keywords", "aextract_keywords"):
+            if hasattr(SearchSession, attr):
+                self.wrap(SearchSession, attr, "keywords")
+        for attr in ("answer_with_context", "aanswer_with_context", "stream_answer", "astream_answer",
+                     "iter_map_reduce_answer"):
+            if hasattr(SearchSession, attr):
+                self.wrap(SearchSession, attr, "generation")
+
+    def uninstall(self) -> None:
+        for owner, attr, original in reversed(self._patched):
+            setattr(owner, attr, original)
+        self._patched.clear()
+
+
+def parse_sse(text: str) -> List[Dict[str, str]]:
+    events = []
+    for block in text.split("\n\n"):
+        if not block.strip():
+            continue
+        event, data = "message", []
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                data.append(line[6:])
+        events.append({"event": event, "data": "\n".join(data)})
+    return events
+
+
+def run_scenario(name: str, call: Callable[[int], Dict[str, Any]], n_requests: int, clients: int,
+                 timer: StageTimer) -> Dict[str, Any]:
+    """Fire n_requests calls from `clients` concurrent threads and collect latency stats"""
+    latencies: List[float] = []
+    extras: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    timer.reset()
+
+    def one(i: int) -> None:
+        started = time.perf_counter()
+        try:
+            extra = call(i) or {}
+            ms = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(ms)
+                extras.append(extra)
+        except Exception as e:
+            with lock:
+                errors.append(f"{type(e).__name__}: {e}")
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(one, range(n_requests)))
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "scenario": name,
+        "clients": clients,
+        "requests": n_requests,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else None,
+        },
+        "ttft_ms_p50": _p50_of(extras, "ttft_ms"),
+        "stages": {
+            stage: {
+                "count": len(vals),
+                "p50": round(percentile(vals, 50), 1),
+                "p95": round(percentile(vals, 95), 1),
+                "share": round(sum(vals) / sum(latencies), 3) if latencies and sum(latencies) else None,
+            }
+            for stage, vals in sorted(timer.reset().items())
+        },
+    }
+
+
+def _p50_of(extras: List[Dict[str, Any]], key: str) -> Optional[float]:
+    vals = [e[key] for e in extras if e.get(key) is not None]
+    return round(percentile(vals, 50), 1) if vals else None
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    lat = result["latency_ms"]
+    print(f"\n=== {result['scenario']} (clients {result['clients']}, requests {result['requests']}) ===")
+    print(f"latency  p50 {lat['p50']:8.1f} ms  p95 {lat['p95']:8.1f} ms  p99 {lat['p99']:8.1f} ms  "
+          f"mean {lat['mean'] if lat['mean'] is not None else float('nan'):8.1f} ms")
+    print(f"throughput {result['throughput_rps']} req/s, errors {result['errors']}")
+    if result["ttft_ms_p50"] is not None:
+        print(f"TTFT p50 {result['ttft_ms_p50']} ms (server-side)")
+    for sample in result["error_samples"]:
+        print(f"  오류: {sample}")
+    for stage, s in result["stages"].items():
+        share = f"{s['share'] * 100:5.1f}%" if s["share"] is not None else "   - "
+        print(f"  {stage:12s} n={s['count']:<5d} p50 {s['p50']:8.1f} ms  p95 {s['p95']:8.1f} ms  share {share}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="End-to-end latency benchmark against a fake Ollama")
+    ap.add_argument("--corpus", help="existing folder to index (default: synthetic corpus)")
+    ap.add_argument("--files", type=int, default=2000, help="synthetic corpus size")
+    ap.add_argument("--clients", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=40, help="requests per scenario")
+    ap.add_argument("--scenarios", default="search,search_stream,qa,qa_stream,qa_map_reduce")
+    ap.add_argument("--ttft-ms", type=float, default=100.0)
+    ap.add_argument("--token-ms", type=float, default=10.0)
+    ap.add_argument("--answer-tokens", type=int, default=40)
+    ap.add_argument("--no-fast-path", action="store_true", help="always route keyword extraction through the LLM")
+    ap.add_argument("--json", help="also write results to this JSON file")
+    args = ap.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="odin_bench_"))
+    corpus = Path(args.corpus) if args.corpus else work / "corpus"
+    if not args.corpus:
+        make_corpus(corpus, args.files)
+
+    config = FakeOllamaConfig(ttft_ms=args.ttft_ms, token_ms=args.token_ms, answer_tokens=args.answer_tokens)
+    with FakeOllamaServer(config=config) as fake:
+        os.environ["OLLAMA_HOST"] = fake.url
+        print(f"가짜 Ollama: {fake.url}, 코퍼스: {corpus}")
+
+        # 실행마다 같은 조건이 되도록 프롬프트 캐시는 임시 파일 사용
+        import Langchain.llm_cache as llm_cache
+        llm_cache._prompt_cache = llm_cache.PromptCache(work / "llm_prompt_cache.json")
+
+        import backend.server as server
+        from fastapi.testclient import TestClient
+
+        timer = StageTimer()
+        timer.install(server)
+        created: List[Path] = []
+        results: List[Dict[str, Any]] = []
+        try:
+            with TestClient(server.app) as client:
+                base = str(corpus)
+                started = time.perf_counter()
+                resp = client.post("/index", json={"base_path": base})
+                resp.raise_for_status()
+                index_info = resp.json()
+                created.append(Path(index_info["csv_path"]))
+                print(f"인덱싱: {index_info['count']}개 항목, {(time.perf_counter() - started) * 1000:.0f} ms")
+                if args.no_fast_path:
+                    server._SESSION_MANAGER.peek_session(base).fast_path_enabled = False
+
+                hits = client.post("/search", json={"base_path": base, "query": "계약서"}).json()["items"]
+                docs = [h["path"] for h in hits if not h["is_directory"]][:5]
+                timer.reset()
+                t = time.perf_counter()
+                client.post("/proceed", json={"base_path": base, "paths": docs}).raise_for_status()
+                print(f"문서 로드: {len(docs)}개, {(time.perf_counter() - t) * 1000:.0f} ms")
+
+                def search(i: int) -> Dict[str, Any]:
+                    r = client.post("/search", json={"base_path": base, "query": SEARCH_QUERIES[i % len(SEARCH_QUERIES)]})
+                    r.raise_for_status()
+                    return {}
+
+                def search_stream(i: int) -> Dict[str, Any]:
+                    r = client.post("/search/stream", json={"base_path": base, "query": SEARCH_QUERIES[i % len(SEARCH_QUERIES)]})
+                    r.raise_for_status()
+                    if not any(e["event"] == "final" for e in parse_sse(r.text)):
+                        raise RuntimeError("final 이벤트 없음")
+                    return {}
+
+                def qa(i: int) -> Dict[str, Any]:
+                    r = client.post("/qa", json={"base_path": base, "question": QA_QUESTIONS[i % len(QA_QUESTIONS)]})
+                    r.raise_for_status()
+                    return {}
+
+                def qa_stream(i: int) -> Dict[str, Any]:
+                    r = client.get("/qa/stream", params={"base_path": base, "q": QA_QUESTIONS[i % len(QA_QUESTIONS)]})
+                    r.raise_for_status()
+                    events = parse_sse(r.text)
+                    if any(e["event"] == "error" for e in events):
+                        raise RuntimeError(next(e["data"] for e in events if e["event"] == "error"))
+                    metrics = next((json.loads(e["data"]) for e in events if e["event"] == "metrics"), {})
+                    return {"ttft_ms": metrics.get("ttft_ms")}
+
+                def qa_map_reduce(i: int) -> Dict[str, Any]:
+                    r = client.post("/qa", json={"base_path": base, "question": QA_QUESTIONS[i % len(QA_QUESTIONS)],
+                                                 "mode": "map_reduce"})
+                    r.raise_for_status()
+                    return {}
+
+                scenarios = {"search": search, "search_stream": search_stream, "qa": qa,
+                             "qa_stream": qa_stream, "qa_map_reduce": qa_map_reduce}
+                for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+                    if name not in scenarios:
+                        print(f"알 수 없는 시나리오: {name}")
+                        continue
+                    result = run_scenario(name, scenarios[name], args.requests, args.clients, timer)
+                    results.append(result)
+                    print_report(result)
+        finally:
+            timer.uninstall()
+            for p in created:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+            shutil.rmtree(work, ignore_errors=True)
+
+        print(f"\n가짜 Ollama 요청 수: {fake.request_counts}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
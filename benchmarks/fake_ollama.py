@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# 벤치마크용 가짜 Ollama HTTP 서버: 결정적 응답 + 지연 시간 설정 (스트리밍 포함)
+#
+# 사용 예:
+#   python benchmarks/fake_ollama.py --port 11999 --ttft-ms 150 --token-ms 20
+#   OLLAMA_HOST=http://127.0.0.1:11999 python backend/server.py
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+_HANGUL_OR_WORD_RE = re.compile(r"[가-힣]{2,}|[A-Za-z]{3,}")
+_STOPWORDS = {"파일", "문서", "찾아줘", "찾아", "보여줘", "관련", "자료", "있는", "어디"}
+
+ANSWER_TEXT = (
+    "요청하신 내용은 제공된 문서에 근거하여 다음과 같이 정리됩니다. "
+    "계약 기간은 체결일로부터 일 년이며, 대금은 매월 말일에 지급합니다. "
+    "자세한 조건은 관련 파일의 본문을 참고하세요."
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fake_tokens(text: str) -> List[str]:
+    """Split text into word-ish pieces that keep their leading space (like BPE tokens)"""
+    return re.findall(r"\s*\S+", text)
+
+
+def _fake_token_ids(text: str) -> List[int]:
+    return [int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=2).digest(), "little")
+            for t in _fake_tokens(text)]
+
+
+class FakeOllamaConfig:
+    """응답 지연/길이 설정 (초 단위가 아닌 ms)"""
+
+    def __init__(self, ttft_ms: float = 100.0, token_ms: float = 10.0, answer_tokens: int = 40,
+                 prompt_ms_per_1k: float = 50.0, embed_ms: float = 5.0, embed_dim: int = 64,
+                 models: Optional[List[str]] = None) -> None:
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.answer_tokens = answer_tokens
+        # 프롬프트 평가 비용: 1000 토큰당 지연 (context 재사용 효과를 재현)
+        self.prompt_ms_per_1k = prompt_ms_per_1k
+        self.embed_ms = embed_ms
+        self.embed_dim = embed_dim
+        self.models = models or ["llama3:8b", "nomic-embed-text"]
+
+
+def canned_response(prompt: str, config: FakeOllamaConfig) -> str:
+    """Return a deterministic response for the prompt kinds the app sends"""
+    if "키워드만 추출" in prompt:
+        m = re.search(r'질문:\s*"(.*)"', prompt)
+        words = [w for w in _HANGUL_OR_WORD_RE.findall(m.group(1) if m else prompt) if w not in _STOPWORDS]
+        return json.dumps(list(dict.fromkeys(words))[:5] or ["문서"], ensure_ascii=False)
+    if "영문 키워드" in prompt:
+        m = re.search(r"영문 키워드:\s*(\[.*\])", prompt)
+        try:
+            terms = json.loads(m.group(1)) if m else []
+        except ValueError:
+            terms = []
+        return json.dumps([f"{t}자료" for t in terms], ensure_ascii=False)
+    if "관련 내용이 없으면" in prompt:
+        # map 단계: 문서마다 짧은 요약
+        return "계약 기간과 대금 지급 조건이 적혀 있습니다."
+    tokens = _fake_tokens(ANSWER_TEXT)
+    out = [tokens[i % len(tokens)] for i in range(config.answer_tokens)]
+    return "".join(out).strip()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeOllamaServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+        pass
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return {}
+
+    def _send_json(self, obj: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path in ("/", "/api/version"):
+            if self.path == "/":
+                body = b"Ollama is running"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json({"version": "0.0.0-fake"})
+            return
+        if self.path == "/api/tags":
+            self._send_json({"models": [
+                {"name": m, "model": m, "modified_at": _now(), "size": 0, "digest": hashlib.sha1(m.encode()).hexdigest()}
+                for m in self.server.config.models
+            ]})
+            return
+        if self.path == "/api/ps":
+            self._send_json({"models": [{"name": m, "model": m} for m in self.server.config.models[:1]]})
+            return
+        self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self) -> None:
+        req = self._read_json()
+        self.server.count(self.path)
+        if self.path == "/api/generate":
+            self._generate(req)
+        elif self.path == "/api/embed":
+            inputs = req.get("input") or []
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            time.sleep(self.server.config.embed_ms / 1000.0)
+            self._send_json({"model": req.get("model"), "embeddings": [self._embed(t) for t in inputs]})
+        elif self.path == "/api/embeddings":
+            time.sleep(self.server.config.embed_ms / 1000.0)
+            self._send_json({"embedding": self._embed(req.get("prompt") or "")})
+        elif self.path == "/api/pull":
+            self._send_json({"status": "success"})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def _embed(self, text: str) -> List[float]:
+        dim = self.server.config.embed_dim
+        vec = [0.0] * dim
+        for tid in _fake_token_ids(text.lower()) or [0]:
+            vec[tid % dim] += 1.0
+        return vec
+
+    def _generate(self, req: Dict[str, Any]) -> None:
+        config = self.server.config
+        model = req.get("model") or config.models[0]
+        prompt = req.get("prompt") or ""
+        prev_context = list(req.get("context") or [])
+        prompt_ids = _fake_token_ids(prompt)
+        stream = req.get("stream", True)
+
+        if not prompt:
+            # 워밍업 요청(빈 프롬프트): 모델 로드만 하고 즉시 완료
+            self._send_json({"model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "load"})
+            return
+
+        started = time.perf_counter()
+        # context가 주어지면 새 토큰만 평가 (실제 Ollama의 KV 캐시 재사용과 같은 비용 모델)
+        prompt_eval_ms = config.ttft_ms + config.prompt_ms_per_1k * len(prompt_ids) / 1000.0
+        time.sleep(prompt_eval_ms / 1000.0)
+
+        text = canned_response(prompt, config)
+        pieces = _fake_tokens(text)
+
+        def final_chunk() -> Dict[str, Any]:
+            total_ns = int((time.perf_counter() - started) * 1e9)
+            return {
+                "model": model, "created_at": _now(), "response": "", "done": True, "done_reason": "stop",
+                "context": prev_context + prompt_ids + _fake_token_ids(text),
+                "total_duration": total_ns, "load_duration": 0,
+                "prompt_eval_count": len(prompt_ids), "prompt_eval_duration": int(prompt_eval_ms * 1e6),
+                "eval_count": len(pieces), "eval_duration": max(0, total_ns - int(prompt_eval_ms * 1e6)),
+            }
+
+        if not stream:
+            time.sleep(config.token_ms * len(pieces) / 1000.0)
+            out = final_chunk()
+            out["response"] = text
+            self._send_json(out)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(config.token_ms / 1000.0)
+                self._write_chunk({"model": model, "created_at": _now(), "response": piece, "done": False})
+            self._write_chunk(final_chunk())
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 닫음 (취소)
+            self.server.count("cancelled")
+            self.close_connection = True
+
+    def _write_chunk(self, obj: Dict[str, Any]) -> None:
+        data = (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """백그라운드 스레드에서 실행되는 가짜 Ollama 서버 (with 문으로 시작/종료)"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[FakeOllamaConfig] = None) -> None:
+        super().__init__((host, port), _Handler)
+        self.config = config or FakeOllamaConfig()
+        self.request_counts: Dict[str, int] = {}
+        self._count_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str) -> None:
+        with self._count_lock:
+            self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Deterministic fake Ollama server for benchmarks")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11999)
+    ap.add_argument("--ttft-ms", type=float, default=100.0, help="time before the first token")
+    ap.add_argument("--token-ms", type=float, default=10.0, help="delay between streamed tokens")
+    ap.add_argument("--answer-tokens", type=int, default=40)
+    ap.add_argument("--prompt-ms-per-1k", type=float, default=50.0, help="prompt eval cost per 1000 new tokens")
+    args = ap.parse_args()
+
+    config = FakeOllamaConfig(ttft_ms=args.ttft_ms, token_ms=args.token_ms, answer_tokens=args.answer_tokens,
+                              prompt_ms_per_1k=args.prompt_ms_per_1k)
+    server = FakeOllamaServer(args.host, args.port, config)
+    print(f"가짜 Ollama 서버 실행 중: {server.url} (Ctrl+C로 종료)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# 기간/크기 범위 질의 벤치마크: ISO 문자열 선형 스캔 vs 정렬된 보조 인덱스(bisect 슬라이스)
+#
+# 사용 예:
+#   python benchmarks/range_query_bench.py             # 10만, 50만 항목
+#   python benchmarks/range_query_bench.py 1000000
+
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from Langchain.metadata_filters import MetadataFilter, MetadataIndex, iso_to_epoch  # noqa: E402
+from Langchain.structured_indexing import FileInfo  # noqa: E402
+
+QUERIES = ["최근 3개월", "2024년 3월부터 5월까지", "50MB 이상", "작년 10MB 미만"]
+
+
+def make_infos(n: int):
+    rnd = random.Random(7)
+    now = datetime.now()
+    infos = []
+    for i in range(n):
+        mt = now - timedelta(seconds=rnd.randint(0, 5 * 365 * 86400))
+        infos.append(FileInfo(path=f"C:/data/{i % 500}/file_{i}.pdf", name=f"file_{i}.pdf", parent_path=f"C:/data/{i % 500}",
+                              is_directory=False, extension=".pdf", size_bytes=rnd.randint(0, 200 << 20),
+                              created_time=mt.isoformat(), modified_time=mt.isoformat(), is_parseable=True,
+                              depth_level=2))
+    return infos
+
+
+def linear(infos, flt: MetadataFilter):
+    """What a per-item filter costs: parse each timestamp and compare"""
+    out = []
+    for fi in infos:
+        values = {"mtime": iso_to_epoch(fi.modified_time), "ctime": iso_to_epoch(fi.created_time),
+                  "size": float(fi.size_bytes)}
+        if all(any(lo <= values[c] < hi for lo, hi in ranges) for c, ranges in flt.criteria):
+            out.append(fi)
+    return out
+
+
+def bench(func, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 500_000]
+    for n in sizes:
+        infos = make_infos(n)
+        t = time.perf_counter()
+        meta = MetadataIndex.from_infos(infos)
+        build_ms = (time.perf_counter() - t) * 1000
+        print(f"\n=== {n} items (index build {build_ms:.0f} ms, {meta.nbytes / 1024 / 1024:.1f} MiB) ===")
+        for q in QUERIES:
+            years = [datetime.now().year - 1] if "작년" in q else []
+            flt = MetadataFilter.from_query(q, years)
+            hits = len(meta.select(flt))
+            assert hits == len(linear(infos, flt))
+            lin = bench(lambda: linear(infos, flt), 3)
+            idx = bench(lambda: meta.select(flt), 20)
+            print(f"{q:24s} {hits:8d} hits  linear {lin:8.1f} ms  index {idx:7.2f} ms  x{lin / idx:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
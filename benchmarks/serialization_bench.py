@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# 검색 응답 직렬화 벤치마크: 기존 Pydantic 경로 vs orjson/msgpack, full vs compact 레이아웃
+#
+# 사용 예:
+#   python benchmarks/serialization_bench.py            # 200, 1000, 5000개 결과
+#   python benchmarks/serialization_bench.py 200 20000
+
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from Langchain import response_encoding as enc  # noqa: E402
+from Langchain.structured_indexing import FileInfo  # noqa: E402
+
+
+def make_infos(n: int):
+    """Results shaped like a real drive: deep, repeated parent folders and long names"""
+    base = datetime(2023, 1, 1)
+    infos = []
+    for i in range(n):
+        parent = f"C:/Users/사용자/Documents/업무자료/프로젝트_{i % 12:02d}/{2019 + i % 5}년/월별_보고서/{i % 30:02d}"
+        name = f"{2019 + i % 5}_분기별_계약서_검토_보고서_최종본_{i:06d}.{'pdf' if i % 3 else 'docx'}"
+        ts = (base + timedelta(minutes=17 * i)).isoformat()
+        infos.append(FileInfo(path=f"{parent}/{name}", name=name, parent_path=parent, is_directory=False,
+                              extension=name.rsplit(".", 1)[1], size_bytes=1000 + i * 37, created_time=ts,
+                              modified_time=ts, is_parseable=True, depth_level=7))
+    return infos
+
+
+def legacy_encode(infos) -> bytes:
+    """What /search did before: FileInfoDTO per item, SearchResponse validation, jsonable_encoder + json"""
+    from backend.server import FileInfoDTO, SearchResponse
+
+    items = [FileInfoDTO(path=i.path, name=i.name, extension=i.extension, size_bytes=int(i.size_bytes),
+                         is_directory=bool(i.is_directory), created_time=i.created_time,
+                         modified_time=i.modified_time) for i in infos]
+    resp = SearchResponse(keywords=["계약서"], expanded_keywords=["계약서"], extensions=[], years=[], items=items)
+    return json.dumps(jsonable_encoder(resp), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_encode(infos, layout: str, media_type: str) -> bytes:
+    payload = enc.search_payload(["계약서"], ["계약서"], [], [], infos, layout)
+    return enc.encode(payload, media_type)
+
+
+def bench(func, runs: int):
+    times = []
+    out = b""
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = func()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times), len(out)
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [200, 1000, 5000]
+    print(f"orjson: {'사용' if enc.orjson else '없음 (json 대체)'}, msgpack: {'사용' if enc.msgpack else '없음'}")
+    for n in sizes:
+        infos = make_infos(n)
+        runs = max(5, min(50, 20000 // n))
+        cases = [
+            ("legacy pydantic+json", lambda: legacy_encode(infos)),
+            ("fast full json", lambda: fast_encode(infos, enc.FULL, enc.JSON)),
+            ("fast compact json", lambda: fast_encode(infos, enc.COMPACT, enc.JSON)),
+        ]
+        if enc.msgpack is not None:
+            cases += [
+                ("fast full msgpack", lambda: fast_encode(infos, enc.FULL, enc.MSGPACK)),
+                ("fast compact msgpack", lambda: fast_encode(infos, enc.COMPACT, enc.MSGPACK)),
+            ]
+        print(f"\n=== {n} items ({runs} runs) ===")
+        base_ms = None
+        for label, func in cases:
+            ms, size = bench(func, runs)
+            base_ms = base_ms or ms
+            print(f"{label:22s} {ms:8.2f} ms  x{base_ms / ms:5.1f}  {size / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# 시작 시간 벤치마크: 모듈 import 시간과 파서 최초 로드 시간을 측정
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+IMPORT_TARGETS = [
+    "parsers.registry",
+    "Langchain.structured_indexing",
+    "Langchain.Searchtool",
+]
+
+
+def time_cold_import(module_name: str, runs: int = 5) -> list:
+    """Import a module in fresh interpreters and return wall times in ms"""
+    code = (
+        "import time, sys; t = time.perf_counter(); "
+        f"import {module_name}; "
+        "sys.stdout.write(str((time.perf_counter() - t) * 1000))"
+    )
+    times = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=str(PROJECT_ROOT),
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if proc.returncode != 0:
+            last = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+            raise RuntimeError(last)
+        times.append(float(proc.stdout))
+    return times
+
+
+def time_parser_first_use() -> dict:
+    """Measure the lazy import cost of each parser on first access"""
+    from parsers.registry import PARSER_ENTRY_POINTS, get_parser, is_supported
+
+    results = {}
+    for ext in PARSER_ENTRY_POINTS:
+        if not is_supported(ext):
+            results[ext] = None
+            continue
+        t = time.perf_counter()
+        get_parser(ext)
+        results[ext] = (time.perf_counter() - t) * 1000
+    return results
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"=== cold import ({runs} runs) ===")
+    for target in IMPORT_TARGETS:
+        try:
+            times = time_cold_import(target, runs)
+            print(f"{target:35s} median {statistics.median(times):8.1f} ms  max {max(times):8.1f} ms")
+        except RuntimeError as e:
+            print(f"{target:35s} 실패: {e}")
+
+    print("\n=== parser first use ===")
+    for ext, ms in time_parser_first_use().items():
+        print(f"{ext:6s} " + ("미지원 (의존성 없음)" if ms is None else f"{ms:8.1f} ms"))
+
+
+if __name__ == "__main__":
+    main()
@@ -156,14 +156,23 @@ export default function ChatPage({ api, indexInfo }) {
           let acc = ''
           let gotAny = false
           let done = false
-          const watchdog = setTimeout(() => { try { reader.cancel() } catch {} }, 15000)
+          // 토큰이 15초 동안 오지 않으면 중단 (응답 전체 시간이 아닌 유휴 시간 기준)
+          let watchdog = null
+          const armWatchdog = () => {
+            if (watchdog) clearTimeout(watchdog)
+            watchdog = setTimeout(() => { try { reader.cancel() } catch {} }, 15000)
+          }
+          armWatchdog()
           while (true) {
             const { done: d, value } = await reader.read(); if (d) break
+            armWatchdog()
             const chunk = decoder.decode(value, { stream: true }); acc += chunk
             const parts = acc.split('\n\n'); acc = parts.pop() || ''
             for (const ev of parts) {
               const lines = ev.split('\n').filter(Boolean)
               if (lines.some(l => l.startsWith('event: done'))) done = true
+              // done/metrics/error 등 이름 있는 이벤트는 답변 본문에 붙이지 않음
+              if (lines.some(l => l.startsWith('event: '))) continue
               const dataLines = lines.filter(l => l.startsWith('data: ')).map(l => l.slice(6))
               const text = dataLines.join('\n')
               if (text) {
@@ -267,8 +276,41 @@ export default function ChatPage({ api, indexInfo }) {
       })
       
       try {
-        const res = await fetch(api('/search'), { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ base_path: basePath, query: q, allowed_exts: allowedExts }) })
-        const data = await res.json()
+        const body = JSON.stringify({ base_path: basePath, query: q, allowed_exts: allowedExts })
+        let data = null
+        // 규칙 기반 잠정 결과를 먼저 보여주고, LLM 키워드 결과(final)로 교체
+        try {
+          const sres = await fetch(api('/search/stream'), { method: 'POST', headers: { 'Content-Type': 'application/json' }, body })
+          if (sres.ok && (sres.headers.get('content-type') || '').includes('text/event-stream')) {
+            const reader = sres.body.getReader()
+            const decoder = new TextDecoder()
+            let acc = ''
+            while (true) {
+              const { done: d, value } = await reader.read(); if (d) break
+              acc += decoder.decode(value, { stream: true })
+              const parts = acc.split('\n\n'); acc = parts.pop() || ''
+              for (const ev of parts) {
+                const lines = ev.split('\n')
+                const name = (lines.find(l => l.startsWith('event: ')) || '').slice(7)
+                const payload = lines.filter(l => l.startsWith('data: ')).map(l => l.slice(6)).join('\n')
+                if (name === 'provisional') {
+                  const p = JSON.parse(payload)
+                  setItems(p.items || [])
+                  const targetIndex = assistantIndexRef.current
+                  setMessages(prev => prev.map((m, i) => i === targetIndex ? { ...m, text: `잠정 결과 ${(p.items || []).length}건, 키워드 분석 중…` } : m))
+                } else if (name === 'final') {
+                  data = JSON.parse(payload)
+                }
+              }
+            }
+          }
+        } catch (e) {
+          data = null
+        }
+        if (!data) {
+          const res = await fetch(api('/search'), { method: 'POST', headers: { 'Content-Type': 'application/json' }, body })
+          data = await res.json()
+        }
         setItems(data.items || [])
 
         // Replace "찾는 중..." message with expanded keywords info first, then actions
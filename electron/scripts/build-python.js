@@ -87,6 +87,14 @@ try {
     '--hidden-import=fastapi',
     '--hidden-import=uvicorn',
     '--hidden-import=pydantic',
+    // 파서는 parsers/registry.py에서 지연 import 되므로 명시적으로 포함
+    '--hidden-import=parsers.Parser_txt',
+    '--hidden-import=parsers.Parser_word',
+    '--hidden-import=parsers.Parser_pdf',
+    '--hidden-import=parsers.Parser_excel',
+    '--hidden-import=parsers.Parser_csv',
+    '--hidden-import=parsers.Parser_pptx',
+    '--hidden-import=parsers.Parser_hwp',
     path.join(projectRoot, 'backend', 'server.py')
   ];
 
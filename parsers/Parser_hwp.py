@@ -1,59 +1,134 @@
+import re
+import struct
+import zlib
+
 try:
     import olefile
-    import struct
-    import zlib
 except ImportError:
     olefile = None
 
+# HWP 5.0 FileHeader 속성 비트
+_FLAG_COMPRESSED = 0x01
+_FLAG_PASSWORD = 0x02
+_FLAG_DISTRIBUTION = 0x04
+
+# 레코드 태그 (HWPTAG_BEGIN = 0x10)
+HWPTAG_PARA_TEXT = 0x10 + 51
+
+_CHUNK_SIZE = 64 * 1024
+
+# 인라인/확장 컨트롤은 8 WCHAR(16바이트)를 차지하며 [코드][정보 6 WCHAR][코드] 형태
+_INLINE_CTRL_RE = re.compile(r"([\x01-\x09\x0b\x0c\x0e-\x17])[\s\S]{6}\1")
+# 남은 문자 컨트롤(1 WCHAR) 정리: 줄/문단 나눔은 개행, 묶음 빈칸 등은 공백, 나머지는 제거
+_CHAR_CTRL_TABLE = {i: None for i in range(0x20)}
+_CHAR_CTRL_TABLE.update({0x09: "\t", 0x0a: "\n", 0x0d: "\n", 0x18: "-", 0x1e: " ", 0x1f: " "})
+# 컨트롤 정보 영역에 섞일 수 있는 짝 없는 서로게이트
+_LONE_SURROGATE_RE = re.compile(r"[\ud800-\udfff]")
+
+
+def _strip_controls(raw: bytes) -> str:
+    """PARA_TEXT 페이로드(UTF-16LE)에서 컨트롤 문자를 일괄 제거"""
+    # surrogatepass로 디코딩해야 WCHAR 단위 정렬이 유지되어 8 WCHAR 컨트롤을 정확히 건너뜀
+    text = raw.decode("utf-16le", errors="surrogatepass")
+    text = _INLINE_CTRL_RE.sub(lambda m: "\t" if m.group(1) == "\t" else "", text)
+    text = _LONE_SURROGATE_RE.sub("", text)
+    return text.translate(_CHAR_CTRL_TABLE)
+
+
+def _iter_records(chunks):
+    """압축 해제된 바이트 청크에서 (tag_id, payload) 레코드를 순차적으로 추출"""
+    buf = bytearray()
+    pos = 0
+    for chunk in chunks:
+        if pos:
+            del buf[:pos]
+            pos = 0
+        buf.extend(chunk)
+        while True:
+            if len(buf) - pos < 4:
+                break
+            header = struct.unpack_from("<I", buf, pos)[0]
+            tag_id = header & 0x3FF
+            size = (header >> 20) & 0xFFF
+            head_len = 4
+            if size == 0xFFF:
+                if len(buf) - pos < 8:
+                    break
+                size = struct.unpack_from("<I", buf, pos + 4)[0]
+                head_len = 8
+            end = pos + head_len + size
+            if end > len(buf):
+                break
+            yield tag_id, bytes(buf[pos + head_len:end])
+            pos = end
+
+
+def _iter_section_chunks(stream, compressed: bool):
+    """섹션 스트림을 청크 단위로 읽으며 필요 시 raw deflate를 점진적으로 해제"""
+    inflater = zlib.decompressobj(-15) if compressed else None
+    while True:
+        data = stream.read(_CHUNK_SIZE)
+        if not data:
+            break
+        yield inflater.decompress(data) if inflater else data
+    if inflater:
+        tail = inflater.flush()
+        if tail:
+            yield tail
+
+
+def _section_key(stream_path) -> int:
+    name = stream_path[-1]
+    digits = name[len("Section"):]
+    return int(digits) if digits.isdigit() else 0
+
+
 def parse_hwp(file_path: str) -> str:
     """
-    HWP 파일에서 텍스트를 추출합니다.
-    olefile를 사용하여 기본적인 텍스트 추출을 시도합니다.
+    HWP 5.0 파일에서 본문 텍스트를 추출합니다.
+    FileHeader의 압축 플래그를 확인한 뒤 BodyText/Section* 스트림을 점진적으로 압축 해제하고,
+    레코드 헤더를 따라가며 HWPTAG_PARA_TEXT 레코드의 텍스트만 모읍니다.
     """
     if olefile is None:
-        return "HWP 파서 라이브러리(olefile)가 설치되지 않았습니다."
-    
+        return ""
+
     try:
-        # HWP 파일이 OLE 파일인지 확인
         if not olefile.isOleFile(file_path):
-            return "HWP 파일이 올바른 OLE 형식이 아닙니다."
-        
+            return ""
+
         with olefile.OleFileIO(file_path) as ole:
-            # HWP 파일 내부 구조 탐색
-            streams = ole.listdir()
-            text_content = ""
-
-            # 텍스트가 포함된 스트림 찾기 (BodyText 섹션만 대상)
-            for stream_path in streams:
-                stream_name = "/".join(stream_path)
-                if "BodyText" not in stream_name and "bodytext" not in stream_name.lower():
-                    continue
+            if not ole.exists("FileHeader"):
+                return ""
+            header = ole.openstream("FileHeader").read(256)
+            if len(header) < 40 or not header.startswith(b"HWP Document File"):
+                return ""
+            flags = struct.unpack_from("<I", header, 36)[0]
+            # 암호 설정 문서와 배포용 문서는 본문이 암호화되어 있어 추출 불가
+            if flags & (_FLAG_PASSWORD | _FLAG_DISTRIBUTION):
+                return ""
+            compressed = bool(flags & _FLAG_COMPRESSED)
+
+            sections = [
+                p for p in ole.listdir(streams=True, storages=False)
+                if len(p) == 2 and p[0] == "BodyText" and p[1].startswith("Section")
+            ]
+            sections.sort(key=_section_key)
+
+            paragraphs = []
+            for stream_path in sections:
                 try:
-                    # olefile은 openstream API를 사용해야 함
-                    if not ole.exists(stream_path):
-                        continue
-                    data = ole.openstream(stream_path).read()
-
-                    # 간단한 텍스트 추출 시도 (UTF-16LE 우선)
-                    text = data.decode('utf-16le', errors='ignore')
-                    # 제어 문자 제거
-                    text = ''.join(ch for ch in text if ch.isprintable() or ch.isspace())
-                    if text.strip():
-                        text_content += text + "\n"
-                    else:
-                        # 보조 시도: UTF-8
-                        text = data.decode('utf-8', errors='ignore')
-                        text = ''.join(ch for ch in text if ch.isprintable() or ch.isspace())
-                        if text.strip():
-                            text_content += text + "\n"
-                except Exception:
-                    # 과도한 로그를 피하기 위해 상세 메시지는 생략하고 건너뜀
+                    stream = ole.openstream(stream_path)
+                    for tag_id, payload in _iter_records(_iter_section_chunks(stream, compressed)):
+                        if tag_id != HWPTAG_PARA_TEXT:
+                            continue
+                        text = _strip_controls(payload).strip()
+                        if text:
+                            paragraphs.append(text)
+                except (zlib.error, OSError):
+                    # 손상된 섹션은 건너뛰고 나머지 섹션 계속 처리
                     continue
-            
-            if not text_content.strip():
-                return "HWP 파일에서 텍스트를 추출할 수 없습니다. 이 파일은 복잡한 형식일 수 있습니다."
-            
-            return text_content.strip()
-            
+
+            return "\n".join(paragraphs)
+
     except Exception as e:
-        return ""
\ No newline at end of file
+        return ""
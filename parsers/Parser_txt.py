@@ -1,17 +1,115 @@
-def parse_txt(file_path: str) -> str:
+import codecs
+import mmap
+import os
+from typing import Optional
+
+# 인코딩 판별에 사용하는 앞부분 샘플 크기
+SNIFF_BYTES = 64 * 1024
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    # UTF-32 LE BOM(FF FE 00 00)은 UTF-16 LE BOM으로 시작하므로 먼저 확인
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+
+def _looks_like_utf8(sample: bytes) -> bool:
+    # 샘플 끝에서 잘린 멀티바이트 문자는 허용 (final=False)
     try:
-        # 다양한 인코딩으로 시도
-        encodings = ['utf-8', 'cp949', 'euc-kr', 'latin-1']
-        for encoding in encodings:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _cp949_pair_ratio(sample: bytes) -> float:
+    """상위 바이트가 CP949 2바이트 문자(리드/트레일 쌍)로 얼마나 잘 맞는지 비율로 반환"""
+    valid = 0
+    invalid = 0
+    i = 0
+    n = len(sample)
+    while i < n:
+        lead = sample[i]
+        if lead < 0x80:
+            i += 1
+            continue
+        if i + 1 >= n:
+            break
+        trail = sample[i + 1]
+        if 0x81 <= lead <= 0xFE and lead != 0xC9 and lead != 0xFE and (
+            0xA1 <= trail <= 0xFE
+            or (lead <= 0xC6 and (0x41 <= trail <= 0x5A or 0x61 <= trail <= 0x7A or 0x81 <= trail <= 0xA0))
+        ):
+            valid += 1
+            i += 2
+        else:
+            invalid += 1
+            i += 1
+    total = valid + invalid
+    return valid / total if total else 0.0
+
+
+def detect_encoding(sample: bytes) -> str:
+    """BOM, UTF-8 유효성, CP949 바이트쌍 통계 순으로 샘플의 인코딩을 추정"""
+    for bom, name in _BOMS:
+        if sample.startswith(bom):
+            return name
+    if _looks_like_utf8(sample):
+        return 'utf-8'
+    if _cp949_pair_ratio(sample) >= 0.95:
+        return 'cp949'
+    return 'latin-1'
+
+
+def load_text(file_path: str, offset: int = 0, length: Optional[int] = None) -> str:
+    """
+    파일을 메모리 맵으로 열어 인코딩을 한 번만 판별하고 한 번만 디코딩합니다.
+    offset/length(바이트)를 지정하면 해당 구간만 디코딩합니다.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0 or offset >= size:
+        return ""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            encoding = detect_encoding(mm[:SNIFF_BYTES])
+            start = max(0, offset)
+            end = size if length is None else min(size, start + max(0, length))
+            if encoding == 'utf-8-sig' and start == 0:
+                start = len(codecs.BOM_UTF8)
+                encoding = 'utf-8'
+            elif encoding.startswith(('utf-16', 'utf-32')):
+                # BOM 건너뛰기 및 2/4바이트 경계 정렬
+                width = 4 if encoding.startswith('utf-32') else 2
+                start = max(start, width)
+                start -= (start % width)
+                end -= ((end - start) % width)
+            elif encoding == 'utf-8-sig':
+                encoding = 'utf-8'
+            if encoding == 'utf-8':
+                # 구간이 멀티바이트 문자 중간에서 시작하면 이어지는 바이트(0x80~0xBF)를 건너뜀
+                skip = 0
+                while skip < 3 and start + skip < end and 0x80 <= mm[start + skip] <= 0xBF:
+                    skip += 1
+                start += skip
+            data = mm[start:end]
+        if encoding == 'utf-8':
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            except UnicodeDecodeError:
-                continue
-        # 모든 인코딩 시도 실패 시 바이너리로 읽어서 무시
-        with open(file_path, 'rb') as f:
-            content = f.read()
-            return content.decode('utf-8', errors='ignore')
+                # 구간 끝에서 잘린 문자는 버림 (final=False)
+                return codecs.getincrementaldecoder('utf-8')().decode(data, final=False)
+            except UnicodeDecodeError as e:
+                # 앞부분 샘플만 ASCII/UTF-8이고 뒤에서 CP949 등이 나오는 파일: 처음 실패한 지점부터 다시 판별
+                # (CP949로 보이지 않으면 앞부분에서 판별한 UTF-8을 유지하고 깨진 바이트만 대체)
+                if detect_encoding(data[e.start:e.start + SNIFF_BYTES]) == 'cp949':
+                    encoding = 'cp949'
+        return data.decode(encoding, errors='replace')
+
+
+def parse_txt(file_path: str, max_bytes: Optional[int] = None) -> str:
+    try:
+        return load_text(file_path, 0, max_bytes)
     except Exception as e:
         # 권한 문제, 파일 손상 등 모든 예외 처리
-        return ""
\ No newline at end of file
+        return ""
@@ -0,0 +1,100 @@
+import importlib
+import importlib.util
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# 확장자 -> (모듈, 함수) 진입점. 파서 모듈은 처음 사용할 때 import 됩니다.
+PARSER_ENTRY_POINTS: Dict[str, Tuple[str, str]] = {
+    '.txt': ('parsers.Parser_txt', 'parse_txt'),
+    '.md': ('parsers.Parser_txt', 'parse_txt'),
+    '.docx': ('parsers.Parser_word', 'parse_word'),
+    '.pdf': ('parsers.Parser_pdf', 'parse_pdf'),
+    '.xlsx': ('parsers.Parser_excel', 'parse_excel'),
+    '.xls': ('parsers.Parser_excel', 'parse_excel'),
+    '.csv': ('parsers.Parser_csv', 'parse_csv'),
+    '.pptx': ('parsers.Parser_pptx', 'parse_pptx'),
+    '.hwp': ('parsers.Parser_hwp', 'parse_hwp'),
+}
+
+# 파서 모듈이 필요로 하는 서드파티 패키지 (import 없이 설치 여부만 확인)
+PARSER_REQUIREMENTS: Dict[str, List[str]] = {
+    'parsers.Parser_txt': [],
+    'parsers.Parser_word': ['docx'],
+    'parsers.Parser_pdf': ['pypdf'],
+    'parsers.Parser_excel': ['pandas'],
+    'parsers.Parser_csv': ['pandas'],
+    'parsers.Parser_pptx': ['pptx'],
+    'parsers.Parser_hwp': ['olefile'],
+}
+
+_loaded: Dict[str, Callable[[str], str]] = {}
+_failed: set = set()
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _module_available(module_name: str) -> bool:
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=None)
+def is_supported(ext: str) -> bool:
+    """Check (without importing the parser) whether an extension can be parsed"""
+    entry = PARSER_ENTRY_POINTS.get((ext or '').lower())
+    if not entry:
+        return False
+    return all(_module_available(dep) for dep in PARSER_REQUIREMENTS.get(entry[0], []))
+
+
+def available_extensions() -> List[str]:
+    """Extensions whose parser dependencies are installed (cached probe)"""
+    return sorted(ext for ext in PARSER_ENTRY_POINTS if is_supported(ext))
+
+
+def get_parser(ext: str) -> Optional[Callable[[str], str]]:
+    """Return the parser for an extension, importing its module on first use"""
+    ext = (ext or '').lower()
+    func = _loaded.get(ext)
+    if func is not None:
+        return func
+    entry = PARSER_ENTRY_POINTS.get(ext)
+    if not entry or entry[0] in _failed or not is_supported(ext):
+        return None
+    with _lock:
+        func = _loaded.get(ext)
+        if func is not None:
+            return func
+        mod_name, func_name = entry
+        try:
+            func = getattr(importlib.import_module(mod_name), func_name)
+        except Exception:
+            _failed.add(mod_name)
+            return None
+        for other_ext, other_entry in PARSER_ENTRY_POINTS.items():
+            if other_entry == entry:
+                _loaded[other_ext] = func
+    return func
+
+
+class LazyParserMapping(Mapping):
+    """Read-only ext -> parser mapping that loads parsers on access"""
+
+    def __getitem__(self, ext: str) -> Callable[[str], str]:
+        func = get_parser(ext)
+        if func is None:
+            raise KeyError(ext)
+        return func
+
+    def __contains__(self, ext) -> bool:
+        return is_supported(ext)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(available_extensions())
+
+    def __len__(self) -> int:
+        return len(available_extensions())